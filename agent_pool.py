@@ -0,0 +1,152 @@
+"""
+Agent pooling with bounded memory.
+
+agno agents keep every run (messages, responses and tool results) in agent.memory, so one
+long-lived agent shared by every session grows for the life of the server. Agents are
+instead leased from a pool for one run at a time: a lease never shares an instance with a
+concurrent run, and on return the agent's run history is cleared. A run that outlives its
+lease (the losing request of a hedged pair) keeps the agent out of the pool until it ends.
+Agents are retired after max_uses runs and only max_idle are kept per kind, so resident
+memory stays flat.
+"""
+import os
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from metrics import METRICS
+
+# ------------------ Configuration ------------------
+DEFAULT_MAX_IDLE = int(os.environ.get("HEARST_AGENT_POOL_MAX_IDLE", 4))
+DEFAULT_MAX_USES = int(os.environ.get("HEARST_AGENT_MAX_USES", 50))
+
+
+# ------------------ Memory Helpers ------------------
+def agent_history_size(agent):
+    """
+    Number of runs and messages the agent is holding in memory.
+    """
+    memory = getattr(agent, "memory", None)
+    if memory is None:
+        return 0
+    return len(getattr(memory, "runs", None) or []) + len(getattr(memory, "messages", None) or [])
+
+
+def reset_agent_state(agent):
+    """
+    Drop the agent's run history and last response so nothing from one run reaches the next.
+    """
+    clear = getattr(getattr(agent, "memory", None), "clear", None)
+    if callable(clear):
+        clear()
+    if hasattr(agent, "run_response"):
+        agent.run_response = None
+
+
+def process_memory_mb():
+    """
+    Resident memory of this process in MB, or the peak when the current value is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ------------------ Pool ------------------
+class AgentPool:
+    """
+    Thread-safe pool of agents per (kind, factory args). factories maps a kind to the
+    function that builds one, e.g. {"research": create_research_agent}.
+    """
+
+    def __init__(self, factories, max_idle=DEFAULT_MAX_IDLE, max_uses=DEFAULT_MAX_USES):
+        self.factories = factories
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self._idle = defaultdict(list)
+        self._leased = 0
+        self._leased_ids = set()
+        self._busy = {}
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self, kind, *args):
+        """
+        Yield an agent for the exclusive use of one run, returning it to the pool afterwards.
+        """
+        key = (kind,) + args
+        with self._lock:
+            agent, uses = self._idle[key].pop() if self._idle[key] else (None, 0)
+            self._leased += 1
+        if agent is None:
+            try:
+                agent = self.factories[kind](*args)
+            except BaseException:
+                with self._lock:
+                    self._leased -= 1
+                raise
+        with self._lock:
+            self._leased_ids.add(id(agent))
+        self._count(kind, "reused" if uses else "created")
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                self._leased_ids.discard(id(agent))
+                busy = self._busy.pop(id(agent), None)
+            if busy is None:
+                self._release(key, agent, uses + 1)
+            else:
+                # Called at once if the run has already finished
+                busy.add_done_callback(lambda _: self._release(key, agent, uses + 1))
+
+    def hold_until_done(self, agent, future):
+        """
+        Keep a leased agent out of the pool until future (a run still using it) finishes, even
+        after its lease ends. Agents this pool did not lease are ignored.
+        """
+        with self._lock:
+            if id(agent) in self._leased_ids:
+                self._busy[id(agent)] = future
+
+    def _release(self, key, agent, uses):
+        METRICS.incr("agent_history_items", agent_history_size(agent), kind=key[0])
+        reset_agent_state(agent)
+        with self._lock:
+            self._leased -= 1
+            keep = uses < self.max_uses and len(self._idle[key]) < self.max_idle
+            if keep:
+                self._idle[key].append((agent, uses))
+        if not keep:
+            self._count(key[0], "retired")
+        rss = process_memory_mb()
+        if rss is not None:
+            METRICS.set_gauge("process_resident_memory_mb", round(rss, 1))
+
+    def _count(self, kind, result):
+        with self._lock:
+            self._counts[result] += 1
+        METRICS.incr("agent_pool", kind=kind, result=result)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "idle": sum(len(agents) for agents in self._idle.values()),
+                "leased": self._leased,
+                **{result: self._counts[result] for result in ("created", "reused", "retired")},
+            }
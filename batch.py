@@ -0,0 +1,203 @@
+"""
+Headless batch runner for the research -> posts -> Word report pipeline.
+
+Usage:
+    python batch.py topics.jsonl --out output/ --concurrency 4 --rpm 30
+
+Topics are read from a JSONL file (one {"topic": "..."} object or JSON string per line)
+or a CSV file (a "topic" column, or the first column). Each finished topic is appended to
+<out>/results.jsonl and written to <out>/<slug>.docx as soon as it completes, and topics
+that already succeeded are skipped on the next run, so an interrupted batch can be resumed.
+A topic whose platform posts only partly succeeded (--parallel-posts) is recorded as
+"partial" and run again on the next run.
+
+With --zip, every successful report in <out>/results.jsonl (including earlier runs) is also
+bundled into a single ZIP, rendered one document at a time.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pipeline import RESEARCH_INSTRUCTIONS, PipelineError, run_topic
+from ratelimit import RateLimitedRunner, TokenBucket
+from research_cache import ResearchCache, normalize_topic
+from topic_index import SimilarTopicIndex
+from word_export import create_word_doc, write_reports_zip
+
+RESULTS_FILE = "results.jsonl"
+
+
+def read_topics(path):
+    """
+    Read topics from a .jsonl or .csv file, dropping blanks and duplicates.
+    """
+    topics = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.reader(f)
+            rows = list(reader)
+            if rows and "topic" in [c.strip().lower() for c in rows[0]]:
+                column = [c.strip().lower() for c in rows[0]].index("topic")
+                rows = rows[1:]
+            else:
+                column = 0
+            topics = [row[column] for row in rows if len(row) > column]
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                item = json.loads(line)
+                topics.append(item.get("topic", "") if isinstance(item, dict) else str(item))
+
+    seen, unique = set(), []
+    for topic in topics:
+        topic = topic.strip()
+        if topic and normalize_topic(topic) not in seen:
+            seen.add(normalize_topic(topic))
+            unique.append(topic)
+    return unique
+
+
+def topic_slug(topic):
+    slug = re.sub(r"[^a-z0-9]+", "-", normalize_topic(topic)).strip("-")
+    return slug[:80] or "topic"
+
+
+def load_completed(out_dir):
+    """
+    Return the normalized topics that already have a successful result in out_dir.
+    """
+    completed = set()
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a partially written line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(normalize_topic(record.get("topic", "")))
+    return completed
+
+
+def iter_result_reports(out_dir):
+    """
+    Yield (filename, posts, research_data) for each successful record in results.jsonl,
+    reading the file lazily so large batches are never loaded at once.
+    """
+    path = os.path.join(out_dir, RESULTS_FILE)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                yield record["slug"] + ".docx", record.get("posts") or {}, record.get("research") or {}
+
+
+def process_topic(topic, out_dir, cache, runner, force_refresh=False, parallel_posts=False, compact=False,
+                  verify_links=False, similar_index=None):
+    started = time.time()
+    record = {"topic": topic, "slug": topic_slug(topic)}
+    try:
+        result = run_topic(
+            topic, cache=cache, force_refresh=force_refresh, parallel_posts=parallel_posts, runner=runner, compact=compact,
+            verify_links=verify_links, similar_index=similar_index,
+        )
+        docx_path = os.path.join(out_dir, record["slug"] + ".docx")
+        with open(docx_path, "wb") as f:
+            f.write(create_word_doc(result["posts"], result["research"]).getvalue())
+        # Missing platforms are retried on resume; the research itself comes from the cache
+        record.update(result, status="partial" if result.get("post_errors") else "ok", docx=docx_path)
+    except PipelineError as exc:
+        record.update(status="error", error=str(exc), raw=exc.raw)
+    except Exception as exc:
+        record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+    record["elapsed_seconds"] = round(time.time() - started, 2)
+    return record
+
+
+def run_batch(topics, out_dir, concurrency=4, requests_per_minute=30, force_refresh=False,
+              parallel_posts=False, use_cache=True, compact=False, verify_links=False, reuse_similar=False,
+              log=print):
+    os.makedirs(out_dir, exist_ok=True)
+    completed = load_completed(out_dir)
+    pending = [t for t in topics if normalize_topic(t) not in completed]
+    log(f"{len(topics)} topics, {len(topics) - len(pending)} already done, {len(pending)} to run")
+
+    cache = ResearchCache() if use_cache else None
+    similar_index = SimilarTopicIndex(cache, RESEARCH_INSTRUCTIONS) if cache is not None and reuse_similar else None
+    bucket = TokenBucket.per_minute(requests_per_minute) if requests_per_minute else None
+    runner = RateLimitedRunner(bucket)
+    results_lock = threading.Lock()
+    results_path = os.path.join(out_dir, RESULTS_FILE)
+    counts = {"ok": 0, "partial": 0, "error": 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(process_topic, topic, out_dir, cache, runner, force_refresh, parallel_posts, compact, verify_links,
+                            similar_index): topic
+            for topic in pending
+        }
+        for future in as_completed(futures):
+            record = future.result()
+            with results_lock, open(results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            counts[record["status"]] += 1
+            log(f"[{record['status']}] {record['topic']} ({record['elapsed_seconds']}s)"
+                + (f" - {record['error']}" if record["status"] == "error" else "")
+                + (f" - failed: {', '.join(sorted(record['post_errors']))}" if record["status"] == "partial" else ""))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Hearst research, posts and Word reports for a list of topics.")
+    parser.add_argument("topics", help="Path to a .jsonl or .csv file of topics")
+    parser.add_argument("--out", default="output", help="Output directory (default: output)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Topics processed at the same time (default: 4)")
+    parser.add_argument("--rpm", type=int, default=30, help="Max Groq requests per minute, 0 to disable pacing (default: 30)")
+    parser.add_argument("--force-refresh", action="store_true", help="Ignore cached research")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the research cache")
+    parser.add_argument("--parallel-posts", action="store_true", help="Write each platform's post with its own request")
+    parser.add_argument("--compact", action="store_true", help="Give the post agents a compact research brief instead of the full summary")
+    parser.add_argument("--verify-links", action="store_true", help="Drop dead and homepage research links before writing posts")
+    parser.add_argument("--reuse-similar", action="store_true",
+                        help="Reuse cached research of a near-duplicate topic instead of researching again")
+    parser.add_argument("--zip", help="Also bundle every successful Word report into this ZIP file")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("GROQ_API_KEY"):
+        parser.error("GROQ_API_KEY must be set in the environment")
+
+    counts = run_batch(
+        read_topics(args.topics), args.out,
+        concurrency=args.concurrency,
+        requests_per_minute=args.rpm,
+        force_refresh=args.force_refresh,
+        parallel_posts=args.parallel_posts,
+        use_cache=not args.no_cache,
+        compact=args.compact,
+        verify_links=args.verify_links,
+        reuse_similar=args.reuse_similar,
+    )
+    print(f"Done: {counts['ok']} succeeded, {counts['partial']} partly succeeded, {counts['error']} failed")
+    if args.zip:
+        written = write_reports_zip(iter_result_reports(args.out), args.zip)
+        print(f"Wrote {written} reports to {args.zip}")
+    return 0 if counts["error"] == 0 and counts["partial"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Memory held by agents across many runs: one shared agent versus the agent pool.
+
+agno agents append every run to agent.memory. The stand-in agents below do the same with a
+synthetic response of --response-kb per run, and each mode serves --runs runs from
+--concurrency threads:
+
+- shared: one agent per kind for the whole process, as the app did with st.cache_resource
+- pooled: agents leased from an AgentPool, cleared on return and retired after --max-uses
+
+Reported per mode: run history left in the agents and traced memory still allocated at the end.
+
+Usage:
+    python benchmarks/bench_agent_memory.py --runs 500 --concurrency 4 --response-kb 20
+"""
+import argparse
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep benchmark counters out of the production metrics log
+os.environ.setdefault("HEARST_METRICS_LOG", "")
+
+from agent_pool import AgentPool, agent_history_size  # noqa: E402
+
+
+# ------------------ Stand-in Agents ------------------
+class StubMemory:
+    def __init__(self):
+        self.runs = []
+        self.messages = []
+
+    def clear(self):
+        self.runs = []
+        self.messages = []
+
+
+class StubAgent:
+    def __init__(self, response_bytes):
+        self.response_bytes = response_bytes
+        self.memory = StubMemory()
+        self.run_response = None
+        self._lock = threading.Lock()
+
+    def run(self, message):
+        content = message + "x" * self.response_bytes
+        with self._lock:
+            self.memory.messages.append(message)
+            self.memory.runs.append(content)
+            self.run_response = content
+        return content
+
+
+# ------------------ Modes ------------------
+def run_shared(args):
+    agent = StubAgent(args.response_kb * 1024)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        # Responses are dropped at once, so only what the agents keep is measured
+        for _ in executor.map(lambda i: agent.run(f"topic {i}") and None, range(args.runs)):
+            pass
+    return [agent]
+
+
+def run_pooled(args):
+    pool = AgentPool({"research": lambda: StubAgent(args.response_kb * 1024)}, max_idle=args.concurrency,
+                     max_uses=args.max_uses)
+
+    def one(i):
+        with pool.lease("research") as agent:
+            agent.run(f"topic {i}")
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in executor.map(one, range(args.runs)):
+            pass
+    return [agent for agents in pool._idle.values() for agent, _ in agents]
+
+
+def measure(mode, args):
+    gc.collect()
+    tracemalloc.start()
+    agents = mode(args)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return sum(agent_history_size(agent) for agent in agents), current / (1024 * 1024), peak / (1024 * 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=500, help="Agent runs per mode (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent runs (default: %(default)s)")
+    parser.add_argument("--response-kb", type=int, default=20, help="Size of each run's response (default: %(default)s)")
+    parser.add_argument("--max-uses", type=int, default=50, help="Runs before a pooled agent is retired (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<10}{'history':>10}{'retained MB':>14}{'peak MB':>10}")
+    for name, mode in (("shared", run_shared), ("pooled", run_pooled)):
+        history, current_mb, peak_mb = measure(mode, args)
+        print(f"{name:<10}{history:>10}{current_mb:>14.1f}{peak_mb:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Query latency of the history store's full-text search.
+
+Fills a temporary database with synthetic runs (research plus posts, and Idea Lab runs)
+and times searches, first-page listings, deep pages and opening a run.
+
+Usage:
+    python benchmarks/bench_history.py --runs 5000
+    python benchmarks/bench_history.py --db .cache/history.sqlite3   # an existing store, read-only queries
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history_store import HistoryStore  # noqa: E402
+
+WORDS = (
+    "bitcoin mining hashrate difficulty halving renewable solar hydro flare gas immersion cooling asic "
+    "texas iceland grid demand response stranded energy efficiency joules terahash treasury hosting "
+    "revenue fees block reward sustainability emissions carbon nuclear heat reuse ercot curtailment"
+).split()
+QUERIES = ["renewable", "immersion cooling", "texas grid", "halv", "flare gas stranded", "nuclear heat reuse", "asic efficiency"]
+
+
+def synthetic_text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def populate(store, runs, seed=7):
+    rng = random.Random(seed)
+    for i in range(runs):
+        if i % 5 == 4:
+            ideas = [{"topic": synthetic_text(rng, 4), "summary": synthetic_text(rng, 60), "description": synthetic_text(rng, 120),
+                      "links": [f"https://example.com/2025/01/01/idea-{i}-{n}"]} for n in range(5)]
+            store.add_ideas_run({"summary": synthetic_text(rng, 200), "links": []}, ideas)
+        else:
+            research = {"summary": synthetic_text(rng, 1500), "simple_explanation": synthetic_text(rng, 150),
+                        "stats": [synthetic_text(rng, 10) for _ in range(8)],
+                        "links": [f"https://example.com/2025/01/01/report-{i}-{n}" for n in range(8)]}
+            posts = {key: synthetic_text(rng, 60) for key in ("linkedin", "instagram", "x")}
+            store.add_posts_run(synthetic_text(rng, 5), research, posts)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))], samples[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5000, help="Synthetic runs to insert (default: %(default)s)")
+    parser.add_argument("--db", help="Benchmark an existing history database instead")
+    parser.add_argument("--repeat", type=int, default=30, help="Timed repetitions per query (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            store = HistoryStore(args.db)
+        else:
+            store = HistoryStore(os.path.join(tmp, "history.sqlite3"))
+            started = time.perf_counter()
+            populate(store, args.runs)
+            print(f"Inserted {args.runs} runs in {time.perf_counter() - started:.1f}s "
+                  f"({os.path.getsize(store.path) / (1024 * 1024):.1f} MB)")
+        print(f"Runs: {store.stats()}\n")
+
+        newest = store.search(limit=1)
+        cases = [(f"search {q!r}", lambda q=q: store.search(q)) for q in QUERIES]
+        cases += [
+            ("list newest page", lambda: store.search()),
+            ("list page 50", lambda: store.search(offset=50 * 20)),
+            ("search 'mining' page 20", lambda: store.search("mining", offset=20 * 20)),
+            ("open newest run", lambda: store.get(newest[0]["id"]) if newest else None),
+        ]
+        print(f"{'query':<32}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, fn in cases:
+            p50, p95, worst = timed(fn, args.repeat)
+            print(f"{name:<32}{p50:>10.2f}{p95:>10.2f}{worst:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Micro-benchmark for the JSON extraction helpers in parsing.py.
+
+Compares the single-pass extract_json_values scanner with the previous regex-based
+extract_json_from_text / extract_json_objects on large agent outputs.
+
+Usage:
+    python benchmarks/bench_json_extract.py                    # synthetic outputs
+    python benchmarks/bench_json_extract.py --samples outputs/  # recorded outputs (*.txt, *.md, *.json)
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import extract_json_from_text, extract_json_objects  # noqa: E402
+
+
+# ------------------ Previous implementations ------------------
+def legacy_extract_json_from_text(text):
+    text = re.sub(r"```(?:json)?", "", text, flags=re.IGNORECASE).replace("```", "")
+    match = re.search(r'\{[\s\S]*\}', text)
+    if match:
+        try:
+            return json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def legacy_extract_json_objects(text):
+    json_objects = []
+    for match in re.finditer(r'\{.*?\}', text, re.DOTALL):
+        try:
+            json_objects.append(json.loads(match.group(0)))
+        except Exception:
+            continue
+    return json_objects
+
+
+# ------------------ Synthetic agent outputs ------------------
+def research_output(summary_words):
+    research = {
+        "summary": " ".join(f"word{i} {{ref}}" if i % 50 == 0 else f"word{i}" for i in range(summary_words)),
+        "simple_explanation": "Bitcoin mining is how new bitcoins are created. " * 10,
+        "stats": [f"{i}% of hashrate uses renewable energy" for i in range(20)],
+        "links": [f"https://www.coindesk.com/2025/01/{i:02d}/bitcoin-mining-report-{i}" for i in range(10)],
+    }
+    body = json.dumps(research, indent=2)
+    # Prose and a stray brace after the object break the greedy regex
+    return "Here is the research you asked for:\n```json\n" + body + "\n```\nLet me know if you need more {details}."
+
+
+def ideas_output(count, description_words):
+    ideas = [
+        {
+            "topic": f"Idea {i}",
+            "summary": "A short summary. " * 8,
+            "description": " ".join(f"detail{j}" for j in range(description_words)),
+            "links": [f"https://cointelegraph.com/news/mining-{i}-{j}" for j in range(3)],
+            "meta": {"angle": {"tone": "positive"}},
+        }
+        for i in range(count)
+    ]
+    return "```json\n" + json.dumps(ideas, indent=2) + "\n```"
+
+
+def brace_heavy_output(size):
+    # Many unmatched braces: quadratic for the per-brace json.loads strategy
+    chunk = "{ not json { still not } "
+    return chunk * (size // len(chunk)) + json.dumps({"ok": True})
+
+
+def prose_output(size):
+    # Citations, braces and a stray quote in prose, with the answer at the very end
+    chunk = 'Miners [1] expanded {see note} capacity, the CEO said "we are growing [2], '
+    return chunk * (size // len(chunk)) + json.dumps({"ok": True})
+
+
+def synthetic_samples():
+    return {
+        "research_50KB": research_output(8_000),
+        "research_500KB": research_output(80_000),
+        "ideas_100KB": ideas_output(5, 3_000),
+        "ideas_500KB": ideas_output(25, 3_000),
+        "brace_heavy_100KB": brace_heavy_output(100_000),
+        "prose_quotes_100KB": prose_output(100_000),
+    }
+
+
+def recorded_samples(directory):
+    samples = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".txt", ".md", ".json")):
+            with open(os.path.join(directory, name), encoding="utf-8") as f:
+                samples[name] = f.read()
+    return samples
+
+
+def bench(fn, text, number):
+    return min(timeit.repeat(lambda: fn(text), number=number, repeat=3)) / number * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", help="Directory of recorded agent outputs")
+    parser.add_argument("--number", type=int, default=5, help="Calls per timing run (default: 5)")
+    args = parser.parse_args(argv)
+
+    samples = recorded_samples(args.samples) if args.samples else synthetic_samples()
+    print(f"{'sample':<24}{'size':>10}  {'first obj (old/new ms)':>26}  {'all objs (old/new ms)':>26}  found old/new")
+    for name, text in samples.items():
+        old_first = bench(legacy_extract_json_from_text, text, args.number)
+        new_first = bench(extract_json_from_text, text, args.number)
+        old_all = bench(legacy_extract_json_objects, text, args.number)
+        new_all = bench(extract_json_objects, text, args.number)
+        found_old = (legacy_extract_json_from_text(text) is not None, len(legacy_extract_json_objects(text)))
+        found_new = (extract_json_from_text(text) is not None, len(extract_json_objects(text)))
+        print(
+            f"{name:<24}{len(text) // 1024:>8}KB  {old_first:>12.2f} /{new_first:>11.2f}  "
+            f"{old_all:>12.2f} /{new_all:>11.2f}  {found_old} / {found_new}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Throughput of the free-text fallback parsers on large markdown outputs.
+
+Generates markdown idea lists and research breakdowns of the requested sizes and times
+parse_ideas_from_text, parse_research and research_from_text against the regex-per-field
+parsers they replaced (kept below as the baseline). A "dense" case packs long paragraphs
+full of numbers and URLs into a few sections, the shape that made the old per-block scans
+expensive.
+
+Usage:
+    python benchmarks/bench_parsing.py --sizes 100,300,800
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import parse_ideas_from_text, parse_research, research_from_text  # noqa: E402
+
+WORDS = (
+    "bitcoin mining hashrate difficulty halving renewable solar hydro flare gas immersion cooling asic "
+    "texas grid demand response stranded energy efficiency treasury hosting revenue fees block reward"
+).split()
+
+
+# ------------------ Baseline ------------------
+def legacy_parse_research(content):
+    items = []
+    blocks = re.split(r'### ', content)
+    for block in blocks:
+        if not block.strip():
+            continue
+        lines = block.strip().split('\n')
+        entry = {"title": lines[0].strip()}
+        body = '\n'.join(lines[1:])
+        url_match = re.search(r'(http[s]?://[^\s]+)', body)
+        if url_match:
+            entry['url'] = url_match.group(1)
+        date_match = re.search(r'Date[:]?\s*(.*)', body)
+        if date_match:
+            entry['date'] = date_match.group(1)
+        stats = re.findall(r'(\d+\.?\d*%?\s*[^.;\n]+)', body)
+        if stats:
+            entry['stats'] = stats[:3]
+        entry['summary'] = ''
+        summary_lines = body.split('Summary:')
+        if len(summary_lines) > 1:
+            entry['summary'] = summary_lines[1].strip()
+        items.append(entry)
+    return items
+
+
+def legacy_parse_ideas_from_text(text):
+    idea_blocks = re.split(r'(?:^|\n)#+\s*\d+\.\s*|(?:^|\n)(?=\d+\.\s)', text)
+    ideas = []
+    for block in idea_blocks:
+        block = block.strip()
+        if not block or len(block) < 20:
+            continue
+        idea = {}
+        topic_match = re.search(r'\*\*Topic:\*\*\s*(.*)', block) or re.search(r'Topic:\s*(.*)', block)
+        idea['topic'] = topic_match.group(1).strip() if topic_match else block.split('\n')[0].strip()
+        summary_match = re.search(r'\*\*Summary:\*\*\s*(.*)', block) or re.search(r'Summary:\s*(.*)', block)
+        idea['summary'] = summary_match.group(1).strip() if summary_match else ""
+        links = re.findall(r'\[([^\]]+)\]\((https?://[^\)]+)\)', block)
+        if not links:
+            links = [(url, url) for url in re.findall(r'(https?://[^\s\*]+)', block)]
+        idea['links'] = [url for _, url in links]
+        desc_match = re.search(r'\*\*Description:\*\*\s*(.*)', block, re.DOTALL) \
+            or re.search(r'Description:\s*(.*)', block, re.DOTALL)
+        desc = desc_match.group(1).strip() if desc_match else ""
+        idea['description'] = re.split(r'\*\*Suggested Post Angle:\*\*|Suggested Post Angle:', desc)[0].strip()
+        angle_match = re.search(r'\*\*Suggested Post Angle:\*\*\s*"(.*?)"', block) \
+            or re.search(r'Suggested Post Angle:\s*"(.*?)"', block)
+        idea['suggested_post_angle'] = angle_match.group(1).strip() if angle_match else ""
+        ideas.append(idea)
+    return ideas
+
+
+# ------------------ Synthetic Outputs ------------------
+def sentence(rng, words=14):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def stat_sentence(rng):
+    return f"{rng.randint(1, 99)}.{rng.randint(0, 9)}% of {rng.choice(WORDS)} {rng.choice(WORDS)} in {rng.randint(2019, 2025)}."
+
+
+def ideas_markdown(rng, size_bytes):
+    parts, n = ["Here are the content ideas based on the latest mining news:\n"], 0
+    while sum(map(len, parts)) < size_bytes:
+        n += 1
+        parts.append(
+            f"\n### {n}. **{sentence(rng, 5)[:-1]}**\n"
+            f"**Topic:** {sentence(rng, 6)}\n"
+            f"**Summary:** {' '.join(sentence(rng) for _ in range(6))}\n"
+            f"**Useful Links:**\n"
+            f"- [Source](https://www.coindesk.com/2025/01/{n % 28 + 1:02d}/idea-{n})\n"
+            f"- https://example.com/article/idea-{n}\n"
+            f"**Description:** {' '.join(sentence(rng) for _ in range(10))}\n"
+            f"{' '.join(sentence(rng) for _ in range(6))}\n"
+            f"**Suggested Post Angle:** \"{sentence(rng, 8)}\"\n"
+        )
+    return "".join(parts)
+
+
+def research_markdown(rng, size_bytes, dense=False):
+    parts, n = [], 0
+    while sum(map(len, parts)) < size_bytes:
+        n += 1
+        if dense:
+            # Few sections, each a long run of numeric sentences and inline URLs
+            body = " ".join(
+                stat_sentence(rng) + f" See https://example.com/2024/05/{i % 28 + 1:02d}/report-{n}-{i} for details"
+                for i in range(400)
+            )
+            parts.append(f"### Section {n}\n{body}\nSummary: {' '.join(sentence(rng) for _ in range(20))}\n")
+            continue
+        parts.append(
+            f"### {sentence(rng, 6)[:-1]}\n"
+            f"Source: https://www.reuters.com/2024/07/{n % 28 + 1:02d}/report-{n}\n"
+            f"Date: July {n % 28 + 1}, 2024\n"
+            f"Key Statistics:\n- {stat_sentence(rng)}\n- {stat_sentence(rng)}\n- {stat_sentence(rng)}\n"
+            f"Summary: {' '.join(sentence(rng) for _ in range(12))}\n\n"
+        )
+    return "".join(parts)
+
+
+def timed(fn, text, repeat):
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,300,800", help="Comma-separated output sizes in KB (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per case (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=3, help="Random seed (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("ideas", ideas_markdown, legacy_parse_ideas_from_text, parse_ideas_from_text),
+        ("research", research_markdown, legacy_parse_research, parse_research),
+        ("research dense", lambda rng, size: research_markdown(rng, size, dense=True), legacy_parse_research, parse_research),
+        ("research_from_text", research_markdown, None, research_from_text),
+    ]
+    print(f"{'case':<22}{'KB':>6}{'items':>7}{'old ms':>10}{'new ms':>10}{'MB/s':>8}{'speedup':>9}")
+    for kb in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        for name, generate, legacy, current in cases:
+            text = generate(random.Random(args.seed), kb * 1024)
+            new_ms, result = timed(current, text, args.repeat)
+            items = len(result) if isinstance(result, list) else len((result or {}).get("links", []))
+            old_ms = timed(legacy, text, args.repeat)[0] if legacy else None
+            throughput = len(text) / (1024 * 1024) / (new_ms / 1000) if new_ms else float("inf")
+            print(f"{name:<22}{len(text) // 1024:>6}{items:>7}"
+                  f"{(f'{old_ms:.1f}' if old_ms is not None else '-'):>10}{new_ms:>10.1f}{throughput:>8.1f}"
+                  f"{(f'{old_ms / new_ms:.1f}x' if old_ms is not None and new_ms else '-'):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Offline end-to-end benchmark of the content pipeline.
+
+Replaces the Groq-backed agents with deterministic stand-ins that replay recorded (or
+synthetic) outputs with configurable latency, and serves web searches from a
+FixtureSearchBackend through the real CachedDuckDuckGoTools and SearchResultCache.
+Both flows run through the same pipeline functions as the app and the batch CLI:
+
+- topic flow: research_topic -> generate_posts (or generate_posts_parallel) -> create_word_doc
+- ideas flow: fetch_mining_news -> generate_ideas -> create_ideas_word_doc
+
+Reported per flow: throughput, end-to-end latency distribution and failures; per phase:
+p50/p95 latency and the JSON parse-fallback rate; overall: search cache hits, calls
+coalesced by the single-flight layer and peak traced memory.
+
+Recorded outputs are read from --fixtures DIR if given: research*.txt, posts*.txt,
+posts_<platform>*.txt, news*.txt and ideas*.txt are replayed in name order (missing stages
+use synthetic outputs), and search.json is a FixtureSearchBackend fixture.
+
+Usage:
+    python benchmarks/bench_pipeline.py --iterations 50 --concurrency 4 --latency 0.05
+    python benchmarks/bench_pipeline.py --fixtures recorded/ --parallel-posts --json run.json
+    python benchmarks/bench_pipeline.py --compare run.json --max-regression 0.2
+"""
+import argparse
+import glob
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep benchmark spans out of the production metrics log
+os.environ.setdefault("HEARST_METRICS_LOG", "")
+
+from metrics import METRICS  # noqa: E402
+from pipeline import (  # noqa: E402
+    POST_PLATFORMS,
+    fetch_mining_news,
+    generate_ideas,
+    generate_posts,
+    generate_posts_parallel,
+    research_topic,
+)
+from singleflight import SHARED_FLIGHTS  # noqa: E402
+from search_cache import CachedDuckDuckGoTools, FixtureSearchBackend, SearchResultCache  # noqa: E402
+from token_usage import estimate_tokens  # noqa: E402
+from word_export import create_ideas_word_doc, create_word_doc  # noqa: E402
+
+
+# ------------------ Stub Model ------------------
+class StubRunResponse:
+    """
+    The parts of agno's RunResponse the pipeline reads.
+    """
+
+    def __init__(self, content, metrics=None, tools=None):
+        self.content = content
+        self.metrics = metrics or {}
+        self.tools = tools or []
+
+
+class StubAgent:
+    """
+    Deterministic stand-in for an agno Agent: replays outputs in order after a simulated
+    model latency, optionally calling its search tools first the way the model would.
+    """
+
+    def __init__(self, name, outputs, latency_seconds=0.0, jitter=0.0, tools=None, searches=(), seed=0):
+        self.name = name
+        self.tools = tools or []
+        self.searches = list(searches)
+        self.latency_seconds = latency_seconds
+        self.jitter = jitter
+        self.run_response = None
+        # A list is replayed from the start; an iterator can be shared between agents
+        self._outputs = itertools.cycle(outputs) if isinstance(outputs, (list, tuple)) else outputs
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            delay = self.latency_seconds * (1 + self._random.uniform(-self.jitter, self.jitter))
+            return next(self._outputs), max(0.0, delay)
+
+    def run(self, message, stream=False):
+        content, delay = self._next()
+        tool_calls = []
+        for tool in self.tools:
+            for mode, query in self.searches:
+                search = tool.duckduckgo_news if mode == "news" else tool.duckduckgo_search
+                search(query)
+                tool_calls.append({"tool_name": search.__name__, "tool_args": {"query": query}})
+        time.sleep(delay)
+        self.run_response = StubRunResponse(
+            content,
+            metrics={"input_tokens": [estimate_tokens(message)], "output_tokens": [estimate_tokens(content)]},
+            tools=tool_calls,
+        )
+        if stream:
+            return self._stream(content)
+        return self.run_response
+
+    def _stream(self, content, chunk_chars=64):
+        for start in range(0, len(content), chunk_chars):
+            yield StubRunResponse(content[start:start + chunk_chars])
+
+
+# ------------------ Synthetic Outputs ------------------
+LINKS = [f"https://www.coindesk.com/business/2025/{m:02d}/{d:02d}/bitcoin-miners-report-{m}-{d}" for m in range(1, 4) for d in range(1, 5)]
+
+
+def _wrap(body, index, fallback_every):
+    # Every fallback_every-th output is wrapped in prose and a code fence, as models often do,
+    # so the parse fallback path is exercised at a known rate
+    if fallback_every and index % fallback_every == fallback_every - 1:
+        return "Here is the requested output:\n```json\n" + body + "\n```\nLet me know if you need changes."
+    return body
+
+
+def synthetic_outputs(stage, fallback_every, count=12, summary_words=1500):
+    outputs = []
+    for i in range(count):
+        if stage == "research":
+            body = json.dumps({
+                "summary": " ".join(f"Miners reported {i * 7 + w}% efficiency gains in Q{w % 4 + 1}." if w % 12 == 0 else f"term{w}" for w in range(summary_words)),
+                "simple_explanation": "Bitcoin mining secures the network and creates new bitcoins. " * 8,
+                "stats": [f"{20 + s}% of hashrate ran on renewables in 2024 (survey {i})" for s in range(10)],
+                "links": LINKS[:10],
+            })
+        elif stage == "posts":
+            posts = {}
+            for key, label, _, _ in POST_PLATFORMS:
+                posts[key] = f"Sample {label} #{i}: renewable energy now powers a growing share of Bitcoin mining."
+                posts[f"{key}_reference"] = LINKS[i % len(LINKS)]
+            body = json.dumps(posts)
+        elif stage.startswith("posts_"):
+            platform = stage[len("posts_"):]
+            body = json.dumps({platform: f"Sample {platform} post #{i} about efficient mining.", f"{platform}_reference": LINKS[i % len(LINKS)]})
+        elif stage == "news":
+            body = json.dumps({"summary": "Hashrate reached a new high as miners expanded in Texas. " * 20, "links": LINKS})
+        elif stage == "ideas":
+            body = json.dumps([
+                {
+                    "topic": f"Idea {n} from batch {i}",
+                    "summary": "Miners are turning stranded gas into hashrate. " * 6,
+                    "description": "Explain the economics of flare-gas mining for investors. " * 10,
+                    "links": LINKS[n:n + 2],
+                    "suggested_post_angle": "Data-driven explainer",
+                }
+                for n in range(5)
+            ])
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+        outputs.append(_wrap(body, i, fallback_every))
+    return outputs
+
+
+def synthetic_search_fixture(results=8):
+    entries = [{"title": f"Mining report {i}", "href": url, "url": url, "body": "Hashrate and energy use. " * 5}
+               for i, url in enumerate(LINKS[:results])]
+    return {"text": {"*": entries}, "news": {"*": entries}}
+
+
+def load_outputs(fixtures_dir, stage, fallback_every):
+    if fixtures_dir:
+        paths = sorted(glob.glob(os.path.join(fixtures_dir, f"{stage}*.txt")))
+        if stage == "posts":
+            # posts*.txt would also match the per-platform recordings
+            paths = [p for p in paths if not os.path.basename(p).startswith("posts_")]
+        if paths:
+            outputs = []
+            for path in paths:
+                with open(path, encoding="utf-8") as f:
+                    outputs.append(f.read())
+            return outputs
+    return synthetic_outputs(stage, fallback_every)
+
+
+# ------------------ Harness ------------------
+class StubAgents:
+    """
+    Builds a fresh set of stub agents per flow run (as batch.py does with real agents),
+    sharing one search backend and cache across runs like the app's process-wide cache.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        search_fixture = os.path.join(args.fixtures, "search.json") if args.fixtures else None
+        fixture = search_fixture if search_fixture and os.path.exists(search_fixture) else synthetic_search_fixture()
+        self.search_backend = FixtureSearchBackend(fixture, latency_seconds=args.search_latency)
+        self.search_cache = SearchResultCache()
+        stages = ["research", "posts", "news", "ideas"] + [f"posts_{key}" for key, _, _, _ in POST_PLATFORMS]
+        # One replay sequence per stage, shared by every agent built for that stage
+        self.outputs = {stage: itertools.cycle(load_outputs(args.fixtures, stage, args.fallback_every)) for stage in stages}
+        self._seed = itertools.count(args.seed)
+
+    def _agent(self, name, stage, searches=()):
+        tools = [CachedDuckDuckGoTools(cache=self.search_cache, backend=self.search_backend)] if searches else None
+        return StubAgent(
+            name, self.outputs[stage], self.args.latency, self.args.jitter,
+            tools=tools, searches=searches, seed=next(self._seed),
+        )
+
+    def research(self, topic):
+        return self._agent("Stub Research", "research", [("text", topic), ("news", topic), ("text", f"{topic} statistics")])
+
+    def posts(self):
+        return self._agent("Stub Posts", "posts")
+
+    def platform_post(self, platform):
+        return self._agent(f"Stub Posts ({platform})", f"posts_{platform}")
+
+    def news(self):
+        return self._agent("Stub News", "news", [("news", "crypto mining news"), ("text", "bitcoin mining innovation")])
+
+    def ideas(self):
+        return self._agent("Stub Ideas", "ideas")
+
+
+def topic_flow(agents, index, parallel_posts):
+    topic = f"Benchmark topic {index}"
+    research_data, _ = research_topic(topic, agent=agents.research(topic), force_refresh=True)
+    if parallel_posts:
+        posts, errors = generate_posts_parallel(research_data, agent_factory=agents.platform_post)
+        if errors:
+            raise RuntimeError(f"Post generation failed for {sorted(errors)}")
+    else:
+        posts = generate_posts(research_data, agent=agents.posts())
+    return len(create_word_doc(posts, research_data).getvalue())
+
+
+def ideas_flow(agents, index, parallel_posts):
+    news_data = fetch_mining_news(agent=agents.news())
+    ideas_list = generate_ideas(news_data, agent=agents.ideas())
+    return len(create_ideas_word_doc(ideas_list).getvalue())
+
+
+FLOWS = {"topic": topic_flow, "ideas": ideas_flow}
+
+
+def run_flow(name, agents, iterations, concurrency, parallel_posts):
+    flow = FLOWS[name]
+    latencies, failures, doc_bytes = [], [], []
+    lock = threading.Lock()
+
+    def one(index):
+        started = time.perf_counter()
+        try:
+            size = flow(agents, index, parallel_posts)
+        except Exception as exc:
+            with lock:
+                failures.append(f"{type(exc).__name__}: {exc}"[:200])
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+            doc_bytes.append(size)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(iterations)))
+    wall = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+
+    def pct(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1) if ordered else None
+
+    return {
+        "flow": name,
+        "runs": iterations,
+        "failures": len(failures),
+        "failure_samples": failures[:3],
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ordered[-1] * 1000, 1) if ordered else None,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 1) if ordered else None,
+        "mean_doc_bytes": int(statistics.mean(doc_bytes)) if doc_bytes else None,
+    }
+
+
+def phase_report():
+    fallbacks = {}
+    for row in METRICS.counters():
+        if row["name"] == "parse_fallback":
+            fallbacks[row.get("phase")] = fallbacks.get(row.get("phase"), 0) + row["value"]
+    rows = []
+    for row in METRICS.phase_summary():
+        calls = row["count"]
+        rows.append(dict(row, parse_fallback_rate=round(fallbacks.get(row["phase"], 0) / calls, 3) if calls else None))
+    return rows
+
+
+def compare(report, baseline, max_regression):
+    """
+    Return human-readable regressions of report against baseline (both as written by --json).
+    """
+    regressions = []
+    previous = {flow["flow"]: flow for flow in baseline.get("flows", [])}
+    for flow in report["flows"]:
+        before = previous.get(flow["flow"])
+        if not before:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if before.get(key) and flow.get(key) and flow[key] > before[key] * (1 + max_regression):
+                regressions.append(f"{flow['flow']} {key}: {before[key]} -> {flow[key]}")
+        if before.get("throughput_per_second") and flow.get("throughput_per_second") and \
+                flow["throughput_per_second"] < before["throughput_per_second"] * (1 - max_regression):
+            regressions.append(f"{flow['flow']} throughput: {before['throughput_per_second']} -> {flow['throughput_per_second']}/s")
+        if flow["failures"] > before.get("failures", 0):
+            regressions.append(f"{flow['flow']} failures: {before.get('failures', 0)} -> {flow['failures']}")
+    baseline_memory = baseline.get("peak_memory_mb")
+    if baseline_memory and report.get("peak_memory_mb") and report["peak_memory_mb"] > baseline_memory * (1 + max_regression):
+        regressions.append(f"peak memory: {baseline_memory} -> {report['peak_memory_mb']} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", default="topic,ideas", help="Comma-separated flows to run (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=20, help="Runs per flow (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent runs per flow (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean model latency per call in seconds (default: %(default)s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Relative latency jitter, 0-1 (default: %(default)s)")
+    parser.add_argument("--search-latency", type=float, default=0.01, help="Latency per uncached search in seconds (default: %(default)s)")
+    parser.add_argument("--fallback-every", type=int, default=4, help="Wrap every Nth synthetic output in prose; 0 disables (default: %(default)s)")
+    parser.add_argument("--parallel-posts", action="store_true", help="Generate one post per platform concurrently")
+    parser.add_argument("--fixtures", help="Directory of recorded outputs and search.json")
+    parser.add_argument("--seed", type=int, default=1, help="Latency jitter seed (default: %(default)s)")
+    parser.add_argument("--no-single-flight", action="store_true", help="Run every call even when an identical one is in flight")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows allocation-heavy code)")
+    parser.add_argument("--json", help="Write the report as JSON to this path")
+    parser.add_argument("--compare", help="Baseline JSON report; exit 1 if any flow regressed")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative regression for --compare (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = [f for f in flows if f not in FLOWS]
+    if unknown:
+        parser.error(f"Unknown flow(s): {', '.join(unknown)}")
+
+    agents = StubAgents(args)
+    SHARED_FLIGHTS.enabled = not args.no_single_flight
+    if not args.no_memory:
+        tracemalloc.start()
+    flow_reports = [run_flow(name, agents, args.iterations, args.concurrency, args.parallel_posts) for name in flows]
+    peak_memory_mb = None
+    if not args.no_memory:
+        peak_memory_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+
+    report = {
+        "settings": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        "flows": flow_reports,
+        "phases": phase_report(),
+        "search_cache": {k: v for k, v in agents.search_cache.stats().items() if k != "queries"},
+        "coalesced_calls": int(sum(c["value"] for c in METRICS.counters()
+                                   if c["name"] == "single_flight" and c.get("result") == "coalesced")),
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+    print(f"{'flow':<8}{'runs':>6}{'fail':>6}{'runs/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for flow in flow_reports:
+        print(f"{flow['flow']:<8}{flow['runs']:>6}{flow['failures']:>6}{flow['throughput_per_second']:>9}"
+              f"{flow['p50_ms']!s:>10}{flow['p95_ms']!s:>10}{flow['p99_ms']!s:>10}{flow['max_ms']!s:>10}")
+        for sample in flow["failure_samples"]:
+            print(f"    failure: {sample}")
+    print(f"\n{'phase':<22}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'fallback':>10}")
+    for row in report["phases"]:
+        print(f"{row['phase']:<22}{row['count']:>7}{row['errors']:>8}{row['p50_ms']!s:>10}{row['p95_ms']!s:>10}{row['parse_fallback_rate']!s:>10}")
+    cache = report["search_cache"]
+    print(f"\nSearch cache: {cache['hits']} hits / {cache['misses']} misses ({len(agents.search_backend.calls)} backend calls)")
+    print(f"Coalesced calls: {report['coalesced_calls']}")
+    if peak_memory_mb is not None:
+        print(f"Peak traced memory: {peak_memory_mb} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Cold-start and rerun latency profile of the Streamlit script.
+
+Runs the app headlessly with streamlit.testing.v1.AppTest (no browser, no agent calls:
+only the initial render and widget-triggered reruns are measured) and reports:
+
+- import time of the app's modules in a fresh interpreter (python -X importtime),
+- the first script run (cold start: module imports, cache_resource misses, page markup),
+- subsequent reruns, as triggered by any widget interaction.
+
+Usage:
+    python benchmarks/bench_rerun.py                       # profiles v1.py
+    python benchmarks/bench_rerun.py --script old_v1.py    # e.g. a copy from an older commit
+
+Measured (streamlit 1.32.0, agno 1.4.2, HEARST_NEWS_REFRESHER=off, --reruns 20, three runs each),
+before and after deferring the agno/Groq imports out of the script's import path:
+
+                      before          after
+    cold start        586-629 ms      96-113 ms
+    rerun p50         32-36 ms        36-38 ms
+    rerun max         65-75 ms        56-62 ms
+
+The cold-start gain is import time: pipeline went from 466 ms cumulative (agno.agent 287 ms,
+agno.models.groq 150 ms) to no agno import at all. Reruns do not re-import modules and are
+unchanged within noise.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(modules, top=10):
+    """
+    Import modules in a fresh interpreter with -X importtime and return the slowest entries.
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def time_app(script, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(script, default_timeout=60)
+    at.secrets["GROQ_API_KEY"] = os.environ.get("GROQ_API_KEY", "bench-placeholder")
+
+    started = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"App raised during the first run: {at.exception}")
+
+    rerun_times = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun_times.append(time.perf_counter() - started)
+    return cold, rerun_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--script", default=os.path.join(ROOT, "v1.py"), help="App script to profile")
+    parser.add_argument("--reruns", type=int, default=20, help="Number of reruns to time (default: 20)")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    print("Slowest imports in a fresh interpreter (cumulative ms):")
+    for cumulative_us, name in import_profile(["streamlit", "pipeline", "word_export"]):
+        print(f"  {cumulative_us / 1000:8.1f}  {name}")
+
+    cold, reruns = time_app(args.script, args.reruns)
+    print(f"\nScript: {os.path.relpath(args.script, ROOT)}")
+    print(f"Cold start (first run): {cold * 1000:8.1f} ms")
+    print(f"Rerun p50:              {statistics.median(reruns) * 1000:8.1f} ms")
+    print(f"Rerun max:              {max(reruns) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
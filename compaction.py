@@ -0,0 +1,103 @@
+"""
+Research compaction: derive a compact brief for the post agents from the full research.
+
+The research agent writes a 1000-2000 word summary plus stats and links. The post agents only
+need the strongest claims, the top statistics and the source links, so this stage extracts
+those (no model call) while the full research is kept for display and Word export.
+"""
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_MAX_CLAIMS = 8
+DEFAULT_MAX_CLAIM_CHARS = 300
+DEFAULT_MAX_STATS = 6
+DEFAULT_MAX_LINKS = 10
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"“(])')
+_WORD = re.compile(r"[a-z][a-z0-9\-]{3,}")
+_FIGURE = re.compile(r"\d[\d,.]*\s*(?:%|percent|EH/s|TH/s|MW|GW|TWh|billion|million|x\b)?", re.IGNORECASE)
+_STOPWORDS = frozenset(
+    "about after also been being between bitcoin crypto could during every from have into more most "
+    "other over such than that their there these they this those through under what when where which "
+    "while with within would your mining".split()
+)
+
+
+def _keywords(research_data):
+    # Words the research itself emphasises (stats and the simple explanation) mark the key claims
+    text = " ".join(research_data.get("stats", []) or []) + " " + (research_data.get("simple_explanation") or "")
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def _score_sentence(sentence, index, keywords):
+    score = 2.0 * min(len(_FIGURE.findall(sentence)), 3)
+    score += sum(1 for w in set(_WORD.findall(sentence.lower())) if w in keywords)
+    # The opening sentences usually state the topic and the headline findings
+    return score + 3.0 / (1 + index)
+
+
+def key_claims(summary, keywords=frozenset(), max_claims=DEFAULT_MAX_CLAIMS, max_chars=DEFAULT_MAX_CLAIM_CHARS):
+    """
+    Pick the highest-scoring sentences of the summary, returned in their original order.
+    """
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(summary or "") if len(s.strip()) >= 25]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: _score_sentence(sentences[i], i, keywords),
+        reverse=True,
+    )[:max_claims]
+    claims = []
+    for i in sorted(ranked):
+        sentence = sentences[i]
+        claims.append(sentence if len(sentence) <= max_chars else sentence[:max_chars].rsplit(" ", 1)[0] + "...")
+    return claims
+
+
+def top_stats(stats, max_stats=DEFAULT_MAX_STATS):
+    """
+    De-duplicate statistics and prefer the ones that actually carry a figure.
+    """
+    seen, with_figures, without = set(), [], []
+    for stat in stats or []:
+        stat = str(stat).strip()
+        key = " ".join(stat.lower().split())
+        if not stat or key in seen:
+            continue
+        seen.add(key)
+        (with_figures if _FIGURE.search(stat) else without).append(stat)
+    return (with_figures + without)[:max_stats]
+
+
+def clean_link(url):
+    """
+    Strip tracking parameters and fragments so the same article is only listed once.
+    """
+    parts = urlsplit(str(url).strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def link_index(links, max_links=DEFAULT_MAX_LINKS):
+    index, seen = [], set()
+    for url in links or []:
+        if not str(url).startswith("http"):
+            continue
+        cleaned = clean_link(url)
+        if cleaned in seen:
+            continue
+        seen.add(cleaned)
+        index.append(cleaned)
+    return index[:max_links]
+
+
+def compact_research(research_data, max_claims=DEFAULT_MAX_CLAIMS, max_stats=DEFAULT_MAX_STATS,
+                     max_links=DEFAULT_MAX_LINKS):
+    """
+    Build the compact post-agent input. It keeps the same {"summary", "stats", "links"}
+    shape as the full input, so every post generation mode works with either one.
+    """
+    return {
+        "summary": " ".join(key_claims(research_data.get("summary", ""), _keywords(research_data), max_claims)),
+        "stats": top_stats(research_data.get("stats", []), max_stats),
+        "links": link_index(research_data.get("links", []), max_links),
+    }
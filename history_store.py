@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------ Configuration ------------------
+DEFAULT_HISTORY_PATH = os.environ.get("HEARST_HISTORY_DB", os.path.join(".cache", "history.sqlite3"))
+DEFAULT_PAGE_SIZE = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    research TEXT,
+    posts TEXT,
+    ideas TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_kind_created_at ON runs (kind, created_at DESC);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(topic, body, tokenize='porter unicode61');
+"""
+
+RUN_KINDS = ("posts", "ideas")
+
+
+def _texts(value):
+    # Every string inside a JSON value, for the full-text index
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _texts(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _texts(item)
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix, so partial
+    words work while typing and FTS operators in user input are treated as plain text.
+    """
+    terms = [t for t in "".join(c if c.isalnum() else " " for c in (text or "")).split() if t]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+# ------------------ Store ------------------
+class HistoryStore:
+    """
+    SQLite history of generated research, posts and ideas with an FTS5 index over their text.
+
+    Listing and search return lightweight rows (no stored JSON); load a run's full content
+    with get() only when it is opened.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _add(self, kind, topic, research=None, posts=None, ideas=None):
+        body = "\n".join(_texts([research, posts, ideas]))
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO runs (kind, topic, created_at, research, posts, ideas) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    kind, topic, time.time(),
+                    json.dumps(research, ensure_ascii=False) if research is not None else None,
+                    json.dumps(posts, ensure_ascii=False) if posts is not None else None,
+                    json.dumps(ideas, ensure_ascii=False) if ideas is not None else None,
+                ),
+            )
+            run_id = cursor.lastrowid
+            conn.execute("INSERT INTO runs_fts (rowid, topic, body) VALUES (?, ?, ?)", (run_id, topic, body))
+        return run_id
+
+    def add_posts_run(self, topic, research_data, posts):
+        """
+        Record a Post Generator run; returns its id.
+        """
+        return self._add("posts", topic, research=research_data, posts=posts)
+
+    def add_ideas_run(self, news_data, ideas):
+        """
+        Record an Idea Lab run (the news digest it used and the ideas); returns its id.
+        """
+        topic = "; ".join(str(idea.get("topic", "")) for idea in ideas if isinstance(idea, dict))[:300] or "Idea Lab"
+        return self._add("ideas", topic, research=news_data, ideas=ideas)
+
+    def search(self, query="", kind=None, limit=DEFAULT_PAGE_SIZE, offset=0):
+        """
+        Return up to limit rows of {id, kind, topic, created_at, snippet}, best matches first
+        for a query and newest first otherwise.
+        """
+        match = fts_query(query)
+        params, where = [], []
+        if kind:
+            where.append("r.kind = ?")
+            params.append(kind)
+        if match:
+            sql = (
+                "SELECT r.id, r.kind, r.topic, r.created_at, snippet(runs_fts, 1, '**', '**', ' … ', 16) "
+                "FROM runs_fts JOIN runs r ON r.id = runs_fts.rowid WHERE runs_fts MATCH ?"
+                + "".join(f" AND {w}" for w in where)
+                + " ORDER BY runs_fts.rank LIMIT ? OFFSET ?"
+            )
+            params = [match] + params
+        else:
+            sql = (
+                "SELECT r.id, r.kind, r.topic, r.created_at, '' FROM runs r"
+                + (" WHERE " + " AND ".join(where) if where else "")
+                + " ORDER BY r.created_at DESC LIMIT ? OFFSET ?"
+            )
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [limit, offset]).fetchall()
+        return [
+            {"id": run_id, "kind": kind_, "topic": topic, "created_at": created_at, "snippet": snippet}
+            for run_id, kind_, topic, created_at, snippet in rows
+        ]
+
+    def get(self, run_id):
+        """
+        Return the full run {id, kind, topic, created_at, research, posts, ideas}, or None.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, topic, created_at, research, posts, ideas FROM runs WHERE id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        run_id, kind, topic, created_at, research, posts, ideas = row
+        return {
+            "id": run_id,
+            "kind": kind,
+            "topic": topic,
+            "created_at": created_at,
+            "research": json.loads(research) if research else None,
+            "posts": json.loads(posts) if posts else None,
+            "ideas": json.loads(ideas) if ideas else None,
+        }
+
+    def delete(self, run_id):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+            conn.execute("DELETE FROM runs_fts WHERE rowid = ?", (run_id,))
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT kind, COUNT(*) FROM runs GROUP BY kind").fetchall()
+        counts = dict(rows)
+        return {kind: counts.get(kind, 0) for kind in RUN_KINDS}
@@ -0,0 +1,402 @@
+"""
+Background generation jobs.
+
+Generations are submitted to a SQLite job table and run by a pool of worker threads, so a
+Streamlit session only submits a job and polls it. Jobs survive page reloads (the app keeps
+the job id in the URL) and keep running when the browser is closed.
+
+The app starts its own workers unless HEARST_JOB_WORKERS=off. To run them in one or more
+separate processes instead (they share the job table at HEARST_JOBS_DB):
+    python jobs.py --concurrency 4
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from history_store import HistoryStore
+from link_check import LinkVerifier
+from metrics import METRICS
+from news_digest import NewsDigestStore
+from pipeline import PipelineError, generate_ideas, run_topic
+from ratelimit import RateLimitedRunner, TokenBucket
+from research_cache import ResearchCache
+from token_usage import TokenLedger
+
+# ------------------ Configuration ------------------
+DEFAULT_JOBS_PATH = os.environ.get("HEARST_JOBS_DB", os.path.join(".cache", "jobs.sqlite3"))
+DEFAULT_CONCURRENCY = int(os.environ.get("HEARST_JOB_CONCURRENCY", 2))
+DEFAULT_POLL_SECONDS = 1.0
+# A running job whose worker has not reported for this long is assumed lost and run again
+DEFAULT_STALE_SECONDS = int(os.environ.get("HEARST_JOB_STALE_SECONDS", 15 * 60))
+# Workers refresh a running job this often, so long stages are not mistaken for a lost worker
+DEFAULT_HEARTBEAT_SECONDS = float(os.environ.get("HEARST_JOB_HEARTBEAT_SECONDS", 30))
+DEFAULT_RETENTION_SECONDS = int(os.environ.get("HEARST_JOB_RETENTION_SECONDS", 7 * 24 * 60 * 60))
+MAX_ATTEMPTS = 2
+
+JOB_KINDS = ("posts", "ideas")
+FINISHED = ("done", "error")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created_at ON jobs (status, created_at);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------ Store ------------------
+class JobStore:
+    """
+    SQLite job table shared by the app and any worker processes. Jobs move from queued to
+    running to done or error; claiming a job is atomic across processes. Updates to a running
+    job only apply while it is still claimed by the worker making them, so a worker whose job
+    was re-queued as stale cannot overwrite the new attempt's result.
+    """
+
+    def __init__(self, path=DEFAULT_JOBS_PATH, stale_seconds=DEFAULT_STALE_SECONDS,
+                 retention_seconds=DEFAULT_RETENTION_SECONDS):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.retention_seconds = retention_seconds
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind, params):
+        """
+        Queue a job and return its id.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), now, now),
+            )
+            if self.retention_seconds:
+                conn.execute(
+                    "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished_at < ?",
+                    (now - self.retention_seconds,),
+                )
+        METRICS.incr("jobs", kind=kind, result="submitted")
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return the job as a dict (params and result decoded), or None. Queued jobs also
+        carry their queue_position (1 = next to run).
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            if job["status"] == "queued":
+                job["queue_position"] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (job["created_at"],)
+                ).fetchone()[0]
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim(self, worker):
+        """
+        Mark the oldest queued job as running on worker and return it, or None if the queue
+        is empty. Jobs left running by a lost worker are queued again first.
+        """
+        now = time.time()
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            # Take the write lock up front so two workers can never claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            if self.stale_seconds:
+                cutoff = now - self.stale_seconds
+                conn.execute(
+                    "UPDATE jobs SET status = 'error', error = 'The worker running this job stopped.', "
+                    "finished_at = ?, updated_at = ? WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                    (now, now, cutoff, MAX_ATTEMPTS),
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND updated_at < ?",
+                    (cutoff,),
+                )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, stage = 'starting', "
+                    "started_at = ?, updated_at = ? WHERE id = ?",
+                    (worker, now, now, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row, status="running", worker=worker, attempts=row["attempts"] + 1, started_at=now)
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def _update_running(self, job_id, worker, assignments, values):
+        # True if the job was still running on worker and has been updated
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND status = 'running'",
+                (*values, job_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def progress(self, job_id, worker, stage, fraction):
+        return self._update_running(job_id, worker, "stage = ?, progress = ?, updated_at = ?",
+                                    (stage, fraction, time.time()))
+
+    def heartbeat(self, job_id, worker):
+        """
+        Refresh a running job's updated_at so it is not taken for stale between progress points.
+        """
+        return self._update_running(job_id, worker, "updated_at = ?", (time.time(),))
+
+    def complete(self, job_id, worker, result):
+        now = time.time()
+        return self._update_running(
+            job_id, worker,
+            "status = 'done', stage = 'done', progress = 1, result = ?, finished_at = ?, updated_at = ?",
+            (json.dumps(result, ensure_ascii=False), now, now),
+        )
+
+    def fail(self, job_id, worker, error):
+        now = time.time()
+        return self._update_running(job_id, worker, "status = 'error', error = ?, finished_at = ?, updated_at = ?",
+                                    (error, now, now))
+
+    def counts(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict(rows)
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "error")}
+
+
+# ------------------ Job Handlers ------------------
+def pipeline_handlers(research_cache=None, news_store=None, runner=None):
+    """
+    The work behind each job kind, as {kind: handler(params, progress) -> result}. Handlers
+    have no side effects beyond the caches; see history_recorder for saving results.
+    """
+    research_cache = research_cache or ResearchCache()
+    news_store = news_store or NewsDigestStore(verifier=LinkVerifier())
+
+    def run_posts(params, progress):
+        research_data = None
+        if params.get("similar_key"):
+            research_data = research_cache.get_by_key(params["similar_key"])
+            if research_data is not None:
+                METRICS.incr("research_reuse", result="similar")
+        result = run_topic(
+            params["topic"],
+            cache=research_cache,
+            force_refresh=params.get("force_refresh", False),
+            parallel_posts=params.get("parallel_posts", False),
+            runner=runner,
+            compact=params.get("compact", False),
+            verify_links=params.get("verify_links", False),
+            research_data=research_data,
+            progress=progress,
+        )
+        result["reused_topic"] = params.get("similar_topic") if research_data is not None else None
+        return result
+
+    def run_ideas(params, progress):
+        progress("news", 0.05)
+        news_data = news_store.refresh(runner=runner) if params.get("refresh_news") else news_store.get(runner=runner)
+        progress("ideas", 0.5)
+        ledger = TokenLedger()
+        ideas = generate_ideas(news_data, runner=runner, ledger=ledger)
+        return {"news": news_data, "ideas": ideas, "token_usage": ledger.rows()}
+
+    return {"posts": run_posts, "ideas": run_ideas}
+
+
+def history_recorder(history=None):
+    """
+    on_complete(job, result) hook that saves finished jobs to the history store, so they are
+    kept even if nobody is watching the job. Workers call it only once their result has been
+    accepted, so a superseded attempt never adds a second history row.
+    """
+    history = history or HistoryStore()
+
+    def record(job, result):
+        if job["kind"] == "posts" and result["posts"]:
+            history.add_posts_run(job["params"]["topic"], result["research"], result["posts"])
+        elif job["kind"] == "ideas":
+            history.add_ideas_run(result["news"], result["ideas"])
+
+    return record
+
+
+# ------------------ Workers ------------------
+class JobWorker(threading.Thread):
+    """
+    Daemon thread that claims queued jobs one at a time and runs them with handlers. While a
+    job runs, a heartbeat thread keeps it fresh every heartbeat_seconds. on_complete(job, result)
+    runs after a job's result has been stored as done.
+    """
+
+    def __init__(self, store, handlers, poll_seconds=DEFAULT_POLL_SECONDS, name=None,
+                 heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS, on_complete=None):
+        name = name or f"job-worker-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        super().__init__(name=name, daemon=True)
+        self.store = store
+        self.handlers = handlers
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.on_complete = on_complete
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run_job(self, job):
+        job_id, kind = job["id"], job["kind"]
+        METRICS.observe("job_queue_wait", job["started_at"] - job["created_at"], kind=kind)
+
+        def progress(stage, fraction):
+            self.store.progress(job_id, self.name, stage, fraction)
+
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, finished), name=f"{self.name}-heartbeat",
+                                     daemon=True)
+        heartbeat.start()
+        try:
+            with METRICS.span(f"job_{kind}"):
+                result = self.handlers[kind](job["params"], progress)
+        except PipelineError as exc:
+            self._fail(job, str(exc))
+            return
+        except Exception as exc:
+            self._fail(job, f"{type(exc).__name__}: {exc}")
+            return
+        finally:
+            finished.set()
+        if not self.store.complete(job_id, self.name, result):
+            self._superseded(job)
+            return
+        METRICS.incr("jobs", kind=kind, result="done")
+        if self.on_complete is not None:
+            try:
+                self.on_complete(job, result)
+            except Exception as exc:
+                logger.warning("Could not save job %s (%s): %s", job_id, kind, exc)
+
+    def _heartbeat(self, job_id, finished):
+        while not finished.wait(self.heartbeat_seconds):
+            try:
+                if not self.store.heartbeat(job_id, self.name):
+                    return
+            except sqlite3.Error as exc:
+                logger.warning("Could not refresh job %s: %s", job_id, exc)
+
+    def _fail(self, job, message):
+        job_id, kind = job["id"], job["kind"]
+        if not self.store.fail(job_id, self.name, message):
+            self._superseded(job)
+            return
+        logger.warning("Job %s (%s) failed: %s", job_id, kind, message)
+        METRICS.incr("jobs", kind=kind, result="error")
+
+    def _superseded(self, job):
+        # The job was re-queued as stale and claimed again (or given up on); that attempt owns it now
+        logger.warning("Job %s (%s) is no longer assigned to %s; dropping its result", job["id"], job["kind"], self.name)
+        METRICS.incr("jobs", kind=job["kind"], result="superseded")
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                job = self.store.claim(self.name)
+            except sqlite3.Error as exc:
+                logger.warning("Could not claim a job: %s", exc)
+                job = None
+            if job is None:
+                self._stop_event.wait(self.poll_seconds)
+                continue
+            self.run_job(job)
+
+
+def start_workers(store, handlers, concurrency=DEFAULT_CONCURRENCY, poll_seconds=DEFAULT_POLL_SECONDS,
+                  on_complete=None):
+    """
+    Start concurrency worker threads on store and return them.
+    """
+    workers = [JobWorker(store, handlers, poll_seconds, on_complete=on_complete) for _ in range(max(1, concurrency))]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued Hearst generation jobs.")
+    parser.add_argument("--path", default=DEFAULT_JOBS_PATH, help="Job database (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Jobs run at the same time (default: %(default)s)")
+    parser.add_argument("--rpm", type=int, default=30, help="Max Groq requests per minute across workers, 0 to disable pacing (default: 30)")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("GROQ_API_KEY"):
+        parser.error("GROQ_API_KEY must be set in the environment")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    runner = RateLimitedRunner(TokenBucket.per_minute(args.rpm) if args.rpm else None)
+    store = JobStore(args.path)
+    workers = start_workers(store, pipeline_handlers(runner=runner), args.concurrency, on_complete=history_recorder())
+    logger.info("Running %d job workers on %s", len(workers), args.path)
+    try:
+        while any(worker.is_alive() for worker in workers):
+            workers[0].join(timeout=1)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Source link verification.
+
+Links returned by the research and news agents are first filtered with the article URL
+heuristics, which only reject obvious index pages, then checked concurrently over one
+pooled async HTTP client with per-host limits. Verdicts are cached with a TTL, so links
+seen recently are not re-checked.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+from parsing import is_valid_article_link
+
+# ------------------ Configuration ------------------
+DEFAULT_TIMEOUT_SECONDS = 5.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_PER_HOST = 2
+DEFAULT_OK_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_BAD_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_UNKNOWN_TTL_SECONDS = 10 * 60
+DEFAULT_MAX_ENTRIES = 5000
+USER_AGENT = "Mozilla/5.0 (compatible; HearstLinkCheck/1.0)"
+
+# Servers that refuse HEAD but may well serve the page to a GET
+HEAD_UNSUPPORTED = {403, 405, 501}
+
+
+def verdict(url, status, reason, http_status=None):
+    """
+    status is "ok", "bad" (drop the link) or "unknown" (could not be checked; keep it).
+    """
+    return {"url": url, "status": status, "reason": reason, "http_status": http_status}
+
+
+def is_homepage(url):
+    return urlsplit(url).path.strip("/") == ""
+
+
+# ------------------ Verdict Cache ------------------
+class VerdictCache:
+    """
+    Thread-safe in-process TTL cache of link verdicts. Unknown verdicts (timeouts, rate
+    limits) expire quickly so the link is retried soon.
+    """
+
+    def __init__(self, ok_ttl_seconds=DEFAULT_OK_TTL_SECONDS, bad_ttl_seconds=DEFAULT_BAD_TTL_SECONDS,
+                 unknown_ttl_seconds=DEFAULT_UNKNOWN_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttls = {"ok": ok_ttl_seconds, "bad": bad_ttl_seconds, "unknown": unknown_ttl_seconds}
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            checked_at, result = entry
+            if time.time() - checked_at > self.ttls[result["status"]]:
+                del self._entries[url]
+                return None
+            self._entries.move_to_end(url)
+            return result
+
+    def set(self, url, result):
+        with self._lock:
+            self._entries[url] = (time.time(), result)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+SHARED_VERDICT_CACHE = VerdictCache()
+
+
+# ------------------ Verifier ------------------
+class LinkVerifier:
+    """
+    Checks links with a pooled httpx.AsyncClient: HEAD first, falling back to a streamed GET
+    (the body is never read) for servers that refuse HEAD. A link is bad if the article
+    heuristics flag it as a homepage or listing page, returns a 4xx/5xx status, or redirects
+    to a homepage.
+
+    client_kwargs are passed to httpx.AsyncClient, e.g. transport= for tests.
+    """
+
+    def __init__(self, cache=None, timeout_seconds=DEFAULT_TIMEOUT_SECONDS,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, per_host=DEFAULT_PER_HOST,
+                 heuristic=is_valid_article_link, **client_kwargs):
+        self.cache = cache if cache is not None else SHARED_VERDICT_CACHE
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.heuristic = heuristic
+        self.client_kwargs = client_kwargs
+
+    def _client(self):
+        import httpx
+
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout_seconds),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            **self.client_kwargs,
+        )
+
+    async def _request(self, client, url):
+        import httpx
+
+        try:
+            response = await client.head(url)
+            if response.status_code in HEAD_UNSUPPORTED:
+                async with client.stream("GET", url) as response:
+                    pass
+        except httpx.TimeoutException:
+            return verdict(url, "unknown", "timed out")
+        except httpx.HTTPError as exc:
+            return verdict(url, "unknown", f"request failed: {type(exc).__name__}")
+
+        final_url = str(response.url)
+        if response.status_code == 429:
+            return verdict(url, "unknown", "rate limited", 429)
+        if response.status_code in (401, 403):
+            # Bot protection on news sites; the page may be fine for a reader
+            return verdict(url, "unknown", "automated check refused", response.status_code)
+        if response.status_code >= 400:
+            return verdict(url, "bad", f"HTTP {response.status_code}", response.status_code)
+        if final_url != url and is_homepage(final_url):
+            return verdict(url, "bad", f"redirects to homepage {final_url}", response.status_code)
+        return verdict(url, "ok", "reachable", response.status_code)
+
+    async def averify(self, urls):
+        """
+        Return one verdict per unique URL, in first-seen order.
+        """
+        urls = list(dict.fromkeys(u for u in urls if isinstance(u, str)))
+        results, to_check = {}, []
+        for url in urls:
+            if not url.startswith(("http://", "https://")) or not self.heuristic(url):
+                results[url] = verdict(url, "bad", "not a direct article URL")
+                METRICS.incr("link_checks", result="heuristic")
+                continue
+            cached = self.cache.get(url)
+            if cached is not None:
+                results[url] = cached
+                METRICS.incr("link_checks", result="cached")
+                continue
+            to_check.append(url)
+
+        if to_check:
+            host_limits = {}
+
+            async def check(client, url):
+                host = urlsplit(url).netloc.lower()
+                semaphore = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+                async with semaphore:
+                    result = await self._request(client, url)
+                self.cache.set(url, result)
+                METRICS.incr("link_checks", result=result["status"])
+                return result
+
+            async with self._client() as client:
+                for result in await asyncio.gather(*(check(client, url) for url in to_check)):
+                    results[result["url"]] = result
+        return [results[url] for url in urls]
+
+    def verify(self, urls):
+        """
+        Synchronous wrapper around averify(); call it from a thread without a running event loop.
+        """
+        with METRICS.span("link_verification"):
+            return asyncio.run(self.averify(urls))
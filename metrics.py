@@ -0,0 +1,384 @@
+"""
+Per-phase latency, token and memory instrumentation.
+
+Every span, counter and gauge update is appended as one JSON line to a rotating log. Each process
+(the app, the batch CLI, the news worker) writes its own file with its pid in the name, so rotation
+never races another writer; load_log reads them all back. Counter increments are summed in memory
+and flushed every few seconds as one line per counter, so hot paths do not write on every call.
+The in-process registry keeps a rolling window per phase for p50/p95 and renders a Prometheus-style
+text snapshot.
+
+Aggregate the log across processes with:
+    python metrics.py summary
+    python metrics.py prometheus > /var/lib/node_exporter/textfile/hearst.prom
+"""
+import argparse
+import atexit
+import functools
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+# ------------------ Configuration ------------------
+DEFAULT_LOG_PATH = os.environ.get("HEARST_METRICS_LOG", os.path.join(".cache", "metrics.jsonl"))
+DEFAULT_LOG_MAX_BYTES = int(os.environ.get("HEARST_METRICS_LOG_MAX_BYTES", 5 * 1024 * 1024))
+DEFAULT_LOG_BACKUPS = int(os.environ.get("HEARST_METRICS_LOG_BACKUPS", 3))
+DEFAULT_FLUSH_SECONDS = float(os.environ.get("HEARST_METRICS_FLUSH_SECONDS", 5))
+# Per-process files of processes that have exited are removed after this many days
+DEFAULT_RETENTION_DAYS = float(os.environ.get("HEARST_METRICS_LOG_RETENTION_DAYS", 7))
+DEFAULT_WINDOW = 1000
+METRIC_PREFIX = "hearst"
+
+
+def percentile(values, q):
+    """
+    Nearest-rank percentile of values (q in 0..100); None for an empty list.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered) / 100.0) - 1))
+    return ordered[index]
+
+
+def process_log_path(path, pid=None):
+    """
+    The file a process writes for log path: ".cache/metrics.jsonl" becomes ".cache/metrics.<pid>.jsonl".
+    """
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid() if pid is None else pid}{ext}"
+
+
+def log_files(path):
+    """
+    Every file written for log path: each process's file and its rotated backups, plus a
+    file at path itself from before logs were split per process.
+    """
+    root, ext = os.path.splitext(path)
+    pattern = f"{glob.escape(root)}.[0-9]*{glob.escape(ext)}"
+    files = glob.glob(pattern) + glob.glob(f"{pattern}.[0-9]*")
+    files += [p for p in [f"{path}.{i}" for i in range(DEFAULT_LOG_BACKUPS, 0, -1)] + [path] if os.path.exists(p)]
+    return sorted(set(files))
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass
+    return True
+
+
+def prune_logs(path, retention_days=DEFAULT_RETENTION_DAYS):
+    """
+    Remove per-process files untouched for retention_days whose process is no longer running.
+    """
+    prefix = os.path.basename(os.path.splitext(path)[0]) + "."
+    cutoff = time.time() - retention_days * 86400
+    for log_path in log_files(path):
+        pid = os.path.basename(log_path)[len(prefix):].split(".")[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            if os.path.getmtime(log_path) < cutoff and not _pid_running(int(pid)):
+                os.remove(log_path)
+        except OSError:
+            pass
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of phase latencies, labelled counters and gauges.
+    """
+
+    def __init__(self, log_path=DEFAULT_LOG_PATH, window=DEFAULT_WINDOW,
+                 max_bytes=DEFAULT_LOG_MAX_BYTES, backup_count=DEFAULT_LOG_BACKUPS,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS):
+        self.window = window
+        self.log_path = log_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self._latency_sum = defaultdict(float)
+        self._latency_count = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._pending = defaultdict(float)
+        self._flusher = None
+        self._logger = None
+        self._logger_pid = None
+        self._logger_lock = threading.Lock()
+        if log_path:
+            prune_logs(log_path)
+            atexit.register(self.flush)
+
+    def _process_logger(self):
+        # Opened lazily and reopened after a fork, so each process only ever appends to its own file
+        with self._logger_lock:
+            if self._logger_pid == os.getpid():
+                return self._logger
+            self._logger_pid = os.getpid()
+            self._logger = logging.getLogger(f"hearst.metrics.{id(self)}.{self._logger_pid}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            try:
+                path = process_log_path(self.log_path)
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                handler = RotatingFileHandler(path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                                              encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._logger.addHandler(handler)
+            except OSError:
+                self._logger = None
+            return self._logger
+
+    def _log(self, event):
+        if not self.log_path:
+            return
+        logger = self._process_logger()
+        if logger is not None:
+            event.setdefault("ts", round(time.time(), 3))
+            logger.info(json.dumps(event, ensure_ascii=False))
+
+    def _start_flusher(self):
+        # Called with self._lock held
+        if self._flusher is None or self._flusher[0] != os.getpid():
+            thread = threading.Thread(target=self._flush_loop, name="hearst-metrics-flush", daemon=True)
+            self._flusher = (os.getpid(), thread)
+            thread.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def flush(self):
+        """
+        Write the counter increments summed since the last flush, one line per counter.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+        ts = round(time.time(), 3)
+        for (name, label_key), value in pending.items():
+            self._log({"type": "counter", "name": name, "value": value, **dict(label_key), "ts": ts})
+
+    # ------------------ Recording ------------------
+    def observe(self, phase, seconds, status="ok", **labels):
+        with self._lock:
+            self._latencies[phase].append(seconds)
+            self._latency_sum[phase] += seconds
+            self._latency_count[phase] += 1
+            if status != "ok":
+                self._errors[phase] += 1
+        self._log({"type": "span", "phase": phase, "seconds": round(seconds, 4), "status": status, **labels})
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] += value
+            if not self.log_path:
+                return
+            if self.flush_seconds > 0:
+                self._pending[key] += value
+                self._start_flusher()
+                return
+        self._log({"type": "counter", "name": name, "value": value, **labels})
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+        self._log({"type": "gauge", "name": name, "value": value, **labels})
+
+    @contextmanager
+    def span(self, phase, **labels):
+        """
+        Time a block as one occurrence of phase; exceptions are recorded as errors and re-raised.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            # st.stop() and st.rerun() unwind with control-flow exceptions; only count real failures
+            status = "stopped" if type(exc).__name__ in ("StopException", "RerunException") else "error"
+            self.observe(phase, time.perf_counter() - started, status=status, **labels)
+            raise
+        self.observe(phase, time.perf_counter() - started, **labels)
+
+    def timed(self, phase):
+        """
+        Decorator form of span().
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(phase):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------ Reading ------------------
+    def phase_summary(self):
+        """
+        Rows of {phase, count, errors, p50_ms, p95_ms, mean_ms} over the rolling window.
+        """
+        with self._lock:
+            phases = {phase: list(values) for phase, values in self._latencies.items()}
+            counts = dict(self._latency_count)
+            sums = dict(self._latency_sum)
+            errors = dict(self._errors)
+        return _summary_rows(phases, counts, sums, errors)
+
+    def counters(self):
+        with self._lock:
+            return [
+                {"name": name, **dict(label_key), "value": value}
+                for (name, label_key), value in sorted(self._counters.items())
+            ]
+
+    def gauges(self):
+        with self._lock:
+            return [
+                {"name": name, **dict(label_key), "value": value}
+                for (name, label_key), value in sorted(self._gauges.items())
+            ]
+
+    def prometheus_text(self):
+        with self._lock:
+            phases = {phase: list(values) for phase, values in self._latencies.items()}
+            counts = dict(self._latency_count)
+            sums = dict(self._latency_sum)
+            errors = dict(self._errors)
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        return _prometheus_text(phases, counts, sums, errors, counters, gauges)
+
+
+def _summary_rows(phases, counts, sums, errors):
+    rows = []
+    for phase in sorted(phases):
+        values = phases[phase]
+        rows.append({
+            "phase": phase,
+            "count": counts.get(phase, len(values)),
+            "errors": errors.get(phase, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 1) if values else None,
+            "p95_ms": round(percentile(values, 95) * 1000, 1) if values else None,
+            "mean_ms": round(sums.get(phase, 0) / counts[phase] * 1000, 1) if counts.get(phase) else None,
+        })
+    return rows
+
+
+def _prometheus_text(phases, counts, sums, errors, counters, gauges=None):
+    lines = [
+        f"# HELP {METRIC_PREFIX}_phase_latency_seconds Latency of pipeline phases.",
+        f"# TYPE {METRIC_PREFIX}_phase_latency_seconds summary",
+    ]
+    for phase in sorted(phases):
+        label = (("phase", phase),)
+        for q in (0.5, 0.95):
+            value = percentile(phases[phase], q * 100)
+            if value is not None:
+                lines.append(f"{METRIC_PREFIX}_phase_latency_seconds{_format_labels(label, [('quantile', q)])} {value:.6f}")
+        lines.append(f"{METRIC_PREFIX}_phase_latency_seconds_sum{_format_labels(label)} {sums.get(phase, 0):.6f}")
+        lines.append(f"{METRIC_PREFIX}_phase_latency_seconds_count{_format_labels(label)} {counts.get(phase, 0)}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_phase_errors_total counter")
+    for phase in sorted(phases):
+        lines.append(f"{METRIC_PREFIX}_phase_errors_total{_format_labels((('phase', phase),))} {errors.get(phase, 0)}")
+    names = sorted({name for name, _ in counters})
+    for name in names:
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+        for (counter_name, label_key), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"{METRIC_PREFIX}_{name}_total{_format_labels(label_key)} {value:g}")
+    gauges = gauges or {}
+    for name in sorted({name for name, _ in gauges}):
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        for (gauge_name, label_key), value in sorted(gauges.items()):
+            if gauge_name == name:
+                lines.append(f"{METRIC_PREFIX}_{name}{_format_labels(label_key)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def load_log(path=DEFAULT_LOG_PATH):
+    """
+    Rebuild phase windows, counters and the latest gauge values from every process's JSONL
+    log (and their rotated backups).
+    """
+    phases, counts, sums, errors, counters = defaultdict(list), defaultdict(int), defaultdict(float), defaultdict(int), defaultdict(float)
+    gauges, gauge_ts = {}, {}
+    for log_path in log_files(path):
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("type") == "span":
+                    phase = event["phase"]
+                    phases[phase].append(event["seconds"])
+                    counts[phase] += 1
+                    sums[phase] += event["seconds"]
+                    if event.get("status") not in (None, "ok"):
+                        errors[phase] += 1
+                elif event.get("type") == "counter":
+                    labels = {k: v for k, v in event.items() if k not in ("type", "name", "value", "ts")}
+                    counters[(event["name"], _label_key(labels))] += event.get("value", 1)
+                elif event.get("type") == "gauge":
+                    labels = {k: v for k, v in event.items() if k not in ("type", "name", "value", "ts")}
+                    key = (event["name"], _label_key(labels))
+                    # Files are read in no particular order across processes, so keep the newest value
+                    if event.get("ts", 0) >= gauge_ts.get(key, 0):
+                        gauges[key], gauge_ts[key] = event["value"], event.get("ts", 0)
+    return phases, counts, sums, errors, counters, gauges
+
+
+# Process-wide registry used by the pipeline, the app and the CLIs
+METRICS = MetricsRegistry()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the Hearst metrics log.")
+    parser.add_argument("format", choices=["summary", "prometheus"], help="Output format")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH, help="Metrics log path (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    phases, counts, sums, errors, counters, gauges = load_log(args.log)
+    if args.format == "prometheus":
+        sys.stdout.write(_prometheus_text(phases, counts, sums, errors, counters, gauges))
+        return 0
+    print(f"{'phase':<24}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for row in _summary_rows(phases, counts, sums, errors):
+        print(f"{row['phase']:<24}{row['count']:>8}{row['errors']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['mean_ms']:>10}")
+    for (name, label_key), value in sorted(counters.items()):
+        print(f"{name}{_format_labels(label_key)} {value:g}")
+    for (name, label_key), value in sorted(gauges.items()):
+        print(f"{name}{_format_labels(label_key)} {value:g} (latest)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Latency-aware model routing per pipeline stage. Off by default: every stage runs on the
+large model until small models are configured.
+
+Stages whose output is short and well-specified (posts, ideas) can be sent to a faster small
+model first; their output then has to pass the stage's quality checks (valid JSON, required
+keys, reference links taken from the input) or the stage is re-run on the large model. The
+router keeps a rolling window of latency and check results per (stage, model) and stops
+routing a stage to its small model while that model's success rate is too low, or while
+its expected latency including fallbacks is no better than the large model's. A demoted
+stage still probes the small model every few calls, so the decision can recover.
+
+Opt in with HEARST_STAGE_MODELS, e.g. "posts=llama-3.1-8b-instant,ideas=llama-3.1-8b-instant".
+"""
+import os
+import threading
+from collections import defaultdict, deque
+
+from metrics import METRICS, percentile
+
+# ------------------ Configuration ------------------
+SMALL_MODEL_ID = os.environ.get("HEARST_SMALL_MODEL", "llama-3.1-8b-instant")
+
+
+def parse_stage_models(spec):
+    """
+    {stage: model} from "stage=model,..."; a stage given without a model uses SMALL_MODEL_ID.
+    """
+    stage_models = {}
+    for item in (spec or "").split(","):
+        stage, _, model = item.partition("=")
+        if stage.strip():
+            stage_models[stage.strip()] = model.strip() or SMALL_MODEL_ID
+    return stage_models
+
+
+# Empty by default, so every stage runs on the large model unless routing is opted into
+STAGE_MODELS = parse_stage_models(os.environ.get("HEARST_STAGE_MODELS", ""))
+# Below this success rate (once MIN_SAMPLES calls are in the window) a small model is demoted
+MIN_SUCCESS_RATE = float(os.environ.get("HEARST_ROUTER_MIN_SUCCESS", 0.8))
+MIN_SAMPLES = 5
+PROBE_EVERY = 10
+DEFAULT_WINDOW = 50
+
+
+class ModelRouter:
+    """
+    Thread-safe choice of model per stage, from the configured stage_models and observed results.
+    Stages are matched exactly first, then by prefix ("posts" also covers "posts:linkedin").
+    """
+
+    def __init__(self, large_model_id, stage_models=None, min_success_rate=MIN_SUCCESS_RATE,
+                 min_samples=MIN_SAMPLES, probe_every=PROBE_EVERY, window=DEFAULT_WINDOW):
+        self.large_model_id = large_model_id
+        self.stage_models = dict(STAGE_MODELS if stage_models is None else stage_models)
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self._results = defaultdict(lambda: deque(maxlen=window))
+        self._skipped = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def small_model(self, stage):
+        model = self.stage_models.get(stage) or self.stage_models.get(stage.split(":")[0])
+        return model if model and model != self.large_model_id else None
+
+    def choose(self, stage):
+        """
+        Model to try first for stage: its small model, unless observed results demote it.
+        """
+        model = self.small_model(stage)
+        if model is None:
+            return self.large_model_id
+        with self._lock:
+            reason = self._demotion(stage, model)
+            if reason is None:
+                return model
+            self._skipped[stage] += 1
+            probe = self._skipped[stage] % self.probe_every == 0
+        METRICS.incr("model_route", phase=stage, model=model, result="probe" if probe else f"demoted_{reason}")
+        return model if probe else self.large_model_id
+
+    def _demotion(self, stage, model):
+        small = self._results[(stage, model)]
+        if len(small) < self.min_samples:
+            return None
+        success = sum(ok for _, ok in small) / len(small)
+        if success < self.min_success_rate:
+            return "quality"
+        large = self._results[(stage, self.large_model_id)]
+        if len(large) < self.min_samples:
+            return None
+        # Each failed small-model call is followed by a large-model run, so failures cost both
+        large_p50 = percentile([seconds for seconds, _ in large], 50)
+        expected = percentile([seconds for seconds, _ in small], 50) + (1 - success) * large_p50
+        return "latency" if expected >= large_p50 else None
+
+    def record(self, stage, model, seconds, ok):
+        """
+        Record one call of model for stage: its latency and whether it passed the quality checks.
+        """
+        with self._lock:
+            self._results[(stage, model)].append((seconds, bool(ok)))
+
+    def summary(self):
+        """
+        Rows of {stage, model, calls, success_rate, p50_ms} over the rolling window.
+        """
+        with self._lock:
+            results = {key: list(values) for key, values in self._results.items()}
+        rows = []
+        for (stage, model), values in sorted(results.items()):
+            rows.append({
+                "stage": stage,
+                "model": model,
+                "calls": len(values),
+                "success_rate": round(sum(ok for _, ok in values) / len(values), 3),
+                "p50_ms": round(percentile([seconds for seconds, _ in values], 50) * 1000, 1),
+            })
+        return rows
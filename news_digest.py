@@ -0,0 +1,159 @@
+"""
+Mining news digest shared by the Idea Lab.
+
+The "latest crypto mining news" research changes on the scale of hours, so it is refreshed
+in the background and stored with a timestamp; the Idea Lab only runs the idea agent
+against the stored digest and refreshes on demand when it is stale.
+
+Run as a separate worker process with:
+    python news_digest.py --interval 7200
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from link_check import LinkVerifier
+from pipeline import PipelineError, fetch_mining_news, verify_source_links
+
+# ------------------ Configuration ------------------
+DEFAULT_DIGEST_PATH = os.environ.get("HEARST_NEWS_DIGEST_PATH", os.path.join(".cache", "news_digest.json"))
+DEFAULT_REFRESH_SECONDS = int(os.environ.get("HEARST_NEWS_REFRESH_SECONDS", 2 * 60 * 60))
+DEFAULT_MAX_AGE_SECONDS = int(os.environ.get("HEARST_NEWS_MAX_AGE_SECONDS", 6 * 60 * 60))
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------ Store ------------------
+class NewsDigestStore:
+    """
+    JSON file holding the latest digest: {"summary", "links", "refreshed_at"}.
+    Writes are atomic, so the app and a worker process can share the file.
+    """
+
+    def __init__(self, path=DEFAULT_DIGEST_PATH, verifier=None):
+        self.path = path
+        # Optional link_check.LinkVerifier; dead and homepage links are dropped before saving
+        self.verifier = verifier
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                digest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        return digest if isinstance(digest, dict) and digest.get("links") else None
+
+    def save(self, news_data):
+        digest = dict(news_data, refreshed_at=time.time())
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(digest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return digest
+
+    @staticmethod
+    def age_seconds(digest):
+        if not digest:
+            return None
+        return max(0.0, time.time() - digest.get("refreshed_at", 0))
+
+    def refresh(self, agent=None, runner=None):
+        """
+        Run the news agent and store the result. Concurrent callers in this process
+        wait for the refresh already in progress instead of starting another one.
+        """
+        started = time.time()
+        with self._lock:
+            digest = self.load()
+            if digest and digest.get("refreshed_at", 0) >= started:
+                return digest
+            news_data = fetch_mining_news(agent=agent, runner=runner)
+            if self.verifier is not None:
+                news_data, _ = verify_source_links(news_data, self.verifier)
+                if not news_data["links"]:
+                    raise PipelineError("No mining news links passed verification.", json.dumps(news_data))
+            return self.save(news_data)
+
+    def get(self, max_age_seconds=DEFAULT_MAX_AGE_SECONDS, agent=None, runner=None):
+        """
+        Return the stored digest, refreshing it first if missing or older than max_age_seconds.
+        """
+        digest = self.load()
+        age = self.age_seconds(digest)
+        if digest is None or age > max_age_seconds:
+            digest = self.refresh(agent=agent, runner=runner)
+        return digest
+
+
+# ------------------ Background Refresh ------------------
+class NewsDigestRefresher(threading.Thread):
+    """
+    Daemon thread that keeps the digest no older than interval_seconds.
+    """
+
+    def __init__(self, store, interval_seconds=DEFAULT_REFRESH_SECONDS, agent_factory=None,
+                 retry_seconds=5 * 60):
+        super().__init__(name="news-digest-refresher", daemon=True)
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self.agent_factory = agent_factory
+        self.retry_seconds = retry_seconds
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            age = self.store.age_seconds(self.store.load())
+            if age is None or age >= self.interval_seconds:
+                try:
+                    agent = self.agent_factory() if self.agent_factory else None
+                    self.store.refresh(agent=agent)
+                    self.last_error = None
+                    wait = self.interval_seconds
+                except Exception as exc:
+                    self.last_error = exc
+                    logger.warning("Mining news refresh failed: %s", exc)
+                    wait = self.retry_seconds
+            else:
+                wait = self.interval_seconds - age
+            self._stop_event.wait(wait)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the Idea Lab mining news digest fresh.")
+    parser.add_argument("--path", default=DEFAULT_DIGEST_PATH, help="Digest file (default: %(default)s)")
+    parser.add_argument("--interval", type=int, default=DEFAULT_REFRESH_SECONDS, help="Refresh interval in seconds (default: %(default)s)")
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+    parser.add_argument("--no-verify-links", action="store_true", help="Store news links without checking them")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("GROQ_API_KEY"):
+        parser.error("GROQ_API_KEY must be set in the environment")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    store = NewsDigestStore(args.path, verifier=None if args.no_verify_links else LinkVerifier())
+    if args.once:
+        digest = store.refresh()
+        print(f"Refreshed digest with {len(digest.get('links', []))} links")
+        return 0
+    refresher = NewsDigestRefresher(store, interval_seconds=args.interval)
+    refresher.start()
+    try:
+        while refresher.is_alive():
+            refresher.join(timeout=1)
+    except KeyboardInterrupt:
+        refresher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,409 @@
+import re
+import ast
+import json
+from urllib.parse import urlsplit
+
+
+# ------------------ Free-Text Fallbacks ------------------
+# Markdown answers are tokenized line by line: each line is classified once (section start,
+# labelled field or continuation) with anchored, precompiled patterns, so parsing stays
+# linear in the size of the output.
+_SECTION_START = re.compile(r"(?:(#{1,6})(?=[ \t\d])[ \t]*|(\d{1,3})[.)][ \t]+)(.*)")
+_LEADING_NUMBER = re.compile(r"\d{1,3}[.)][ \t]*")
+_FIELD_LINE = re.compile(
+    r"[ \t>*_-]*(topic|title|summary|simple explanation|description|suggested post angle|post angle|date|"
+    r"source|url|useful links|links|key statistics|statistics|stats)[*_ \t]*:[*_ \t]*(.*)",
+    re.IGNORECASE,
+)
+_FIELD_NAMES = {
+    "topic": "topic", "title": "topic",
+    "summary": "summary",
+    "simple explanation": "simple_explanation",
+    "description": "description",
+    "suggested post angle": "suggested_post_angle", "post angle": "suggested_post_angle",
+    "date": "date",
+    "source": "url", "url": "url",
+    "useful links": "links", "links": "links",
+    "key statistics": "stats", "statistics": "stats", "stats": "stats",
+}
+# Bare URLs and markdown link targets alike; the literal prefix lets the engine skip ahead
+_URL = re.compile(r"https?://[^\s*()\[\]<>\"']+")
+# Fields holding one value; the lines after it go back to the section body (e.g. a stats
+# paragraph following "Source:" and "Date:")
+_SINGLE_LINE_FIELDS = {"topic", "url", "date", "suggested_post_angle"}
+_STAT = re.compile(r"\d+\.?\d*%?\s*[^.;\n]+")
+_MAX_STATS = 3
+
+
+def _clean(text):
+    return text.strip().strip("*_").strip()
+
+
+def _first_line(text):
+    return text.split("\n", 1)[0].strip() if text else ""
+
+
+def _new_section(heading):
+    return {"heading": heading, "fields": {}, "body": [], "links": []}
+
+
+def tokenize_sections(text, numbered=False):
+    """
+    Split a markdown or plain-text answer into sections in one pass over its lines.
+
+    A section starts at a heading or, with numbered=True, at a line starting "1." or "1)";
+    text before the first one forms a section whose heading is None. Returns a list of
+    {"heading", "fields", "body", "links"}: fields maps a canonical label ("topic", "summary",
+    "description", ...) to its text, including continuation lines for multi-line labels; body
+    holds the other lines, and links are the section's URLs in order without duplicates.
+    """
+    sections = []
+    section, lines, single = None, None, False
+    for line in (text or "").splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        first = stripped[0]
+        start = _SECTION_START.match(stripped) if first == "#" or (numbered and first.isdigit()) else None
+        if start is not None:
+            heading = start.group(3)
+            if start.group(1):
+                heading = _LEADING_NUMBER.sub("", heading, 1)
+            if "http" in heading:
+                # The URL is still collected as a link below
+                heading = _URL.sub("", heading)
+            section = _new_section(_clean(heading))
+            sections.append(section)
+            lines, single = section["body"], False
+        else:
+            if section is None:
+                section = _new_section(None)
+                sections.append(section)
+                lines = section["body"]
+            field = _FIELD_LINE.match(stripped) if ":" in stripped else None
+            if field is not None:
+                name = _FIELD_NAMES[field.group(1).lower()]
+                lines, single = section["fields"].setdefault(name, []), name in _SINGLE_LINE_FIELDS
+                stripped = field.group(2).strip()
+            if stripped:
+                lines.append(stripped)
+                if single:
+                    lines, single = section["body"], False
+        if "http" in stripped:
+            section["links"].extend(url.rstrip(".,;:") for url in _URL.findall(stripped))
+    for section in sections:
+        section["fields"] = {name: "\n".join(value) for name, value in section["fields"].items()}
+        section["links"] = list(dict.fromkeys(section["links"]))
+    return sections
+
+
+def _section_stats(section):
+    listed = section["fields"].get("stats")
+    if listed:
+        return [line.lstrip("-*•+ \t") for line in listed.split("\n")][:_MAX_STATS]
+    # Only the first few matches are ever used, so stop scanning once they are found
+    body = "\n".join(section["body"])
+    return [m.group() for _, m in zip(range(_MAX_STATS), _STAT.finditer(body))]
+
+
+def parse_research(content: str):
+    """
+    Research entries ({title, url, date, stats, summary}) from a markdown research answer,
+    one per section.
+    """
+    items = []
+    for section in tokenize_sections(content):
+        fields, body = section["fields"], section["body"]
+        title = section["heading"]
+        if title is None:
+            if not body:
+                continue
+            title, section = body[0], dict(section, body=body[1:])
+        elif not (fields or body or section["links"]):
+            continue
+        entry = {"title": title}
+        url = _first_line(fields.get("url")) or (section["links"][0] if section["links"] else "")
+        if url:
+            entry["url"] = url
+        if fields.get("date"):
+            entry["date"] = _first_line(fields["date"])
+        stats = _section_stats(section)
+        if stats:
+            entry["stats"] = stats
+        entry["summary"] = fields.get("summary", "")
+        items.append(entry)
+    return items
+
+
+def research_from_text(text):
+    """
+    Build research_data ({summary, simple_explanation, stats, links}) from a markdown answer
+    that is not JSON, or return None. Only labelled summaries and text under headings count,
+    so broken JSON is left to the JSON repair instead.
+    """
+    sections = tokenize_sections(text)
+    summaries = [
+        s["fields"].get("summary") or (" ".join(s["body"]) if s["heading"] is not None else "")
+        for s in sections
+    ]
+    summaries = [summary for summary in summaries if summary]
+    if not summaries:
+        return None
+    return {
+        "summary": "\n\n".join(summaries),
+        "simple_explanation": next(
+            (s["fields"]["simple_explanation"] for s in sections if s["fields"].get("simple_explanation")), ""
+        ),
+        "stats": [stat for s in sections for stat in _section_stats(s)],
+        "links": list(dict.fromkeys(url for s in sections for url in s["links"])),
+    }
+
+
+def parse_ideas_from_text(text):
+    """
+    Ideas ({topic, summary, links, description, suggested_post_angle}) from a markdown or
+    numbered-list answer, one per heading or numbered item.
+    """
+    ideas = []
+    for section in tokenize_sections(text, numbered=True):
+        fields, body = section["fields"], section["body"]
+        # Text before the first heading is only an idea if it is labelled like one
+        if section["heading"] is None and not fields:
+            continue
+        topic = _first_line(fields.get("topic")) or section["heading"] or (body[0] if body else "")
+        description = fields.get("description") or " ".join(body)
+        if not topic or not (fields.get("summary") or description or section["links"]):
+            continue
+        ideas.append({
+            "topic": _clean(topic),
+            "summary": fields.get("summary", ""),
+            "links": section["links"],
+            "description": description,
+            "suggested_post_angle": _first_line(fields.get("suggested_post_angle")).strip("\"“”'"),
+        })
+    return ideas
+
+
+# ------------------ JSON Extraction ------------------
+_DECODER = json.JSONDecoder()
+# Strings are matched whole (unrolled-loop form); group 1 is None when the string never closes.
+# Single- and smart-quoted strings (Python and LLM literals) only count when closed on the
+# same line, and a bare word other than a literal marks the container as prose.
+_SCAN_TOKEN = re.compile(
+    r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\],]'
+    r"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'|\u201c[^\u201d\n]*\u201d|(?<![\w.])[A-Za-z_]\w*",
+    re.DOTALL,
+)
+_BARE_LITERALS = {"true", "false", "null", "True", "False", "None", "NaN", "Infinity"}
+# _scan_container's end for a container that turned out to be prose
+_PROSE = -1
+_TRAILING_COMMA = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")|,\s*([}\]])', re.DOTALL)
+_SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"', "\u201e": '"', "\u2033": '"'})
+_PYTHON_LITERAL = re.compile(r"'|\b(?:True|False|None)\b")
+_CLOSERS = {"{": "}", "[": "]"}
+# A container is only decoded if it opens like JSON (or a Python literal): an object with a
+# key or "}", an array with a value or "]". Prose such as "{ not json }" is skipped unscanned.
+_JSON_START = re.compile(r'\{(?=\s*["\'\u201c}])|\[(?=\s*[\]\[{"\'\u201c\dtfnTFN-])')
+
+
+def _scan_container(text, start):
+    """
+    String-aware bracket matcher for the container opening at text[start].
+
+    Returns (end, nested, stack, string_start, last_comma): end is the index just past the
+    matching close bracket (None if the text ends first), nested are the (start, end)
+    spans of the outermost complete containers inside it, and the rest describes where
+    a truncated tail stopped; string_start is the opening quote of a string that never
+    closes, or None. If a bare word shows the container is prose, end is _PROSE and stack
+    holds the positions of the brackets still open there, which are prose as well.
+    """
+    stack, nested = [], []
+    # The last comma still inside an open container, as (position, stack depth); the stack
+    # below that depth is untouched since, so it is only copied if the tail needs repairing
+    comma_at, comma_depth = None, 0
+
+    def tail_state():
+        last_comma = (comma_at, [c for c, _ in stack[:comma_depth]]) if comma_at is not None else None
+        return [c for c, _ in stack], last_comma
+
+    for match in _SCAN_TOKEN.finditer(text, start):
+        token = match.group()
+        ch = token[0]
+        if ch == '"':
+            if match.group(1) is None:
+                open_stack, last_comma = tail_state()
+                return None, nested, open_stack, match.start(), last_comma
+        elif ch.isalpha() or ch == "_":
+            if token not in _BARE_LITERALS:
+                return _PROSE, nested, [opened for _, opened in stack], None, None
+        elif ch in "'\u201c":
+            continue
+        elif ch in "{[":
+            stack.append((ch, match.start()))
+        elif ch in "}]":
+            if not stack or _CLOSERS[stack[-1][0]] != ch:
+                # Mismatched bracket: give up on this container but keep its complete parts
+                return match.end(), nested, [], None, None
+            _, opened = stack.pop()
+            if not stack:
+                return match.end(), nested, [], None, None
+            if comma_depth > len(stack):
+                comma_at = None
+            # Spans recorded since this container opened are nested in it, so drop them
+            while nested and nested[-1][0] > opened:
+                nested.pop()
+            nested.append((opened, match.end()))
+        elif stack:
+            comma_at, comma_depth = match.start(), len(stack)
+    open_stack, last_comma = tail_state()
+    return None, nested, open_stack, None, last_comma
+
+
+def _loads_repaired(segment):
+    """
+    Parse a candidate after fixing common LLM defects: smart quotes used as string
+    delimiters, trailing commas and Python-style literals.
+    """
+    segment = segment.translate(_SMART_QUOTES)
+    segment = _TRAILING_COMMA.sub(lambda m: m.group(1) or m.group(2), segment)
+    try:
+        return json.loads(segment)
+    except json.JSONDecodeError:
+        pass
+    if not _PYTHON_LITERAL.search(segment):
+        return None
+    try:
+        value = ast.literal_eval(segment)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return value if isinstance(value, (dict, list)) else None
+
+
+def _close_truncated(text, start, stack, string_start, last_comma):
+    """
+    Repair a container that was cut off mid-output by closing any open string and brackets.
+    Falls back to dropping everything after the last complete member.
+    """
+    tail = text[start:] + ('"' if string_start is not None else "")
+    tail = tail.rstrip()
+    if tail.endswith(","):
+        tail = tail[:-1]
+    elif tail.endswith(":"):
+        tail += " null"
+    value = _loads_repaired(tail + "".join(_CLOSERS[c] for c in reversed(stack)))
+    if value is None and last_comma is not None:
+        comma, comma_stack = last_comma
+        value = _loads_repaired(text[start:comma] + "".join(_CLOSERS[c] for c in reversed(comma_stack)))
+    return value
+
+
+def _decode_at(text, start, repair, prose):
+    """
+    Decode the container starting at text[start]. Returns (values, end); positions of
+    brackets found to open prose are added to the prose set.
+    """
+    # Bracket-match first and decode only the slice, so a failure costs O(candidate)
+    end, nested, stack, string_start, last_comma = _scan_container(text, start)
+    if end == _PROSE:
+        # Every bracket still open at the bare word would stop there too, so those are skipped;
+        # the candidates in between (closed ones, or ones inside a stray quote) are decoded on
+        # their own, whatever the string state looked like from here
+        prose.update(stack)
+        return [], start + 1
+    if end is not None:
+        try:
+            return [json.loads(text[start:end])], end
+        except json.JSONDecodeError:
+            value = _loads_repaired(text[start:end]) if repair else None
+    else:
+        # Only JSON-like text reaches the end unclosed, so this runs at most once per text
+        value = _close_truncated(text, start, stack, string_start, last_comma) if repair else None
+        end = len(text)
+    if value is not None:
+        return [value], end
+    # The container itself is unusable; salvage the complete containers inside it
+    values = []
+    for nested_start, _ in nested:
+        if _JSON_START.match(text, nested_start):
+            values.extend(_decode_at(text, nested_start, repair, prose)[0])
+    return values, end
+
+
+def extract_json_values(text, repair=True):
+    """
+    Return every top-level JSON object or array found in text, in order.
+
+    A single left-to-right pass: each candidate is decoded once and scanning resumes after
+    it, so prose, code fences and stray braces between values are skipped without
+    re-parsing. With repair=True, trailing commas, smart quotes and truncated tails are
+    fixed up before giving up on a candidate.
+    """
+    text = text or ""
+    values = []
+    pos = 0
+    # raw_decode on the whole text is the fastest path for well-formed output, but each
+    # failure costs O(offset) because JSONDecodeError counts the preceding newlines. Keep
+    # using it only while that overhead stays within a small multiple of the input size.
+    fast_path_budget = 4 * len(text)
+    prose = set()
+    while True:
+        match = _JSON_START.search(text, pos)
+        if not match:
+            return values
+        start = match.start()
+        if start in prose:
+            pos = start + 1
+            continue
+        if fast_path_budget > 0:
+            try:
+                value, pos = _DECODER.raw_decode(text, start)
+                values.append(value)
+                continue
+            except json.JSONDecodeError as exc:
+                fast_path_budget -= exc.pos
+        found, pos = _decode_at(text, start, repair, prose)
+        values.extend(found)
+
+
+def extract_json_from_text(text):
+    """
+    Extract the first JSON object found in a string, including from code blocks.
+    """
+    for value in extract_json_values(text):
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def extract_json_objects(text):
+    """
+    Extract all JSON objects from a string, even if not in a JSON array.
+    """
+    json_objects = []
+    for value in extract_json_values(text):
+        if isinstance(value, dict):
+            json_objects.append(value)
+        elif isinstance(value, list):
+            json_objects.extend(v for v in value if isinstance(v, dict))
+    return json_objects
+
+
+# Path segments that only appear in index pages (tag, topic, category, author and search listings)
+_LISTING_SEGMENTS = {"tag", "tags", "topic", "topics", "category", "categories", "author", "authors", "search"}
+
+
+def is_valid_article_link(url):
+    """
+    False only for URLs that are clearly not a single article: homepages, section fronts
+    such as /news, and tag, topic, category, author or search listings. Everything else is
+    left to the HTTP check.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.lower().split("/") if segment]
+    if not segments:
+        # https://example.com/?p=123 is an article on many WordPress sites
+        return bool(parts.query)
+    if any(segment in _LISTING_SEGMENTS for segment in segments):
+        return False
+    # A single plain word is a section front (/news, /markets); slugs carry hyphens, digits or dots
+    return not (len(segments) == 1 and re.fullmatch(r"[a-z]+", segments[0]))
@@ -0,0 +1,814 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from agent_pool import AgentPool
+from compaction import compact_research
+from link_check import LinkVerifier
+from metrics import METRICS
+from model_router import ModelRouter
+from parsing import extract_json_from_text, extract_json_objects, parse_ideas_from_text, research_from_text
+from research_cache import research_cache_key
+from singleflight import SHARED_FLIGHTS, flight_key
+from token_usage import TokenLedger, estimate_tokens, response_token_usage
+
+# ------------------ Configuration ------------------
+GROQ_MODEL_ID = "llama-3.3-70b-versatile"
+MINING_NEWS_PROMPT = "Latest crypto mining news and innovations"
+
+# Unusable (non-JSON or incomplete) output is re-asked in JSON mode up to this many times per stage
+STRUCTURED_RETRIES = int(os.environ.get("HEARST_STRUCTURED_RETRIES", 1))
+# Hedged requests, off unless configured: "posts=8,ideas=10" sends a second request for a stage
+# that has not answered after that many seconds, to HEARST_HEDGE_MODEL (default: the same model)
+HEDGE_AFTER_SECONDS = {
+    stage.strip(): float(seconds)
+    for stage, _, seconds in (item.partition("=") for item in os.environ.get("HEARST_HEDGE_AFTER", "").split(","))
+    if stage.strip() and seconds.strip()
+}
+HEDGE_MODEL_ID = os.environ.get("HEARST_HEDGE_MODEL") or GROQ_MODEL_ID
+
+# ------------------ Agent Factories ------------------
+def _agno():
+    # agno, the Groq client and duckduckgo_search are imported on first agent construction,
+    # so importing this module (and the app's first paint) does not pay for them.
+    from agno.agent import Agent
+    from agno.models.groq import Groq
+    from search_cache import CachedDuckDuckGoTools
+    return Agent, Groq, CachedDuckDuckGoTools
+
+
+# Kept at module level so the research cache can key on the exact instruction set.
+RESEARCH_INSTRUCTIONS = [
+    "You are a researcher for Hearst Corporation.",
+    "Given a topic, perform in-depth research using only credible, high-quality industry sources (e.g., CoinDesk, Cointelegraph, PR Newswire, MiningWeek, MIT Tech Review, Cambridge Bitcoin Index, Academic papers from IEEE, Springer crypto conferences).",
+    "Avoid social media and opinion blogs.",
+    "Return ONLY valid JSON. Do NOT include any markdown, explanations, or text outside the JSON object.",
+    "The JSON must have the following structure:",
+    "",
+    "{",
+    '  "summary": "<1000-2000 word in-depth technical summary of the topic, including all major trends, findings, controversies, and future outlook. Use as much detail as possible, cite statistics, and reference sources.>",',
+    '  "simple_explanation": "<A simple, clear explanation of the topic in 100-200 words, suitable for someone with no technical background.>",',
+    '  "stats": ["statistic 1", "statistic 2", ...],',
+    '  "links": ["Direct URL to a recent (last 12 months) research article or news post about the topic", "... (at least 8-10 unique, recent, high-quality links)"]',
+    "}",
+    "",
+    "Example:",
+    '{',
+    '  "summary": "Bitcoin mining is the process of ... (very detailed, technical, long)",',
+    '  "simple_explanation": "Bitcoin mining is how new bitcoins are created ... (simple, short)",',
+    '  "stats": ["50% of bitcoin mining uses renewables", "Over 12,200 jobs provided by mining in Texas"],',
+    '  "links": ["https://coindesk.com/2024/05/bitcoin-mining-sustainability", "https://cointelegraph.com/news/bitcoin-mining-2024-trends", "..."]',
+    '}',
+    "All links must be direct to the original research/news post, not homepages or aggregators, and as recent as possible."
+]
+
+def create_research_agent(model_id=None):
+    Agent, Groq, CachedDuckDuckGoTools = _agno()
+    return Agent(
+        name="Hearst Research Validator",
+        role="Research the provided crypto mining topic and generate high-quality, data-driven content examples and a detailed research summary for the marketing team.",
+        model=Groq(id=model_id or GROQ_MODEL_ID),
+        tools=[CachedDuckDuckGoTools(search=True, news=True)],
+        instructions=RESEARCH_INSTRUCTIONS,
+        show_tool_calls=False,
+        markdown=True
+    )
+
+def create_post_agent(model_id=None):
+    Agent, Groq, _ = _agno()
+    return Agent(
+        name="Hearst Content Architect",
+        role="Create data-driven, positive social posts for Hearst",
+        model=Groq(id=model_id or GROQ_MODEL_ID),
+        instructions=[
+            "You are a content creator for Hearst Corporation.",
+            "Given a research summary, statistics, and links, generate the following in JSON:",
+            "",
+            "{",
+            '  "linkedin": "<LinkedIn post>",',
+            '  "linkedin_reference": "<URL from the research links used in the post>",',
+            '  "instagram": "<Instagram post>",',
+            '  "instagram_reference": "<URL from the research links used in the post>",',
+            '  "x": "<X (Twitter) post>",',
+            '  "x_reference": "<URL from the research links used in the post>"',
+            "}",
+            "",
+            "Each post should reference the research and statistics, but not include URLs in the post text. Provide the reference link separately, and always use a link from the provided research links."
+        ],
+        show_tool_calls=False,
+        markdown=False
+    )
+
+# (key, label used in the prompt, card title, card icon)
+POST_PLATFORMS = [
+    ("linkedin", "LinkedIn post", "LinkedIn Post Example", "💼"),
+    ("instagram", "Instagram post", "Instagram Post Example", "📸"),
+    ("x", "X (Twitter) post", "X Post Example", "✖️"),
+]
+
+def create_platform_post_agent(platform, model_id=None):
+    label = next(label for key, label, _, _ in POST_PLATFORMS if key == platform)
+    Agent, Groq, _ = _agno()
+    return Agent(
+        name=f"Hearst Content Architect ({platform})",
+        role=f"Create a data-driven, positive {label} for Hearst",
+        model=Groq(id=model_id or GROQ_MODEL_ID),
+        instructions=[
+            "You are a content creator for Hearst Corporation.",
+            f"Given a research summary, statistics, and links, generate a single {label} in JSON:",
+            "",
+            "{",
+            f'  "{platform}": "<{label}>",',
+            f'  "{platform}_reference": "<URL from the research links used in the post>"',
+            "}",
+            "",
+            "The post should reference the research and statistics, but not include URLs in the post text. Provide the reference link separately, and always use a link from the provided research links."
+        ],
+        show_tool_calls=False,
+        markdown=False
+    )
+
+def create_mining_news_agent(model_id=None):
+    Agent, Groq, CachedDuckDuckGoTools = _agno()
+    return Agent(
+        name="Crypto Mining News Summarizer",
+        role="Summarize the latest (last 1-2 months) crypto mining news and provide a list of direct article links.",
+        model=Groq(id=model_id or GROQ_MODEL_ID),
+        tools=[CachedDuckDuckGoTools(search=True, news=True, news_timelimit="m")],
+        instructions=[
+            "Research the latest (last 1-2 months) news and innovations in the crypto mining industry ONLY and make sure to give urls of the research.",
+            "Return a JSON object with:",
+            '{ "summary": "<detailed summary of the latest news>", "links": ["direct article link 1", "direct article link 2", "... (at least 5)"] }',
+            "All links must be direct to a specific article, not homepages or topic pages."
+        ],
+        show_tool_calls=False,
+        markdown=False
+    )
+
+
+def create_idea_agent(model_id=None):
+    Agent, Groq, _ = _agno()
+    return Agent(
+        name="Crypto Mining Idea Generator",
+        role="Generate actionable content ideas for Hearst based on mining news.",
+        model=Groq(id=model_id or GROQ_MODEL_ID),
+        instructions=[
+            "Given the following mining news summary and links, generate 5 actionable content ideas for Hearst Corporation.",
+            "Each idea must be about crypto mining or a new technology directly impacting mining.",
+            "Return a JSON array of 5 objects, each with:",
+            '{ "topic": "<short, catchy idea title>", "summary": "<5-10 sentence summary>", "description": "<detailed explanation>", "links": ["useful article link(s) from the provided list"], "suggested_post_angle": "<optional>" }'
+        ],
+        show_tool_calls=False,
+        markdown=False
+    )
+
+def create_json_repair_agent(model_id=None):
+    Agent, Groq, _ = _agno()
+    return Agent(
+        name="Hearst JSON Repair",
+        role="Rewrite another agent's malformed output as valid JSON in the requested shape.",
+        # JSON mode: Groq only returns syntactically valid JSON objects
+        model=Groq(id=model_id or GROQ_MODEL_ID, response_format={"type": "json_object"}),
+        instructions=[
+            "You receive the raw output of another agent and the JSON shape it was asked to return.",
+            "Return ONLY a JSON object in exactly that shape, keeping all of the original content, statistics and links.",
+            "Do not invent facts or links that are not in the raw output. Use empty strings or lists for anything missing."
+        ],
+        show_tool_calls=False,
+        markdown=False
+    )
+
+# Agents are leased per run instead of shared: see agent_pool.py
+AGENT_POOL = AgentPool({
+    "research": create_research_agent,
+    "posts": create_post_agent,
+    "platform_post": create_platform_post_agent,
+    "news": create_mining_news_agent,
+    "ideas": create_idea_agent,
+})
+
+# Picks the model each stage runs on: see model_router.py
+MODEL_ROUTER = ModelRouter(GROQ_MODEL_ID)
+
+def reset_search_dedup(agent):
+    """
+    Reset per-run URL de-duplication on the agent's cached search toolkits.
+    """
+    for tool in getattr(agent, "tools", None) or []:
+        reset_seen = getattr(tool, "reset_seen", None)
+        if callable(reset_seen):
+            reset_seen()
+
+
+# ------------------ Pipeline Stages ------------------
+class PipelineError(Exception):
+    """
+    Raised when an agent's output cannot be used; raw holds the text that was received.
+    """
+
+    def __init__(self, message, raw=""):
+        super().__init__(message)
+        self.raw = raw or ""
+
+
+def run_agent(agent, message, runner=None, stage=None, ledger=None):
+    """
+    Run an agent through an optional runner(agent, message) hook, e.g. a rate limiter,
+    and record its latency, token usage and tool calls under stage.
+    """
+    stage = stage or getattr(agent, "name", "agent")
+    with METRICS.span(stage):
+        response = runner(agent, message) if runner is not None else agent.run(message)
+    if ledger is not None:
+        ledger.record_response(stage, response, message)
+    record_response_metrics(stage, response)
+    return response
+
+
+def record_response_metrics(stage, response):
+    """
+    Count provider-reported tokens and the tool calls made while producing response.
+    """
+    input_tokens, output_tokens = response_token_usage(response)
+    if input_tokens is not None:
+        METRICS.incr("tokens", input_tokens, phase=stage, direction="input")
+        METRICS.incr("tokens", output_tokens, phase=stage, direction="output")
+    tool_calls = len(getattr(response, "tools", None) or [])
+    if tool_calls:
+        METRICS.incr("tool_calls", tool_calls, phase=stage)
+
+
+def parse_json_output(text, stage=None):
+    # Try direct JSON load first, then fallback to extraction
+    try:
+        return json.loads(text or "")
+    except json.JSONDecodeError:
+        METRICS.incr("parse_fallback", phase=stage)
+        return extract_json_from_text(text or "")
+
+
+def parse_ideas_output(text):
+    try:
+        ideas_list = json.loads(text or "")
+    except Exception:
+        METRICS.incr("parse_fallback", phase="ideas")
+        ideas_list = extract_json_objects(text or "")
+    # JSON-mode repairs return the list wrapped in an object
+    if isinstance(ideas_list, dict):
+        ideas_list = [ideas_list]
+    if isinstance(ideas_list, list) and len(ideas_list) == 1 and isinstance(ideas_list[0], dict) \
+            and isinstance(ideas_list[0].get("ideas"), list):
+        ideas_list = ideas_list[0]["ideas"]
+    if not ideas_list:
+        # Markdown answers are tokenized locally before paying for a JSON repair request
+        ideas_list = parse_ideas_from_text(text or "")
+        if ideas_list:
+            METRICS.incr("parse_text_fallback", phase="ideas")
+    return ideas_list or None
+
+
+# Free-text parsers tried when a stage's output holds no usable JSON object
+TEXT_FALLBACKS = {
+    "research": research_from_text,
+    "news": research_from_text,
+}
+
+
+def object_parser(stage, *required):
+    """
+    Parser for stages returning a JSON object: None unless it is a non-empty object with
+    every required key set.
+    """
+    def usable(value):
+        return isinstance(value, dict) and value and all(value.get(key) for key in required)
+
+    def parse(text):
+        value = parse_json_output(text, stage)
+        if usable(value):
+            return value
+        if stage in TEXT_FALLBACKS:
+            value = TEXT_FALLBACKS[stage](text or "")
+            if usable(value):
+                METRICS.incr("parse_text_fallback", phase=stage)
+                return value
+        return None
+    return parse
+
+
+# ------------------ Quality Checks ------------------
+# Output from a routed small model must also pass its stage's check, or the stage is re-run on the large model
+IDEA_COUNT = 5
+
+
+def _link_set(links):
+    return {url.rstrip("/") for url in links or [] if isinstance(url, str)}
+
+
+def has_fields(*keys):
+    def check(value):
+        return isinstance(value, dict) and all(value.get(key) for key in keys)
+    return check
+
+
+def references_research(links, platforms):
+    """
+    Check that every platform's post is written and cites one of the research links.
+    """
+    allowed = _link_set(links)
+
+    def check(value):
+        return isinstance(value, dict) and all(
+            value.get(platform) and str(value.get(f"{platform}_reference") or "").rstrip("/") in allowed
+            for platform in platforms
+        )
+    return check
+
+
+def ideas_cite_news(links):
+    """
+    Check that there are IDEA_COUNT complete ideas, each citing only links from the news digest.
+    """
+    allowed = _link_set(links)
+
+    def check(value):
+        return isinstance(value, list) and len(value) >= IDEA_COUNT and all(
+            isinstance(idea, dict) and idea.get("topic") and idea.get("summary")
+            and isinstance(idea.get("links"), list) and idea["links"] and _link_set(idea["links"]) <= allowed
+            for idea in value
+        )
+    return check
+
+
+# ------------------ Structured Output Recovery ------------------
+# Shape each stage must return, quoted in JSON-mode repair requests
+OUTPUT_SHAPES = {
+    "research": {
+        "summary": "<in-depth technical summary>",
+        "simple_explanation": "<100-200 word plain-language explanation>",
+        "stats": ["<statistic>"],
+        "links": ["<direct article URL>"],
+    },
+    "posts": {
+        field: value
+        for key, label, _, _ in POST_PLATFORMS
+        for field, value in ((key, f"<{label}>"), (f"{key}_reference", "<URL from the research links>"))
+    },
+    "news": {"summary": "<detailed summary of the latest news>", "links": ["<direct article URL>"]},
+    "ideas": {"ideas": [{
+        "topic": "<short, catchy idea title>",
+        "summary": "<5-10 sentence summary>",
+        "description": "<detailed explanation>",
+        "links": ["<article link from the provided list>"],
+        "suggested_post_angle": "<optional>",
+    }]},
+}
+
+
+def output_shape(stage):
+    if stage.startswith("posts:"):
+        platform = stage.split(":", 1)[1]
+        label = next(label for key, label, _, _ in POST_PLATFORMS if key == platform)
+        return {platform: f"<{label}>", f"{platform}_reference": "<URL from the research links>"}
+    return OUTPUT_SHAPES[stage]
+
+
+class RetryPolicy:
+    """
+    How a stage recovers from unusable output and slow requests.
+
+    retries: JSON-mode repair requests after an unusable response (only the failing stage is re-asked).
+    hedge_after: {stage: seconds}; a stage still waiting after that long also sends a hedged request
+    to hedge_model_id, and the first usable result wins. Stages are "research", "posts", "news", "ideas".
+    """
+
+    def __init__(self, retries=STRUCTURED_RETRIES, hedge_after=None, hedge_model_id=HEDGE_MODEL_ID):
+        self.retries = retries
+        self.hedge_after = dict(HEDGE_AFTER_SECONDS if hedge_after is None else hedge_after)
+        self.hedge_model_id = hedge_model_id
+
+    def hedge_threshold(self, stage):
+        return self.hedge_after.get(stage) or self.hedge_after.get(stage.split(":")[0])
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+# Hedged requests outlive the stage that started them when they lose, so they run on a shared pool.
+# Primaries do not: a primary queued behind other calls would have its wait counted against the
+# hedge threshold and trigger needless hedges
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hedge")
+
+
+def _run_parsed(agent, message, parse, stage, runner, ledger):
+    response = run_agent(agent, message, runner, stage, ledger)
+    return response, parse(response.content)
+
+
+def _start_primary(*args):
+    # A thread of its own, started at once, so the hedge timer only measures the request itself
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(_run_parsed(*args))
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name="hedge-primary", daemon=True).start()
+    return future
+
+
+def run_hedged(agent, message, parse, stage, runner=None, ledger=None, policy=None, hedge_factory=None):
+    """
+    Run a stage and return (response, parsed). With a hedge threshold for the stage, a second
+    request from hedge_factory() is sent if the first has not answered in time; the first
+    usable result is returned.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+    threshold = policy.hedge_threshold(stage)
+    if not threshold or hedge_factory is None:
+        return _run_parsed(agent, message, parse, stage, runner, ledger)
+
+    primary = _start_primary(agent, message, parse, stage, runner, ledger)
+    try:
+        return primary.result(timeout=threshold)
+    except FutureTimeoutError:
+        pass
+    METRICS.incr("hedges", phase=stage, result="sent")
+    # Built on the calling thread, like every other agent handed to a worker
+    hedge = _HEDGE_POOL.submit(_run_parsed, hedge_factory(), message, parse, f"{stage}:hedge", runner, ledger)
+
+    pending, fallback, error = {primary, hedge}, None, None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                response, value = future.result()
+            except Exception as exc:
+                error = exc
+                continue
+            if value is not None:
+                if future is hedge:
+                    METRICS.incr("hedges", phase=stage, result="won")
+                    # The primary is still running on its agent; a pooled agent stays leased until it ends
+                    AGENT_POOL.hold_until_done(agent, primary)
+                return response, value
+            fallback = fallback or (response, value)
+    if fallback is None:
+        raise error
+    return fallback
+
+
+def repair_output(stage, raw, parse, runner=None, ledger=None, policy=None, repair_agent_factory=None):
+    """
+    Re-ask only this stage: send its unusable output to a JSON-mode repair agent together with
+    the expected shape, up to policy.retries times. Returns (response, parsed); parsed is None
+    if every attempt failed.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+    repair_agent_factory = repair_agent_factory or create_json_repair_agent
+    response, value = None, None
+    for _ in range(policy.retries):
+        METRICS.incr("structured_retries", phase=stage)
+        message = json.dumps({"expected_shape": output_shape(stage), "raw_output": raw or ""}, ensure_ascii=False)
+        # A fresh agent per repair, since platform posts may be repaired from several threads at once
+        response = run_agent(repair_agent_factory(), message, runner, f"{stage}:repair", ledger)
+        value = parse(response.content)
+        if value is not None:
+            METRICS.incr("structured_repairs", phase=stage, result="ok")
+            return response, value
+        raw = response.content
+    if policy.retries:
+        METRICS.incr("structured_repairs", phase=stage, result="failed")
+    return response, value
+
+
+def run_structured(agent, message, parse, stage, error_message, runner=None, ledger=None, policy=None,
+                   hedge_factory=None, repair_agent_factory=None):
+    """
+    Run a stage (hedged if configured), repair unusable output, and return the parsed value.
+    Raises PipelineError with the last raw output if nothing usable came back.
+    """
+    response, value = run_hedged(agent, message, parse, stage, runner, ledger, policy, hedge_factory)
+    if value is not None:
+        return value
+    return _repair_or_raise(stage, response.content, parse, error_message, runner, ledger, policy, repair_agent_factory)
+
+
+def recover_output(stage, text, parse, error_message, runner=None, ledger=None, policy=None,
+                   repair_agent_factory=None):
+    """
+    Parse output produced outside run_structured (e.g. streamed to the UI), repairing it if needed.
+    """
+    value = parse(text)
+    if value is not None:
+        return value
+    return _repair_or_raise(stage, text, parse, error_message, runner, ledger, policy, repair_agent_factory)
+
+
+def _repair_or_raise(stage, raw, parse, error_message, runner, ledger, policy, repair_agent_factory):
+    repaired, value = repair_output(stage, raw, parse, runner, ledger, policy, repair_agent_factory)
+    if value is None:
+        raise PipelineError(error_message, repaired.content if repaired is not None else raw)
+    return value
+
+
+# ------------------ Model Routing ------------------
+def run_routed(kind, stage, message, parse, check, error_message, agent=None, agent_args=(), runner=None,
+               ledger=None, policy=None, hedge_factory=None, prepare=None):
+    """
+    Run a stage on the model MODEL_ROUTER picks, leasing a kind agent (built with agent_args)
+    from AGENT_POOL. A small model's output that fails parse or check is discarded and the
+    stage is re-run on the large model. A caller-supplied agent is run as is.
+    """
+    if agent is not None:
+        if prepare is not None:
+            prepare(agent)
+        return run_structured(agent, message, parse, stage, error_message, runner, ledger, policy, hedge_factory)
+
+    model_id = MODEL_ROUTER.choose(stage)
+    if model_id != GROQ_MODEL_ID:
+        started, value = time.perf_counter(), None
+        with AGENT_POOL.lease(kind, *agent_args, model_id) as small_agent:
+            if prepare is not None:
+                prepare(small_agent)
+            try:
+                # Tokens and latency are recorded under "<stage>:<model>"; no repair or hedge here
+                value = parse(run_agent(small_agent, message, runner, f"{stage}:{model_id}", ledger).content)
+            except Exception:
+                value = None
+        ok = value is not None and check(value)
+        MODEL_ROUTER.record(stage, model_id, time.perf_counter() - started, ok)
+        METRICS.incr("model_route", phase=stage, model=model_id, result="ok" if ok else "fallback")
+        if ok:
+            return value
+
+    started = time.perf_counter()
+    with AGENT_POOL.lease(kind, *agent_args) as large_agent:
+        if prepare is not None:
+            prepare(large_agent)
+        try:
+            value = run_structured(large_agent, message, parse, stage, error_message, runner, ledger, policy,
+                                   hedge_factory)
+        except PipelineError:
+            MODEL_ROUTER.record(stage, GROQ_MODEL_ID, time.perf_counter() - started, False)
+            raise
+    MODEL_ROUTER.record(stage, GROQ_MODEL_ID, time.perf_counter() - started, check(value))
+    return value
+
+
+def recovery_counts(rows):
+    """
+    Repair and hedged requests among a TokenLedger's rows.
+    """
+    return {
+        "repairs": sum(row["calls"] for row in rows if row["stage"].endswith(":repair")),
+        "hedges": sum(row["calls"] for row in rows if row["stage"].endswith(":hedge")),
+    }
+
+
+def research_topic(topic, agent=None, cache=None, force_refresh=False, runner=None, ledger=None, policy=None,
+                   similar_index=None):
+    """
+    Phase 1: research a topic. Returns (research_data, from_cache).
+
+    With a similar_index (topic_index.SimilarTopicIndex), a cache miss reuses the research
+    of a previously researched near-duplicate topic when it scores above the auto threshold.
+    """
+    if cache is not None and not force_refresh:
+        research_data = cache.get(topic, RESEARCH_INSTRUCTIONS)
+        if research_data is not None:
+            METRICS.incr("research_cache", result="hit")
+            return research_data, True
+        METRICS.incr("research_cache", result="miss")
+
+    if similar_index is not None and not force_refresh:
+        match = similar_index.best_match(topic)
+        research_data = similar_index.load(match) if similar_index.is_reusable(match) else None
+        if research_data is not None:
+            METRICS.incr("research_reuse", result="similar")
+            return research_data, True
+        METRICS.incr("research_reuse", result="suggested" if match else "none")
+
+    policy = policy or DEFAULT_RETRY_POLICY
+
+    def research():
+        research_data = run_routed(
+            "research", "research", topic, object_parser("research"), has_fields("summary", "links"),
+            "Failed to parse research output.", agent, runner=runner, ledger=ledger, policy=policy,
+            hedge_factory=lambda: create_research_agent(policy.hedge_model_id), prepare=reset_search_dedup
+        )
+        if cache is not None and isinstance(research_data, dict):
+            cache.set(topic, RESEARCH_INSTRUCTIONS, research_data)
+        return research_data
+
+    # Concurrent requests for the same topic share one research run
+    key = flight_key("research", research_cache_key(topic, RESEARCH_INSTRUCTIONS))
+    return SHARED_FLIGHTS.do(key, research, stage="research"), False
+
+
+def verify_source_links(data, verifier=None):
+    """
+    Check data["links"] and drop the ones the verifier rejects; links that could not be
+    checked (timeouts, rate limits) are kept. Returns (data_with_checked_links, rejected).
+    """
+    links = data.get("links", []) or []
+    verdicts = (verifier or LinkVerifier()).verify(links)
+    rejected = [v for v in verdicts if v["status"] == "bad"]
+    bad = {v["url"] for v in rejected}
+    kept = list(dict.fromkeys(url for url in links if isinstance(url, str) and url not in bad))
+    return dict(data, links=kept), rejected
+
+
+def build_post_input(research_data):
+    return {
+        "summary": research_data.get("summary", ""),
+        "stats": research_data.get("stats", []),
+        "links": research_data.get("links", [])
+    }
+
+
+def prepare_post_input(research_data, compact=False, ledger=None):
+    """
+    Build the post agents' input. With compact=True the full summary is replaced by a
+    compact brief (key claims, top stats, link index) and the tokens it saves are recorded on
+    ledger as saved_tokens; compaction itself sends nothing, so it adds no input or output.
+    """
+    post_input = build_post_input(research_data)
+    if not compact:
+        return post_input
+    brief = compact_research(research_data)
+    if ledger is not None:
+        saved = estimate_tokens(json.dumps(post_input)) - estimate_tokens(json.dumps(brief))
+        ledger.record("compaction", estimated=True, saved_tokens=max(saved, 0))
+    return brief
+
+
+def generate_posts(research_data, agent=None, runner=None, compact=False, ledger=None, policy=None,
+                   post_input=None):
+    """
+    Phase 2: write all three platform posts with a single request. Pass the post_input
+    already built by prepare_post_input to avoid building (and recording) it again.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+    if post_input is None:
+        post_input = prepare_post_input(research_data, compact, ledger)
+
+    def posts():
+        return run_routed(
+            "posts", "posts", json.dumps(post_input), object_parser("posts"),
+            references_research(post_input.get("links"), [key for key, _, _, _ in POST_PLATFORMS]),
+            "Failed to parse posts output.", agent, runner=runner, ledger=ledger, policy=policy,
+            hedge_factory=lambda: create_post_agent(policy.hedge_model_id)
+        )
+
+    return SHARED_FLIGHTS.do(flight_key("posts", post_input), posts, stage="posts")
+
+
+def generate_platform_post(platform, agent, post_input, runner=None, ledger=None, policy=None, hedge_factory=None):
+    """
+    Generate one platform's post, repairing only this platform on a bad response. With agent
+    None, a routed platform agent is leased from the pool. Returns (platform, posts_fragment, error).
+    """
+    stage = f"posts:{platform}"
+    try:
+        result = SHARED_FLIGHTS.do(
+            flight_key(stage, post_input),
+            lambda: run_routed(
+                "platform_post", stage, json.dumps(post_input), object_parser(stage, platform),
+                references_research(post_input.get("links"), [platform]), "Failed to parse post output.",
+                agent, (platform,), runner, ledger, policy, hedge_factory
+            ),
+            stage=stage,
+        )
+    except PipelineError as exc:
+        return platform, None, f"{exc} Received: {exc.raw}"
+    except Exception as exc:
+        return platform, None, str(exc)
+    return platform, {platform: result[platform], f"{platform}_reference": result.get(f"{platform}_reference", "")}, None
+
+
+def generate_posts_concurrently(post_input, agent_factory=None, runner=None, ledger=None, policy=None):
+    """
+    Fan out one request per platform and yield (platform, posts_fragment, error)
+    in completion order, so each card can be rendered as soon as it is ready.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+    # Given agents are resolved on the calling thread before handing them to workers; without an
+    # agent_factory each worker leases a routed agent. Hedged agents are fresh, unpooled instances,
+    # since an agent must not serve two runs at once
+    agents = {platform: agent_factory(platform) if agent_factory else None for platform, _, _, _ in POST_PLATFORMS}
+    hedge_agents = {
+        platform: create_platform_post_agent(platform, policy.hedge_model_id)
+        for platform in agents if policy.hedge_threshold(f"posts:{platform}")
+    }
+    with ThreadPoolExecutor(max_workers=len(POST_PLATFORMS)) as executor:
+        futures = [
+            executor.submit(
+                generate_platform_post, platform, agent, post_input, runner=runner, ledger=ledger, policy=policy,
+                hedge_factory=(lambda agent=hedge_agents[platform]: agent) if platform in hedge_agents else None
+            )
+            for platform, agent in agents.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def generate_posts_parallel(research_data, agent_factory=None, runner=None, compact=False, ledger=None, policy=None,
+                            post_input=None):
+    """
+    Phase 2 with one request per platform. Platforms that still fail after their
+    retries are left out of the returned posts and reported in errors. As with
+    generate_posts, an already prepared post_input is used as is.
+    """
+    posts, errors = {}, {}
+    if post_input is None:
+        post_input = prepare_post_input(research_data, compact, ledger)
+    for platform, fragment, error in generate_posts_concurrently(post_input, agent_factory, runner, ledger, policy):
+        if error:
+            errors[platform] = error
+        else:
+            posts.update(fragment)
+    return posts, errors
+
+
+def fetch_mining_news(agent=None, runner=None, ledger=None, policy=None):
+    """
+    Idea Lab step 1: summarize the latest mining news. Returns {"summary", "links"}.
+    """
+    policy = policy or DEFAULT_RETRY_POLICY
+
+    def news():
+        return run_routed(
+            "news", "news", MINING_NEWS_PROMPT, object_parser("news", "links"), has_fields("summary", "links"),
+            "Failed to get mining news.", agent, runner=runner, ledger=ledger, policy=policy,
+            hedge_factory=lambda: create_mining_news_agent(policy.hedge_model_id), prepare=reset_search_dedup
+        )
+
+    mining_news_data = SHARED_FLIGHTS.do(flight_key("news", MINING_NEWS_PROMPT), news, stage="news")
+    return {
+        "summary": mining_news_data.get("summary", ""),
+        "links": mining_news_data.get("links", [])
+    }
+
+
+def generate_ideas(news_data, agent=None, runner=None, ledger=None, policy=None):
+    """
+    Idea Lab step 2: turn a news summary and links into content ideas.
+    """
+    idea_input = {
+        "summary": news_data.get("summary", ""),
+        "links": news_data.get("links", [])
+    }
+    policy = policy or DEFAULT_RETRY_POLICY
+
+    def ideas():
+        return run_routed(
+            "ideas", "ideas", json.dumps(idea_input), parse_ideas_output, ideas_cite_news(idea_input["links"]),
+            "Failed to parse ideas output.", agent, runner=runner, ledger=ledger, policy=policy,
+            hedge_factory=lambda: create_idea_agent(policy.hedge_model_id)
+        )
+
+    return SHARED_FLIGHTS.do(flight_key("ideas", idea_input), ideas, stage="ideas")
+
+
+def run_topic(topic, cache=None, force_refresh=False, parallel_posts=False, runner=None, compact=False,
+              verify_links=False, similar_index=None, research_data=None, progress=None):
+    """
+    Run research and post generation for one topic without any UI.
+
+    Pass research_data to skip phase 1 (e.g. research chosen from a similar topic), and
+    progress(stage, fraction) to be told as each phase starts.
+    """
+    progress = progress or (lambda stage, fraction: None)
+    ledger = TokenLedger()
+    from_cache = research_data is not None
+    if research_data is None:
+        progress("research", 0.05)
+        research_data, from_cache = research_topic(
+            topic, cache=cache, force_refresh=force_refresh, runner=runner, ledger=ledger, similar_index=similar_index
+        )
+    if not isinstance(research_data, dict) or not research_data:
+        raise PipelineError("No valid research found.", json.dumps(research_data))
+    rejected_links = []
+    if verify_links:
+        progress("links", 0.45)
+        research_data, rejected_links = verify_source_links(research_data)
+    progress("posts", 0.55)
+    if parallel_posts:
+        posts, errors = generate_posts_parallel(research_data, runner=runner, compact=compact, ledger=ledger)
+    else:
+        posts, errors = generate_posts(research_data, runner=runner, compact=compact, ledger=ledger), {}
+    return {
+        "topic": topic,
+        "research": research_data,
+        "posts": posts,
+        "post_errors": errors,
+        "research_from_cache": from_cache,
+        "rejected_links": rejected_links,
+        "token_usage": ledger.rows(),
+        "recovery": recovery_counts(ledger.rows()),
+    }
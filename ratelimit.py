@@ -0,0 +1,105 @@
+import random
+import re
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to pace requests to the Groq API.
+    rate is tokens added per second; capacity is the largest burst allowed.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, requests_per_minute, burst=None):
+        return cls(requests_per_minute / 60.0, burst if burst is not None else max(1, requests_per_minute // 10))
+
+    def acquire(self, tokens=1.0):
+        """
+        Block until tokens are available, then take them.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_RATE_LIMIT_TEXT = re.compile(r"\b429\b|rate[ _]limit", re.IGNORECASE)
+
+
+def _status_code(exc):
+    # From the error itself, its HTTP response, or the error it wraps (agno re-raises Groq errors)
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        for value in (getattr(exc, "status_code", None), getattr(exc, "status", None),
+                      getattr(getattr(exc, "response", None), "status_code", None)):
+            if isinstance(value, int):
+                return value
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+def is_rate_limit_error(exc):
+    """
+    Detect HTTP 429 / rate-limit failures from the Groq client or agno's wrapped errors. A
+    status code on the error decides; the message is only matched when there is none.
+    """
+    status = _status_code(exc)
+    if status is not None:
+        return status == 429
+    return bool(_RATE_LIMIT_TEXT.search(str(exc)))
+
+
+def retry_after_seconds(exc):
+    """
+    Return the server's Retry-After hint in seconds, if the error carries one.
+    """
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitedRunner:
+    """
+    runner(agent, message) hook for pipeline stages: paces calls through a token bucket
+    and retries 429 responses with exponential back-off and jitter.
+    """
+
+    def __init__(self, bucket=None, max_retries=5, base_delay=2.0, max_delay=60.0):
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def __call__(self, agent, message):
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire()
+            try:
+                return agent.run(message)
+            except Exception as exc:
+                if not is_rate_limit_error(exc) or attempt >= self.max_retries:
+                    raise
+                delay = retry_after_seconds(exc)
+                if delay is None:
+                    delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                    delay += random.uniform(0, delay / 2)
+                time.sleep(delay)
+                attempt += 1
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ------------------ Configuration ------------------
+DEFAULT_CACHE_PATH = os.environ.get(
+    "HEARST_RESEARCH_CACHE", os.path.join(".cache", "research_cache.sqlite3")
+)
+DEFAULT_TTL_SECONDS = int(os.environ.get("HEARST_RESEARCH_CACHE_TTL", 24 * 60 * 60))
+DEFAULT_MAX_ENTRIES = int(os.environ.get("HEARST_RESEARCH_CACHE_MAX_ENTRIES", 500))
+DEFAULT_MAX_BYTES = int(os.environ.get("HEARST_RESEARCH_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_cache (
+    key TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS research_cache_last_accessed ON research_cache (last_accessed);
+"""
+
+
+# ------------------ Key Helpers ------------------
+def normalize_topic(topic: str) -> str:
+    """
+    Normalize a user-entered topic so trivially different spellings share a cache entry.
+    """
+    topic = (topic or "").strip().lower()
+    topic = re.sub(r"[\"'`“”‘’]", "", topic)
+    topic = re.sub(r"[\s\-_]+", " ", topic)
+    return topic.strip(" .,:;!?")
+
+
+def research_cache_key(topic: str, instructions) -> str:
+    """
+    Build the cache key from the normalized topic and the agent's instruction set,
+    so editing the research prompt automatically invalidates older entries.
+    """
+    payload = json.dumps(
+        {"topic": normalize_topic(topic), "instructions": list(instructions or [])},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ------------------ Cache ------------------
+class ResearchCache:
+    """
+    Disk-backed (SQLite) cache of parsed research_data dicts with TTL and LRU/size eviction.
+
+    The database file is shared by every Streamlit session and by any other process
+    pointing at the same path, so a topic researched once is served from disk afterwards.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per operation keeps the cache safe to use from
+        # Streamlit's script threads and from other processes at the same time.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, topic, instructions):
+        """
+        Return the cached research_data for topic, or None if missing or expired.
+        """
+        key = research_cache_key(topic, instructions)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT data, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            data, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE research_cache SET last_accessed = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return None
+
+    def get_by_key(self, key):
+        """
+        Return the cached research_data stored under key (see entries()), or None if missing or expired.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT data, created_at FROM research_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (self.ttl_seconds and time.time() - row[1] > self.ttl_seconds):
+            return None
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+
+    def entries(self, instructions=None):
+        """
+        Yield (key, normalized_topic, research_data) for every unexpired entry, limited to
+        entries made with instructions when given.
+        """
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, topic, data FROM research_cache WHERE created_at >= ?", (cutoff,)
+            ).fetchall()
+        for key, topic, data in rows:
+            if instructions is not None and key != research_cache_key(topic, instructions):
+                continue
+            try:
+                yield key, topic, json.loads(data)
+            except json.JSONDecodeError:
+                continue
+
+    def fingerprint(self):
+        """
+        Cheap value that changes whenever entries are added, replaced or removed.
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*), COALESCE(MAX(created_at), 0), COALESCE(SUM(size), 0) FROM research_cache"
+            ).fetchone()
+
+    def set(self, topic, instructions, research_data):
+        """
+        Store research_data for topic and evict expired or least recently used entries.
+        """
+        key = research_cache_key(topic, instructions)
+        data = json.dumps(research_data, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO research_cache (key, topic, data, size, created_at, last_accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, normalize_topic(topic), data, len(data.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def invalidate(self, topic, instructions):
+        key = research_cache_key(topic, instructions)
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM research_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM research_cache")
+
+    def stats(self):
+        """
+        Return entry count, total stored bytes and total hits.
+        """
+        with self._connect() as conn:
+            count, size, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM research_cache"
+            ).fetchone()
+        return {"entries": count, "bytes": size, "hits": hits}
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute(
+                "DELETE FROM research_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        # Walk entries from most to least recently used and drop everything past the limits.
+        rows = conn.execute(
+            "SELECT key, size FROM research_cache ORDER BY last_accessed DESC"
+        ).fetchall()
+        kept, kept_bytes, stale = 0, 0, []
+        for key, size in rows:
+            if (self.max_entries and kept >= self.max_entries) or \
+                    (self.max_bytes and kept_bytes + size > self.max_bytes and kept > 0):
+                stale.append((key,))
+                continue
+            kept += 1
+            kept_bytes += size
+        if stale:
+            conn.executemany("DELETE FROM research_cache WHERE key = ?", stale)
@@ -0,0 +1,233 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from agno.tools.duckduckgo import DuckDuckGoTools
+
+# ------------------ Configuration ------------------
+DEFAULT_TTL_SECONDS = 60 * 60
+DEFAULT_NEWS_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_REGION = "wt-wt"
+
+
+def _normalize_query(query):
+    return " ".join((query or "").lower().split())
+
+
+def _result_url(result):
+    # text() results carry "href", news() results carry "url"
+    return result.get("href") or result.get("url") or ""
+
+
+# ------------------ Backends ------------------
+class DuckDuckGoBackend:
+    """
+    Live DuckDuckGo backend built on duckduckgo_search.DDGS.
+    """
+
+    def __init__(self, headers=None, proxy=None, timeout=10, verify_ssl=True):
+        self.headers = headers
+        self.proxy = proxy
+        self.timeout = timeout
+        self.verify_ssl = verify_ssl
+
+    def search(self, mode, query, max_results, region=DEFAULT_REGION, timelimit=None):
+        from duckduckgo_search import DDGS
+
+        ddgs = DDGS(headers=self.headers, proxy=self.proxy, timeout=self.timeout, verify=self.verify_ssl)
+        if mode == "news":
+            return ddgs.news(keywords=query, region=region, timelimit=timelimit, max_results=max_results) or []
+        return ddgs.text(keywords=query, region=region, timelimit=timelimit, max_results=max_results) or []
+
+
+class FixtureSearchBackend:
+    """
+    Local stand-in for DuckDuckGo that replays results from a fixture, for tests and benchmarks.
+
+    The fixture is a dict (or a path to a JSON file) shaped like
+    {"text": {"<query>": [results...]}, "news": {"<query>": [results...]}};
+    unknown queries fall back to the "*" entry for that mode, or to no results.
+    """
+
+    def __init__(self, fixture, latency_seconds=0.0):
+        if isinstance(fixture, str):
+            with open(fixture, encoding="utf-8") as f:
+                fixture = json.load(f)
+        self.fixture = {
+            mode: {_normalize_query(q): results for q, results in (fixture.get(mode) or {}).items()}
+            for mode in ("text", "news")
+        }
+        self.latency_seconds = latency_seconds
+        self.calls = []
+
+    def search(self, mode, query, max_results, region=DEFAULT_REGION, timelimit=None):
+        self.calls.append((mode, query, region, timelimit))
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        results = self.fixture[mode]
+        found = results.get(_normalize_query(query), results.get("*", []))
+        return [dict(r) for r in found[:max_results]]
+
+
+# ------------------ Cache ------------------
+class SearchResultCache:
+    """
+    Thread-safe in-process TTL cache of search result lists, keyed on
+    (mode, query, region, time window, max results), with per-query hit/miss counters.
+
+    Expired entries are kept until evicted so they can be served if the live
+    search fails (e.g. when DuckDuckGo rate-limits us during busy periods).
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, news_ttl_seconds=DEFAULT_NEWS_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.news_ttl_seconds = news_ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    @staticmethod
+    def make_key(mode, query, region=DEFAULT_REGION, timelimit=None, max_results=5):
+        return (mode, _normalize_query(query), region or DEFAULT_REGION, timelimit or "", int(max_results))
+
+    def _ttl(self, mode):
+        return self.news_ttl_seconds if mode == "news" else self.ttl_seconds
+
+    def _count(self, key, field):
+        counters = self._counters.pop(key[1], None) or {"hits": 0, "misses": 0, "stale_hits": 0}
+        counters[field] += 1
+        self._counters[key[1]] = counters
+        while len(self._counters) > self.max_entries:
+            self._counters.popitem(last=False)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return cached results for key, calling fetch() on a miss or after expiry.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self._ttl(key[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count(key, "hits")
+                return entry[1]
+            self.misses += 1
+            self._count(key, "misses")
+        try:
+            results = fetch()
+        except Exception:
+            if entry is None:
+                raise
+            with self._lock:
+                self.stale_hits += 1
+                self._count(key, "stale_hits")
+            return entry[1]
+        with self._lock:
+            self._entries[key] = (time.time(), results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "queries": {query: dict(counters) for query, counters in self._counters.items()},
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every agent in the process so overlapping queries are only sent once
+SHARED_SEARCH_CACHE = SearchResultCache()
+
+
+# ------------------ Toolkit ------------------
+class CachedDuckDuckGoTools(DuckDuckGoTools):
+    """
+    Drop-in replacement for DuckDuckGoTools that serves results from a shared
+    SearchResultCache and drops URLs already returned earlier in the same run.
+    """
+
+    def __init__(self, search=True, news=True, cache=None, backend=None, region=DEFAULT_REGION,
+                 timelimit=None, news_timelimit=None, **kwargs):
+        super().__init__(search=search, news=news, **kwargs)
+        self.cache = cache if cache is not None else SHARED_SEARCH_CACHE
+        self.backend = backend or DuckDuckGoBackend(
+            headers=getattr(self, "headers", None),
+            proxy=getattr(self, "proxy", None),
+            timeout=getattr(self, "timeout", 10),
+            verify_ssl=getattr(self, "verify_ssl", True),
+        )
+        self.region = region
+        self.timelimit = timelimit
+        self.news_timelimit = news_timelimit
+        self._seen_urls = set()
+        self._seen_lock = threading.Lock()
+
+    def reset_seen(self):
+        """
+        Forget the URLs returned so far; call at the start of each agent run.
+        """
+        with self._seen_lock:
+            self._seen_urls.clear()
+
+    def _cached_search(self, mode, query, max_results):
+        max_results = getattr(self, "fixed_max_results", None) or max_results
+        modifier = getattr(self, "modifier", None)
+        search_query = f"{modifier} {query}" if modifier else query
+        timelimit = self.news_timelimit if mode == "news" else self.timelimit
+        key = self.cache.make_key(mode, search_query, self.region, timelimit, max_results)
+        results = self.cache.get_or_fetch(
+            key, lambda: self.backend.search(mode, search_query, max_results, self.region, timelimit)
+        )
+
+        unique = []
+        with self._seen_lock:
+            for result in results:
+                url = _result_url(result)
+                if url and url in self._seen_urls:
+                    continue
+                if url:
+                    self._seen_urls.add(url)
+                unique.append(result)
+        return json.dumps(unique, indent=2)
+
+    def duckduckgo_search(self, query: str, max_results: int = 5) -> str:
+        """Use this function to search DuckDuckGo for a query.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The result from DuckDuckGo.
+        """
+        return self._cached_search("text", query, max_results)
+
+    def duckduckgo_news(self, query: str, max_results: int = 5) -> str:
+        """Use this function to get the latest news from DuckDuckGo.
+
+        Args:
+            query(str): The query to search for.
+            max_results (optional, default=5): The maximum number of results to return.
+
+        Returns:
+            The latest news from DuckDuckGo.
+        """
+        return self._cached_search("news", query, max_results)
+
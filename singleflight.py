@@ -0,0 +1,76 @@
+"""
+Single-flight coalescing of identical in-flight pipeline calls.
+
+When several sessions (or job workers) ask for the same research, news, posts or ideas at
+the same time, only the first call runs the agent; the others wait for it and receive a
+copy of its result, or its exception. Nothing is kept once the call finishes, so this only
+merges requests that overlap; finished results are reused through the caches instead.
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future
+
+from metrics import METRICS
+
+# ------------------ Configuration ------------------
+SINGLE_FLIGHT_ENABLED = os.environ.get("HEARST_SINGLE_FLIGHT", "on").lower() != "off"
+
+
+def flight_key(*parts):
+    """
+    Stable key for a call from its stage name and JSON-serializable inputs.
+    """
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class SingleFlight:
+    """
+    Thread-safe registry of in-flight calls keyed by flight_key().
+    """
+
+    def __init__(self, enabled=SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, stage=None):
+        """
+        Return fn(), or the result of the identical call already running under key.
+        """
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            METRICS.incr("single_flight", stage=stage, result="coalesced")
+            # Each waiter gets its own copy, so callers can modify their result safely
+            return copy.deepcopy(future.result())
+
+        METRICS.incr("single_flight", stage=stage, result="leader")
+        try:
+            result = fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            # Waiters copy a snapshot, not the object the leader goes on to use
+            future.set_result(copy.deepcopy(result))
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+SHARED_FLIGHTS = SingleFlight()
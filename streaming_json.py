@@ -0,0 +1,89 @@
+import json
+
+
+class StreamingJSONObjectParser:
+    """
+    Incrementally parse a JSON object that arrives in chunks (e.g. streamed LLM tokens)
+    and report each top-level field as soon as its value is complete.
+
+    Text before the opening brace, such as a ```json fence, is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields = {}
+        self.complete = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk):
+        """
+        Add a chunk of text and return a list of (key, value) pairs completed by it.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.complete:
+                break
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if self._depth == 0:
+                # Still looking for the opening brace of the top-level object
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "]}":
+                if self._depth == 1 and ch == "}":
+                    completed.extend(self._close_member(text[self._member_start:i]))
+                    self.complete = True
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                completed.extend(self._close_member(text[self._member_start:i]))
+                self._member_start = i + 1
+        self._pos = len(text)
+        return completed
+
+    def _close_member(self, member):
+        if not member.strip():
+            return []
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return []
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+
+def stream_json_object(stream, on_field=None):
+    """
+    Consume a stream of text chunks or agno RunResponse deltas, calling on_field(key, value)
+    for every completed top-level field.
+
+    Returns (parsed_object_or_None, full_text) so callers can fall back to the
+    non-streaming extraction helpers when the model did not produce a clean object.
+    """
+    parser = StreamingJSONObjectParser()
+    for chunk in stream:
+        content = chunk if isinstance(chunk, str) else getattr(chunk, "content", None)
+        if not isinstance(content, str) or not content:
+            continue
+        for key, value in parser.feed(content):
+            if on_field:
+                on_field(key, value)
+    return (parser.fields if parser.complete else None), parser.text
@@ -0,0 +1,6 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep test spans and counters out of the production metrics log
+os.environ.setdefault("HEARST_METRICS_LOG", "")
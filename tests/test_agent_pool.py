@@ -0,0 +1,105 @@
+import json
+import threading
+from concurrent.futures import Future
+
+import pipeline
+from agent_pool import AgentPool, agent_history_size
+
+
+class Memory:
+    def __init__(self):
+        self.runs = []
+
+    def clear(self):
+        self.runs = []
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.metrics = {}
+
+
+class Agent:
+    def __init__(self, delay=None):
+        self.memory = Memory()
+        self.run_response = None
+        self.release = delay
+
+    def run(self, message):
+        if self.release is not None:
+            self.release.wait(5)
+        self.memory.runs.append(message)
+        self.run_response = Response(json.dumps({"summary": message, "links": ["https://example.com/a"]}))
+        return self.run_response
+
+
+def test_lease_reuses_and_clears_history():
+    pool = AgentPool({"research": Agent}, max_idle=2)
+    with pool.lease("research") as first:
+        first.run("a")
+        assert agent_history_size(first) == 1
+    with pool.lease("research") as second:
+        assert second is first
+        assert agent_history_size(second) == 0
+    assert pool.stats()["created"] == 1 and pool.stats()["reused"] == 1
+
+
+def test_concurrent_leases_never_share_an_agent():
+    pool = AgentPool({"research": Agent}, max_idle=2)
+    with pool.lease("research") as first, pool.lease("research") as second:
+        assert first is not second
+
+
+def test_agent_retired_after_max_uses():
+    pool = AgentPool({"research": Agent}, max_uses=2)
+    with pool.lease("research") as first:
+        pass
+    with pool.lease("research"):
+        pass
+    with pool.lease("research") as third:
+        assert third is not first
+    assert pool.stats()["retired"] == 1
+
+
+def test_held_agent_returns_only_when_its_run_finishes():
+    pool = AgentPool({"research": Agent})
+    running = Future()
+    with pool.lease("research") as agent:
+        pool.hold_until_done(agent, running)
+    # Still counted as leased: its run has not finished
+    assert (pool.stats()["idle"], pool.stats()["leased"]) == (0, 1)
+    with pool.lease("research") as other:
+        assert other is not agent
+    running.set_result(None)
+    assert pool.stats()["idle"] == 2
+
+
+def test_hold_ignores_agents_not_leased_from_the_pool():
+    pool = AgentPool({"research": Agent})
+    pool.hold_until_done(Agent(), Future())
+    with pool.lease("research"):
+        pass
+    assert pool.stats()["idle"] == 1
+
+
+def test_losing_hedged_primary_keeps_its_agent_out_of_the_pool(monkeypatch):
+    gate = threading.Event()
+    pool = AgentPool({"research": lambda: Agent(delay=gate)})
+    monkeypatch.setattr(pipeline, "AGENT_POOL", pool)
+    policy = pipeline.RetryPolicy(retries=0, hedge_after={"research": 0.01})
+    with pool.lease("research") as primary:
+        value = pipeline.run_structured(
+            primary, "topic", pipeline.object_parser("research"), "research", "failed",
+            policy=policy, hedge_factory=Agent
+        )
+    assert value["summary"] == "topic"
+    # The primary is still blocked on gate, so it must not be handed out again
+    with pool.lease("research") as next_agent:
+        assert next_agent is not primary
+    gate.set()
+    for _ in range(100):
+        if pool.stats()["idle"] == 2:
+            break
+        threading.Event().wait(0.01)
+    assert pool.stats()["idle"] == 2
@@ -0,0 +1,38 @@
+import json
+
+import batch
+
+
+def fake_run_topic(post_errors):
+    def run_topic(topic, **kwargs):
+        return {
+            "topic": topic,
+            "research": {"summary": "Summary", "links": ["https://example.com/a"]},
+            "posts": {"linkedin": "Post", "linkedin_reference": "https://example.com/a"},
+            "post_errors": post_errors,
+        }
+    return run_topic
+
+
+def test_partial_posts_are_not_marked_ok(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "run_topic", fake_run_topic({"instagram": "Failed to parse post output."}))
+    record = batch.process_topic("Hashrate in Texas", str(tmp_path), None, None, parallel_posts=True)
+    assert record["status"] == "partial"
+
+
+def test_resume_retries_partial_topics(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "run_topic", fake_run_topic({"instagram": "Failed"}))
+    counts = batch.run_batch(["Hashrate in Texas", "Stranded gas"], str(tmp_path), requests_per_minute=0,
+                             use_cache=False, parallel_posts=True, log=lambda message: None)
+    assert counts == {"ok": 0, "partial": 2, "error": 0}
+    assert batch.load_completed(str(tmp_path)) == set()
+
+    monkeypatch.setattr(batch, "run_topic", fake_run_topic({}))
+    counts = batch.run_batch(["Hashrate in Texas", "Stranded gas"], str(tmp_path), requests_per_minute=0,
+                             use_cache=False, parallel_posts=True, log=lambda message: None)
+    assert counts == {"ok": 2, "partial": 0, "error": 0}
+    assert len(batch.load_completed(str(tmp_path))) == 2
+
+    with open(tmp_path / batch.RESULTS_FILE, encoding="utf-8") as f:
+        statuses = [json.loads(line)["status"] for line in f]
+    assert statuses == ["partial", "partial", "ok", "ok"]
@@ -0,0 +1,63 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pipeline
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.metrics = {}
+
+
+class Agent:
+    def __init__(self, seconds, content='{"summary": "ok"}'):
+        self.seconds = seconds
+        self.content = content
+
+    def run(self, message):
+        time.sleep(self.seconds)
+        return Response(self.content)
+
+
+def run(agent, hedges, threshold):
+    policy = pipeline.RetryPolicy(retries=0, hedge_after={"research": threshold})
+
+    def hedge_factory():
+        hedges.append(1)
+        return Agent(0, '{"summary": "hedge"}')
+
+    return pipeline.run_hedged(agent, "topic", pipeline.object_parser("research"), "research",
+                               policy=policy, hedge_factory=hedge_factory)
+
+
+def test_busy_hedge_pool_does_not_delay_the_primary(monkeypatch):
+    busy = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    busy.submit(release.wait, 5)
+    monkeypatch.setattr(pipeline, "_HEDGE_POOL", busy)
+    hedges = []
+    try:
+        _, value = run(Agent(0.05), hedges, threshold=0.5)
+    finally:
+        release.set()
+        busy.shutdown()
+    assert value == {"summary": "ok"} and hedges == []
+
+
+def test_slow_primary_is_hedged():
+    hedges = []
+    _, value = run(Agent(1), hedges, threshold=0.05)
+    assert value == {"summary": "hedge"} and hedges == [1]
+
+
+def test_primary_error_falls_back_to_hedge():
+    class Failing(Agent):
+        def run(self, message):
+            time.sleep(self.seconds)
+            raise RuntimeError("boom")
+
+    hedges = []
+    _, value = run(Failing(0.2), hedges, threshold=0.05)
+    assert value == {"summary": "hedge"}
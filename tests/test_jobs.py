@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobStore, JobWorker, history_recorder
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), stale_seconds=60)
+
+
+def make_stale(store, job_id, seconds=120):
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time() - seconds, job_id))
+
+
+def test_claim_runs_oldest_job_once(store):
+    first = store.submit("posts", {"topic": "a"})
+    second = store.submit("ideas", {})
+    assert store.claim("w1")["id"] == first
+    assert store.claim("w2")["id"] == second
+    assert store.claim("w3") is None
+    assert store.counts()["running"] == 2
+
+
+def test_complete_and_fail_only_apply_to_the_claiming_worker(store):
+    job_id = store.submit("posts", {"topic": "a"})
+    store.claim("w1")
+    assert not store.complete(job_id, "w2", {"posts": {}})
+    assert not store.fail(job_id, "w2", "boom")
+    assert store.get(job_id)["status"] == "running"
+
+    assert store.complete(job_id, "w1", {"posts": {"x": 1}})
+    assert not store.fail(job_id, "w1", "late failure")
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["result"] == {"posts": {"x": 1}} and job["error"] is None
+
+
+def test_stale_worker_cannot_overwrite_the_new_attempt(store):
+    job_id = store.submit("posts", {"topic": "a"})
+    store.claim("w1")
+    make_stale(store, job_id)
+    assert store.claim("w2")["id"] == job_id
+
+    assert not store.progress(job_id, "w1", "posts", 0.5)
+    assert not store.heartbeat(job_id, "w1")
+    assert not store.complete(job_id, "w1", {"stale": True})
+    assert store.complete(job_id, "w2", {"fresh": True})
+    assert store.get(job_id)["result"] == {"fresh": True}
+
+
+def test_heartbeat_keeps_job_from_going_stale(store):
+    job_id = store.submit("posts", {"topic": "a"})
+    store.claim("w1")
+    make_stale(store, job_id)
+    assert store.heartbeat(job_id, "w1")
+    assert store.claim("w2") is None
+    assert store.get(job_id)["worker"] == "w1"
+
+
+def test_worker_heartbeats_during_a_long_stage(store):
+    job_id = store.submit("ideas", {})
+    released = threading.Event()
+    beats = []
+
+    def handler(params, progress):
+        # No progress calls: only the heartbeat can keep the job fresh
+        make_stale(store, job_id)
+        deadline = time.time() + 5
+        while time.time() < deadline and not beats:
+            if store.get(job_id)["updated_at"] > time.time() - 60:
+                beats.append(True)
+            time.sleep(0.01)
+        released.set()
+        return {"ideas": []}
+
+    worker = JobWorker(store, {"ideas": handler}, name="w1", heartbeat_seconds=0.05)
+    worker.run_job(store.claim("w1"))
+    assert released.is_set() and beats
+    assert store.get(job_id)["status"] == "done"
+
+
+def test_worker_drops_result_of_superseded_job(store):
+    job_id = store.submit("posts", {"topic": "a"})
+
+    def handler(params, progress):
+        make_stale(store, job_id)
+        store.claim("w2")
+        return {"stale": True}
+
+    JobWorker(store, {"posts": handler}, name="w1", heartbeat_seconds=60).run_job(store.claim("w1"))
+    job = store.get(job_id)
+    assert job["status"] == "running" and job["worker"] == "w2" and job["result"] is None
+
+
+def test_history_is_saved_only_for_the_accepted_attempt(store):
+    job_id = store.submit("ideas", {})
+    saved = []
+
+    def stale_handler(params, progress):
+        make_stale(store, job_id)
+        store.claim("w2")
+        return {"news": {}, "ideas": ["stale"]}
+
+    JobWorker(store, {"ideas": stale_handler}, name="w1", heartbeat_seconds=60,
+              on_complete=lambda job, result: saved.append(result["ideas"])).run_job(store.claim("w1"))
+    assert saved == []
+
+    JobWorker(store, {"ideas": lambda params, progress: {"news": {}, "ideas": ["fresh"]}}, name="w2",
+              heartbeat_seconds=60, on_complete=lambda job, result: saved.append(result["ideas"])).run_job(
+        dict(store.get(job_id), worker="w2"))
+    assert saved == [["fresh"]]
+    assert store.get(job_id)["status"] == "done"
+
+
+def test_history_recorder_skips_runs_without_posts():
+    class History:
+        def __init__(self):
+            self.rows = []
+
+        def add_posts_run(self, topic, research, posts):
+            self.rows.append(("posts", topic))
+
+        def add_ideas_run(self, news, ideas):
+            self.rows.append(("ideas", len(ideas)))
+
+    history = History()
+    record = history_recorder(history)
+    record({"kind": "posts", "params": {"topic": "t"}}, {"research": {}, "posts": {}})
+    record({"kind": "posts", "params": {"topic": "t"}}, {"research": {}, "posts": {"x": "post"}})
+    record({"kind": "ideas", "params": {}}, {"news": {}, "ideas": [1, 2]})
+    assert history.rows == [("posts", "t"), ("ideas", 2)]
@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+import pytest
+
+from link_check import LinkVerifier, VerdictCache
+from parsing import is_valid_article_link
+
+ARTICLES = [
+    "https://cointelegraph.com/news/bitcoin-mining-2024-trends",
+    "https://coindesk.com/2024/05/bitcoin-mining-sustainability",
+    "https://www.theblock.co/post/301234/bitcoin-miners-ai-hosting",
+    "https://www.reuters.com/technology/bitcoin-miners-pivot-ai-2024-06-01/",
+    "https://bitcoinmagazine.com/business/bitcoin-mining-in-texas",
+    "https://www.prnewswire.com/news-releases/hearst-expands-hosting-302112233.html",
+    "https://arxiv.org/abs/2401.01234",
+    "https://example.com/?p=123",
+]
+
+LISTINGS = [
+    "https://cointelegraph.com/",
+    "https://cointelegraph.com/news",
+    "https://www.coindesk.com/tag/mining/",
+    "https://cointelegraph.com/tags/bitcoin-mining",
+    "https://www.theblock.co/category/mining",
+    "https://example.com/search?q=bitcoin",
+]
+
+
+@pytest.mark.parametrize("url", ARTICLES)
+def test_article_urls_pass_the_heuristic(url):
+    assert is_valid_article_link(url)
+
+
+@pytest.mark.parametrize("url", LISTINGS)
+def test_index_pages_fail_the_heuristic(url):
+    assert not is_valid_article_link(url)
+
+
+def verify(urls, handler):
+    verifier = LinkVerifier(cache=VerdictCache(), transport=httpx.MockTransport(handler))
+    return {result["url"]: result for result in asyncio.run(verifier.averify(urls))}
+
+
+def test_reachable_articles_are_kept():
+    results = verify(ARTICLES[:5], lambda request: httpx.Response(200))
+    assert {result["status"] for result in results.values()} == {"ok"}
+
+
+def test_verdicts():
+    ok, missing, moved, refused = (
+        "https://cointelegraph.com/news/ok-story",
+        "https://cointelegraph.com/news/missing-story",
+        "https://cointelegraph.com/news/moved-story",
+        "https://www.reuters.com/technology/refused-story-2024-06-01/",
+    )
+
+    def handler(request):
+        url = str(request.url)
+        if url == missing:
+            return httpx.Response(404)
+        if url == moved:
+            return httpx.Response(301, headers={"location": "https://cointelegraph.com/"})
+        if url == refused and request.method == "HEAD":
+            return httpx.Response(405)
+        return httpx.Response(200)
+
+    results = verify([ok, missing, moved, refused, LISTINGS[1]], handler)
+    assert results[ok]["status"] == "ok"
+    assert results[missing]["status"] == "bad"
+    assert results[moved]["status"] == "bad"
+    # HEAD refused, then a GET succeeded
+    assert results[refused]["status"] == "ok"
+    assert results[LISTINGS[1]]["status"] == "bad"
+
+
+def test_timeouts_are_kept_as_unknown():
+    def handler(request):
+        raise httpx.ReadTimeout("slow", request=request)
+
+    assert verify(ARTICLES[:1], handler)[ARTICLES[0]]["status"] == "unknown"
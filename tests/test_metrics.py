@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+from metrics import MetricsRegistry, load_log, log_files, percentile, process_log_path, prune_logs
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_each_process_writes_its_own_file(tmp_path):
+    log = str(tmp_path / "metrics.jsonl")
+    registry = MetricsRegistry(log, flush_seconds=0)
+    registry.observe("research", 0.5)
+    assert os.path.exists(process_log_path(log))
+    assert not os.path.exists(log)
+
+
+def test_counters_are_summed_until_flush(tmp_path):
+    log = str(tmp_path / "metrics.jsonl")
+    registry = MetricsRegistry(log, flush_seconds=3600)
+    for _ in range(100):
+        registry.incr("tokens", 10, phase="posts", direction="input")
+    registry.incr("tokens", 5, phase="posts", direction="output")
+    assert not os.path.exists(process_log_path(log))
+
+    registry.flush()
+    events = read_events(process_log_path(log))
+    assert sorted((e["direction"], e["value"]) for e in events) == [("input", 1000), ("output", 5)]
+    assert registry.counters()[0]["value"] == 1000
+
+    registry.flush()
+    assert len(read_events(process_log_path(log))) == 2
+
+
+def test_load_log_merges_processes(tmp_path):
+    log = str(tmp_path / "metrics.jsonl")
+    app, worker = process_log_path(log, 100), process_log_path(log, 200)
+    with open(app, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "span", "phase": "research", "seconds": 1.0, "status": "ok", "ts": 1}) + "\n")
+        f.write(json.dumps({"type": "counter", "name": "runs", "value": 2, "ts": 1}) + "\n")
+        f.write(json.dumps({"type": "gauge", "name": "rss_mb", "value": 300, "ts": 5}) + "\n")
+    with open(worker + ".1", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"type": "span", "phase": "research", "seconds": 3.0, "status": "error", "ts": 2}) + "\n")
+        f.write(json.dumps({"type": "counter", "name": "runs", "value": 3, "ts": 2}) + "\n")
+        f.write(json.dumps({"type": "gauge", "name": "rss_mb", "value": 200, "ts": 3}) + "\n")
+
+    phases, counts, sums, errors, counters, gauges = load_log(log)
+    assert sorted(phases["research"]) == [1.0, 3.0]
+    assert counts["research"] == 2 and errors["research"] == 1
+    assert counters[("runs", ())] == 5
+    assert gauges[("rss_mb", ())] == 300
+
+
+def test_prune_keeps_live_and_recent_files(tmp_path):
+    log = str(tmp_path / "metrics.jsonl")
+    dead_pid = 2 ** 22 + 12345
+    stale, recent, live = process_log_path(log, dead_pid), process_log_path(log, dead_pid + 1), process_log_path(log, 1)
+    for path in (stale, recent, live):
+        open(path, "w").close()
+    os.utime(stale, (0, 0))
+    os.utime(live, (0, 0))
+    prune_logs(log, retention_days=1)
+    assert log_files(log) == sorted([recent, live])
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_writes_its_own_file(tmp_path):
+    log = str(tmp_path / "metrics.jsonl")
+    registry = MetricsRegistry(log, flush_seconds=0)
+    registry.observe("parent", 0.1)
+    pid = os.fork()
+    if pid == 0:
+        registry.observe("child", 0.1)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert [e["phase"] for e in read_events(process_log_path(log))] == ["parent"]
+    assert [e["phase"] for e in read_events(process_log_path(log, pid))] == ["child"]
+
+
+@pytest.mark.parametrize("values, q, expected", [
+    (range(1, 11), 50, 5),
+    (range(1, 21), 95, 19),
+    (range(1, 101), 95, 95),
+    (range(1, 101), 50, 50),
+    ([1, 2], 50, 1),
+    ([3, 1, 2], 50, 2),
+    ([7], 95, 7),
+    (range(1, 11), 0, 1),
+    (range(1, 11), 100, 10),
+])
+def test_percentile_is_nearest_rank(values, q, expected):
+    assert percentile(list(values), q) == expected
+
+
+def test_percentile_of_nothing_is_none():
+    assert percentile([], 50) is None
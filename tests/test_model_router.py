@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+import model_router
+import pipeline
+from agent_pool import AgentPool
+from model_router import ModelRouter, parse_stage_models
+
+LARGE = "large-model"
+SMALL = "small-model"
+
+
+def test_routing_is_off_by_default():
+    assert model_router.parse_stage_models("") == {}
+    assert ModelRouter(LARGE, stage_models={}).choose("posts") == LARGE
+
+
+def test_parse_stage_models():
+    assert parse_stage_models(" posts = tiny , ideas=other,, ") == {"posts": "tiny", "ideas": "other"}
+    assert parse_stage_models("posts") == {"posts": model_router.SMALL_MODEL_ID}
+
+
+def test_prefix_match_and_large_model_is_not_small():
+    router = ModelRouter(LARGE, stage_models={"posts": SMALL, "ideas": LARGE})
+    assert router.choose("posts:linkedin") == SMALL
+    assert router.choose("ideas") == LARGE
+    assert router.choose("research") == LARGE
+
+
+def test_low_success_rate_demotes_and_probes():
+    router = ModelRouter(LARGE, stage_models={"posts": SMALL}, min_samples=5, probe_every=3)
+    for _ in range(5):
+        router.record("posts", SMALL, 0.1, False)
+    choices = [router.choose("posts") for _ in range(6)]
+    assert choices == [LARGE, LARGE, SMALL, LARGE, LARGE, SMALL]
+
+
+def test_slow_small_model_is_demoted_on_latency():
+    router = ModelRouter(LARGE, stage_models={"posts": SMALL}, min_samples=5, probe_every=100)
+    for _ in range(5):
+        router.record("posts", SMALL, 2.0, True)
+        router.record("posts", LARGE, 1.0, True)
+    assert router.choose("posts") == LARGE
+
+
+def test_fast_reliable_small_model_stays():
+    router = ModelRouter(LARGE, stage_models={"posts": SMALL}, min_samples=5)
+    for _ in range(5):
+        router.record("posts", SMALL, 0.2, True)
+        router.record("posts", LARGE, 1.0, True)
+    assert router.choose("posts") == SMALL
+    assert {row["model"]: row["calls"] for row in router.summary()} == {SMALL: 5, LARGE: 5}
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+        self.metrics = {}
+
+
+class Agent:
+    def __init__(self, model_id, outputs, calls):
+        self.model_id = model_id
+        self.outputs = outputs
+        self.calls = calls
+        self.run_response = None
+
+    def run(self, message):
+        self.calls.append(self.model_id)
+        self.run_response = Response(self.outputs[self.model_id])
+        return self.run_response
+
+
+@pytest.fixture
+def routed(monkeypatch):
+    calls = []
+    outputs = {}
+    pool = AgentPool({"ideas": lambda model_id=pipeline.GROQ_MODEL_ID: Agent(model_id, outputs, calls)})
+    router = ModelRouter(pipeline.GROQ_MODEL_ID, stage_models={"ideas": SMALL})
+    monkeypatch.setattr(pipeline, "AGENT_POOL", pool)
+    monkeypatch.setattr(pipeline, "MODEL_ROUTER", router)
+    return outputs, calls, router
+
+
+def run_ideas(links):
+    return pipeline.run_routed(
+        "ideas", "ideas", "news", pipeline.parse_ideas_output, pipeline.ideas_cite_news(links),
+        "failed", policy=pipeline.RetryPolicy(retries=0),
+    )
+
+
+def ideas(link, count=pipeline.IDEA_COUNT):
+    return json.dumps([{"topic": f"t{i}", "summary": "s", "links": [link]} for i in range(count)])
+
+
+def test_small_model_output_that_passes_checks_is_used(routed):
+    outputs, calls, router = routed
+    outputs[SMALL] = ideas("https://news.example/a")
+    value = run_ideas(["https://news.example/a"])
+    assert len(value) == pipeline.IDEA_COUNT and calls == [SMALL]
+
+
+def test_small_model_citing_unknown_links_falls_back(routed):
+    outputs, calls, router = routed
+    outputs[SMALL] = ideas("https://made-up.example/x")
+    outputs[pipeline.GROQ_MODEL_ID] = ideas("https://news.example/a")
+    value = run_ideas(["https://news.example/a"])
+    assert value[0]["links"] == ["https://news.example/a"]
+    assert calls == [SMALL, pipeline.GROQ_MODEL_ID]
+    assert {(row["model"], row["success_rate"]) for row in router.summary()} == {
+        (SMALL, 0.0), (pipeline.GROQ_MODEL_ID, 1.0)
+    }
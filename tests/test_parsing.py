@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from parsing import (
+    extract_json_from_text,
+    extract_json_objects,
+    extract_json_values,
+    parse_ideas_from_text,
+    parse_research,
+    research_from_text,
+    tokenize_sections,
+)
+
+RESEARCH_MARKDOWN = """Here is the research on Texas bitcoin mining:
+
+### Texas miners expand demand-response programs
+Source: https://www.reuters.com/technology/texas-miners-2024-06-01/
+Date: June 1, 2024
+Bitcoin hashrate rose 12% in May; Texas miners curtailed 3.2 GW during the heat wave.
+Summary: Miners in Texas expanded capacity while earning demand-response credits from ERCOT.
+
+### Immersion cooling adoption
+Source: https://www.coindesk.com/business/2024/05/20/immersion-cooling-miners
+Date: May 20, 2024
+Key Statistics:
+- 40% lower cooling energy than air-cooled sites
+- 25% longer ASIC lifetime
+Summary: Immersion cooling is moving from pilots to production at large sites.
+It also lets operators overclock safely.
+"""
+
+IDEAS_MARKDOWN = """Here are the content ideas:
+
+1. **Grid Partners, Not Grid Problems**
+**Topic:** Bitcoin miners as flexible load
+**Summary:** Miners curtailed 3.2 GW in Texas during the heat wave.
+**Useful Links:**
+- [Reuters](https://www.reuters.com/technology/texas-miners-2024-06-01/)
+**Description:** Explain demand response and how miners are paid for it.
+**Suggested Post Angle:** "Every curtailed megawatt keeps the lights on."
+
+2. **Cooler Machines, Longer Lives**
+**Topic:** Immersion cooling economics
+**Summary:** Immersion cooling cuts cooling energy by 40%.
+- https://www.coindesk.com/business/2024/05/20/immersion-cooling-miners
+**Description:** Walk through the capex and the payback period.
+"""
+
+
+def test_stats_paragraph_after_source_and_date_is_kept():
+    first, second = parse_research(RESEARCH_MARKDOWN)[1:]
+    assert first["title"] == "Texas miners expand demand-response programs"
+    assert first["url"] == "https://www.reuters.com/technology/texas-miners-2024-06-01/"
+    assert first["date"] == "June 1, 2024"
+    assert first["stats"] == ["12% in May", "3.2 GW during the heat wave"]
+    assert first["summary"].startswith("Miners in Texas")
+    assert second["stats"] == ["40% lower cooling energy than air-cooled sites", "25% longer ASIC lifetime"]
+    assert second["summary"].endswith("overclock safely.")
+
+
+def test_research_from_text():
+    research = research_from_text(RESEARCH_MARKDOWN)
+    assert "12% in May" in research["stats"]
+    assert research["links"] == [
+        "https://www.reuters.com/technology/texas-miners-2024-06-01/",
+        "https://www.coindesk.com/business/2024/05/20/immersion-cooling-miners",
+    ]
+    assert "ERCOT" in research["summary"] and "Immersion" in research["summary"]
+
+
+def test_research_from_text_leaves_broken_json_to_the_repair():
+    assert research_from_text('{"summary": "Bitcoin mining is') is None
+
+
+def test_single_line_fields_do_not_swallow_following_lines():
+    section = tokenize_sections("### A\nDate: 2024\nHashrate rose 12%.\nSummary: one\ntwo")[0]
+    assert section["fields"] == {"date": "2024", "summary": "one\ntwo"}
+    assert section["body"] == ["Hashrate rose 12%."]
+
+
+def test_parse_ideas_from_text():
+    ideas = parse_ideas_from_text(IDEAS_MARKDOWN)
+    assert [idea["topic"] for idea in ideas] == ["Bitcoin miners as flexible load", "Immersion cooling economics"]
+    assert ideas[0]["links"] == ["https://www.reuters.com/technology/texas-miners-2024-06-01/"]
+    assert ideas[0]["suggested_post_angle"] == "Every curtailed megawatt keeps the lights on."
+    assert ideas[1]["links"] == ["https://www.coindesk.com/business/2024/05/20/immersion-cooling-miners"]
+    assert ideas[1]["description"] == "Walk through the capex and the payback period."
+
+
+def test_extracts_json_around_prose_and_fences():
+    text = 'Here you go:\n```json\n{"summary": "Hashrate rose {sharply}", "links": ["https://a.com/x"]}\n```\nMore {details}.'
+    assert extract_json_from_text(text) == {"summary": "Hashrate rose {sharply}", "links": ["https://a.com/x"]}
+
+
+def test_repairs_common_llm_defects():
+    assert extract_json_from_text('{"a": [1, 2,], }') == {"a": [1, 2]}
+    assert extract_json_from_text("{'a': 'b c', 'd': True}") == {"a": "b c", "d": True}
+    assert extract_json_from_text('{“a”: “b”}') == {"a": "b"}
+
+
+def test_repairs_truncated_output():
+    assert extract_json_from_text('{"summary": "Bitcoin mining is') == {"summary": "Bitcoin mining is"}
+    assert extract_json_values('[{"a": 1}, {"b": "tru') == [[{"a": 1}, {"b": "tru"}]]
+
+
+@pytest.mark.parametrize("size", [2_000, 25_000, 50_000, 100_000, 200_000])
+def test_stray_quote_in_prose_does_not_hide_later_json(size):
+    chunk = 'Miners [1] expanded {see note, tags ["hosting", capacity] and said "we are growing '
+    text = chunk * (size // len(chunk)) + '{"a": 1}'
+    assert extract_json_values(text)[-1] == {"a": 1}
+    assert extract_json_from_text(text) == {"a": 1}
+
+
+def test_unmatched_braces_stay_linear():
+    text = "{ not json { still not } " * 4000 + '{"ok": true}'
+    started = time.perf_counter()
+    assert extract_json_objects(text) == [{"ok": True}]
+    assert time.perf_counter() - started < 0.5
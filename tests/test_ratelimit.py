@@ -0,0 +1,65 @@
+import pytest
+
+from ratelimit import RateLimitedRunner, is_rate_limit_error
+
+
+class StatusError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {"retry-after": "0"}
+
+
+class ResponseError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.response = Response(status_code)
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (StatusError("Too many requests", 429), True),
+    (ResponseError("Error code: 429", 429), True),
+    # The status code decides, whatever the message says
+    (StatusError("context has 4290 tokens; rate limit docs: ...", 400), False),
+    (ResponseError("request 429 failed", 500), False),
+    # Without a status code the message is the only hint
+    (RuntimeError("Rate limit reached for model"), True),
+    (RuntimeError("rate_limit_exceeded"), True),
+    (RuntimeError("Error code: 429 - too many requests"), True),
+    (RuntimeError("prompt is 14290 tokens long"), False),
+])
+def test_is_rate_limit_error(exc, expected):
+    assert is_rate_limit_error(exc) is expected
+
+
+def test_wrapped_status_code_is_found():
+    try:
+        try:
+            raise StatusError("Too many requests", 429)
+        except StatusError as inner:
+            raise RuntimeError("Model provider error") from inner
+    except RuntimeError as outer:
+        assert is_rate_limit_error(outer)
+
+
+def test_runner_retries_only_rate_limits():
+    calls = []
+
+    class Agent:
+        def run(self, message):
+            calls.append(message)
+            if len(calls) == 1:
+                raise ResponseError("slow down", 429)
+            if len(calls) == 2:
+                raise StatusError("bad request mentioning 429", 400)
+            return "ok"
+
+    runner = RateLimitedRunner(max_retries=3, base_delay=0)
+    with pytest.raises(StatusError):
+        runner(Agent(), "m")
+    assert len(calls) == 2
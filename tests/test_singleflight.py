@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from metrics import METRICS
+from singleflight import SingleFlight, flight_key
+
+
+def coalesced(stage):
+    return sum(row["value"] for row in METRICS.counters()
+               if row["name"] == "single_flight" and row.get("stage") == stage and row.get("result") == "coalesced")
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def run_concurrently(flights, stage, fn, callers=4):
+    release = threading.Event()
+    calls = []
+
+    def leader_fn():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    before = coalesced(stage)
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(flights.do, "key", leader_fn, stage) for _ in range(callers)]
+        # Only release the leader once every other caller is waiting on it
+        wait_for(lambda: coalesced(stage) - before == callers - 1)
+        release.set()
+    return calls, futures
+
+
+def test_concurrent_identical_calls_run_once():
+    flights = SingleFlight(enabled=True)
+    calls, futures = run_concurrently(flights, "sf_once", lambda: {"posts": ["a"]})
+    results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert all(result == {"posts": ["a"]} for result in results)
+    # Every caller owns its result
+    assert len({id(result) for result in results}) == len(results)
+    assert flights.in_flight() == 0
+
+
+def test_leader_exception_reaches_every_caller():
+    flights = SingleFlight(enabled=True)
+
+    def boom():
+        raise ValueError("agent failed")
+
+    calls, futures = run_concurrently(flights, "sf_error", boom)
+    for future in futures:
+        with pytest.raises(ValueError, match="agent failed"):
+            future.result()
+    assert len(calls) == 1 and flights.in_flight() == 0
+
+
+def test_finished_calls_are_not_reused():
+    flights = SingleFlight(enabled=True)
+    counter = iter(range(10))
+    assert flights.do("key", lambda: next(counter)) == 0
+    assert flights.do("key", lambda: next(counter)) == 1
+
+
+def test_disabled_runs_every_call():
+    flights = SingleFlight(enabled=False)
+    calls = []
+    flights.do("key", lambda: calls.append(1))
+    flights.do("key", lambda: calls.append(1))
+    assert len(calls) == 2
+
+
+def test_flight_key_ignores_dict_order():
+    assert flight_key("posts", {"a": 1, "b": [1, 2]}) == flight_key("posts", {"b": [1, 2], "a": 1})
+    assert flight_key("posts", {"a": 1}) != flight_key("ideas", {"a": 1})
@@ -0,0 +1,60 @@
+from pipeline import generate_posts, prepare_post_input
+from token_usage import TokenLedger, usage_totals
+
+
+RESEARCH = {
+    "summary": " ".join(f"Claim {i}: hashrate grew {i}% as miners added capacity in Texas." for i in range(60)),
+    "stats": [f"{i} EH/s" for i in range(20)],
+    "links": [f"https://example.com/article-{i}" for i in range(20)],
+}
+
+
+def test_compaction_records_saving_outside_totals():
+    ledger = TokenLedger()
+    ledger.record("research", 1000, 200)
+    prepare_post_input(RESEARCH, compact=True, ledger=ledger)
+    ledger.record("posts", 300, 150)
+
+    rows = {row["stage"]: row for row in ledger.rows()}
+    assert rows["compaction"]["input_tokens"] == 0
+    assert rows["compaction"]["output_tokens"] == 0
+    assert rows["compaction"]["saved_tokens"] > 0
+
+    totals = ledger.totals()
+    assert totals["input_tokens"] == 1300
+    assert totals["output_tokens"] == 350
+    assert totals["saved_tokens"] == rows["compaction"]["saved_tokens"]
+
+
+def test_uncompacted_input_records_nothing():
+    ledger = TokenLedger()
+    prepare_post_input(RESEARCH, compact=False, ledger=ledger)
+    assert ledger.rows() == []
+
+
+def test_usage_totals_accepts_rows_without_saved_tokens():
+    # Rows stored by older job results have no saved_tokens field
+    rows = [{"stage": "research", "calls": 1, "input_tokens": 10, "output_tokens": 5, "estimated": False}]
+    assert usage_totals(rows) == {"input_tokens": 10, "output_tokens": 5, "saved_tokens": 0}
+
+
+class PostAgent:
+    def __init__(self):
+        self.run_response = None
+
+    def run(self, message):
+        self.run_response = type("Response", (), {"content": '{"linkedin": "Post", "linkedin_reference": ""}',
+                                                  "metrics": {}})()
+        return self.run_response
+
+
+def test_prepared_post_input_is_compacted_once():
+    ledger = TokenLedger()
+    post_input = prepare_post_input(RESEARCH, compact=True, ledger=ledger)
+    generate_posts(RESEARCH, agent=PostAgent(), compact=True, ledger=ledger, post_input=post_input)
+
+    rows = {row["stage"]: row for row in ledger.rows()}
+    assert rows["compaction"]["calls"] == 1
+    saved = rows["compaction"]["saved_tokens"]
+    assert ledger.totals()["saved_tokens"] == saved
+    assert rows["posts"]["input_tokens"] > 0
@@ -0,0 +1,40 @@
+from topic_index import SimilarTopicIndex, embed_topic
+
+
+class Cache:
+    def __init__(self, entries):
+        self.entries_ = entries
+
+    def fingerprint(self):
+        return len(self.entries_)
+
+    def entries(self, instructions):
+        return iter(self.entries_)
+
+
+def make_index(count=0):
+    entries = [("renewables", "renewable energy in bitcoin mining", {"summary": "Miners in Texas use renewables."})]
+    entries += [(f"k{i}", f"hosting contract {i} for bitcoin mining", {"summary": f"Hosting deal {i}."}) for i in range(count)]
+    return SimilarTopicIndex(Cache(entries), [])
+
+
+def test_reworded_topic_matches():
+    match = make_index().best_match("bitcoin mining renewables")
+    assert match["key"] == "renewables" and match["score"] >= 0.75
+
+
+def test_shared_domain_words_alone_do_not_match():
+    assert make_index().best_match("Bitcoin mining in Texas") is None
+
+
+def test_embedding_is_sparse_unit_vector():
+    vector = embed_topic("immersion cooling")
+    assert 0 < len(vector) < 50
+    assert abs(sum(weight * weight for weight in vector.values()) - 1) < 1e-6
+
+
+def test_index_memory_stays_small_per_entry():
+    index = make_index(499)
+    index.refresh()
+    size = sum(array.nbytes for matrix in (index._topic_matrix, index._vocabulary_matrix) for array in matrix)
+    assert size / 500 < 2048
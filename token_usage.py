@@ -0,0 +1,85 @@
+import threading
+
+# Rough characters-per-token ratio for English prose with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate for text we never send to a model (or when a provider reports no usage).
+    """
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _metric_total(value):
+    # agno reports per-message metrics as lists; single values are also accepted
+    if isinstance(value, (list, tuple)):
+        return sum(v for v in value if isinstance(v, (int, float)))
+    return value if isinstance(value, (int, float)) else 0
+
+
+def response_token_usage(response):
+    """
+    Return (input_tokens, output_tokens) reported on an agno RunResponse, or (None, None).
+    """
+    metrics = getattr(response, "metrics", None) or {}
+    input_tokens = _metric_total(metrics.get("input_tokens", metrics.get("prompt_tokens")))
+    output_tokens = _metric_total(metrics.get("output_tokens", metrics.get("completion_tokens")))
+    if not input_tokens and not output_tokens:
+        return None, None
+    return int(input_tokens), int(output_tokens)
+
+
+def usage_totals(rows):
+    """
+    Input/output tokens spent across ledger rows, and the tokens saved by compaction.
+    Saved tokens were never sent, so they are not part of the input total.
+    """
+    return {
+        "input_tokens": sum(r["input_tokens"] for r in rows),
+        "output_tokens": sum(r["output_tokens"] for r in rows),
+        "saved_tokens": sum(r.get("saved_tokens", 0) for r in rows),
+    }
+
+
+class TokenLedger:
+    """
+    Per-run record of input/output tokens by pipeline stage.
+    Stages without provider-reported usage are estimated and flagged as such.
+    Steps that avoid tokens rather than spend them (compaction) record saved_tokens instead.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, input_tokens=0, output_tokens=0, estimated=False, saved_tokens=0):
+        with self._lock:
+            row = self._stages.setdefault(
+                stage,
+                {"stage": stage, "calls": 0, "input_tokens": 0, "output_tokens": 0, "saved_tokens": 0, "estimated": False},
+            )
+            row["calls"] += 1
+            row["input_tokens"] += int(input_tokens or 0)
+            row["output_tokens"] += int(output_tokens or 0)
+            row["saved_tokens"] += int(saved_tokens or 0)
+            row["estimated"] = row["estimated"] or estimated
+
+    def record_response(self, stage, response, prompt=None):
+        """
+        Record usage from an agent response, estimating from the prompt and output text if
+        the provider did not report it.
+        """
+        input_tokens, output_tokens = response_token_usage(response)
+        if input_tokens is None:
+            content = getattr(response, "content", None)
+            self.record(stage, estimate_tokens(prompt), estimate_tokens(content if isinstance(content, str) else ""), estimated=True)
+        else:
+            self.record(stage, input_tokens, output_tokens)
+
+    def rows(self):
+        with self._lock:
+            return [dict(row) for row in self._stages.values()]
+
+    def totals(self):
+        return usage_totals(self.rows())
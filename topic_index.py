@@ -0,0 +1,177 @@
+"""
+Near-duplicate topic detection over previously researched topics.
+
+Topics are embedded with a hashed bag of stemmed words and character trigrams (no model
+download, a few microseconds per topic) and compared with one vectorized NumPy cosine
+search. Vectors are kept sparse (only their non-zero buckets), so an entry costs a few
+hundred bytes however many hash buckets there are. Coverage of the query's words in each
+stored research summary is blended in, so "bitcoin mining renewables" finds "Renewable
+energy in Bitcoin mining". Words every topic in this app shares (bitcoin, mining, crypto)
+carry little weight, so "bitcoin mining" alone does not match "Bitcoin mining in Texas".
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import defaultdict
+
+from research_cache import normalize_topic
+
+# ------------------ Configuration ------------------
+# Reuse a prior result automatically at or above this score, and offer it at or above the suggest score
+DEFAULT_AUTO_THRESHOLD = float(os.environ.get("HEARST_SIMILAR_TOPIC_AUTO", 0.75))
+DEFAULT_SUGGEST_THRESHOLD = float(os.environ.get("HEARST_SIMILAR_TOPIC_SUGGEST", 0.5))
+TOPIC_WEIGHT = 0.8
+DOMAIN_TERM_WEIGHT = 0.3
+DIMENSIONS = 1 << 14
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at by for from how in into is it its of on or the to vs versus what why with".split()
+)
+# Stemmed words nearly every topic contains
+_DOMAIN_TERMS = frozenset("bitcoin btc crypto cryptocurrency min miner blockchain hearst".split())
+
+
+def _stem(word):
+    # Just enough stemming to merge plurals and common inflections ("renewables" / "renewable")
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ers", "er"), ("es", "e"), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[: len(word) - len(suffix)] + replacement
+    return word
+
+
+def topic_terms(text):
+    return [_stem(w) for w in _WORD.findall(normalize_topic(text)) if w not in _STOPWORDS]
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode("utf-8")) % DIMENSIONS
+
+
+def embed_topic(text):
+    """
+    Hashed feature vector (unit length) of a topic, as {bucket: weight} over its non-zero
+    buckets: whole words plus their character trigrams.
+    """
+    vector = defaultdict(float)
+    for term in topic_terms(text):
+        weight = DOMAIN_TERM_WEIGHT if term in _DOMAIN_TERMS else 1.0
+        vector[_bucket("w:" + term)] += weight
+        padded = f"^{term}$"
+        grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for gram in grams:
+            # Trigrams together weigh as much as the word itself
+            vector[_bucket("g:" + gram)] += weight / len(grams)
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {bucket: weight / norm for bucket, weight in vector.items()} if norm else {}
+
+
+def summary_vocabulary(research_data):
+    """
+    Set of the word buckets used in a research result's text.
+    """
+    text = " ".join([
+        str(research_data.get("summary", "")),
+        str(research_data.get("simple_explanation", "")),
+        " ".join(str(s) for s in research_data.get("stats", []) or []),
+    ])
+    return {_bucket("w:" + term) for term in set(topic_terms(text))}
+
+
+def _sparse_rows(rows, np):
+    # Concatenate sparse rows into (row index, bucket, weight) arrays, i.e. a COO matrix
+    rows = [row.items() if isinstance(row, dict) else ((bucket, 1.0) for bucket in row) for row in rows]
+    entries = [(i, bucket, weight) for i, row in enumerate(rows) for bucket, weight in row]
+    if not entries:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    row_ids, buckets, weights = zip(*entries)
+    return np.array(row_ids, dtype=np.int32), np.array(buckets, dtype=np.int32), np.array(weights, dtype=np.float32)
+
+
+class SimilarTopicIndex:
+    """
+    In-memory similarity index over a ResearchCache's entries for one instruction set,
+    rebuilt whenever the cache's fingerprint changes.
+    """
+
+    def __init__(self, cache, instructions, auto_threshold=DEFAULT_AUTO_THRESHOLD,
+                 suggest_threshold=DEFAULT_SUGGEST_THRESHOLD):
+        self.cache = cache
+        self.instructions = list(instructions)
+        self.auto_threshold = auto_threshold
+        self.suggest_threshold = suggest_threshold
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._keys, self._topics = [], []
+        self._topic_matrix = self._vocabulary_matrix = None
+
+    def refresh(self):
+        import numpy as np
+
+        fingerprint = self.cache.fingerprint()
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+            keys, topics, topic_vectors, vocabularies = [], [], [], []
+            for key, topic, research_data in self.cache.entries(self.instructions):
+                if not isinstance(research_data, dict):
+                    continue
+                keys.append(key)
+                topics.append(topic)
+                topic_vectors.append(embed_topic(topic))
+                vocabularies.append(summary_vocabulary(research_data))
+            self._keys, self._topics = keys, topics
+            self._topic_matrix = _sparse_rows(topic_vectors, np) if keys else None
+            self._vocabulary_matrix = _sparse_rows(vocabularies, np) if keys else None
+            self._fingerprint = fingerprint
+
+    def search(self, topic, limit=3):
+        """
+        Return up to limit matches {"key", "topic", "score"} at or above the suggest threshold,
+        best first. The topic itself (an exact cache hit) is never returned.
+        """
+        import numpy as np
+
+        self.refresh()
+        query = embed_topic(topic)
+        terms = topic_terms(topic)
+        # Coverage is measured on the distinctive words when the topic has any
+        terms = {_bucket("w:" + t) for t in ([t for t in terms if t not in _DOMAIN_TERMS] or terms)}
+        with self._lock:
+            if self._topic_matrix is None or not terms:
+                return []
+            count = len(self._keys)
+            rows, buckets, weights = self._topic_matrix
+            query_buckets = np.fromiter(query, dtype=np.int32, count=len(query))
+            query_weights = np.fromiter(query.values(), dtype=np.float32, count=len(query))
+            # Sparse dot product: look up each stored bucket's weight in the (sorted) query
+            order = np.argsort(query_buckets)
+            query_buckets, query_weights = query_buckets[order], query_weights[order]
+            position = np.minimum(np.searchsorted(query_buckets, buckets), len(query_buckets) - 1)
+            matched = query_weights[position] * (query_buckets[position] == buckets)
+            topic_scores = np.bincount(rows, weights=weights * matched, minlength=count)
+            rows, buckets, _ = self._vocabulary_matrix
+            covered = np.isin(buckets, np.fromiter(terms, dtype=np.int32, count=len(terms)))
+            coverage = np.bincount(rows, weights=covered, minlength=count) / len(terms)
+            scores = TOPIC_WEIGHT * topic_scores + (1 - TOPIC_WEIGHT) * coverage
+            order = np.argsort(-scores)[: limit + 1]
+            keys, topics = self._keys, self._topics
+        normalized = normalize_topic(topic)
+        matches = [
+            {"key": keys[i], "topic": topics[i], "score": round(float(scores[i]), 3)}
+            for i in order
+            if scores[i] >= self.suggest_threshold and topics[i] != normalized
+        ]
+        return matches[:limit]
+
+    def best_match(self, topic):
+        matches = self.search(topic, limit=1)
+        return matches[0] if matches else None
+
+    def is_reusable(self, match):
+        return match is not None and match["score"] >= self.auto_threshold
+
+    def load(self, match):
+        return self.cache.get_by_key(match["key"])
@@ -0,0 +1,99 @@
+# Static page markup, built once per server process at import time instead of on every rerun.
+
+# Enhanced CSS for Hearst branding and modern look
+PAGE_CSS = """
+<link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@700;400&display=swap" rel="stylesheet">
+<style>
+    body, .stApp {
+        background: #000000 !important;
+        color: #FFFFFF;
+        font-family: 'Montserrat', Arial, sans-serif;
+    }
+    .main-title {
+        font-family: 'Montserrat', Arial, sans-serif;
+        font-size: 2.6rem;
+        font-weight: 800;
+        letter-spacing: 1.5px;
+        margin-bottom: 0.5rem;
+        text-shadow: 0 4px 24px #2EFFAF33;
+        background: linear-gradient(90deg, #2EFFAF 0%, #00FFB2 50%, #00C6FB 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        background-clip: text;
+    }
+    .main-subtitle {
+        font-size: 1.2rem;
+        color: #FFFFFFCC;
+        margin-bottom: 2.5rem;
+        font-weight: 400;
+    }
+    .hearst-card {
+        background: rgba(26,44,56,0.98);
+        border-radius: 16px;
+        padding: 32px 36px 24px 36px;
+        margin-bottom: 32px;
+        box-shadow: 0 4px 24px rgba(46,255,175,0.10);
+        border-left: 6px solid #2EFFAF;
+        transition: box-shadow 0.2s;
+    }
+    .hearst-card:hover {
+        box-shadow: 0 8px 32px rgba(46,255,175,0.18);
+    }
+    .hearst-title {
+        color: #2EFFAF;
+        font-size: 1.5rem;
+        font-weight: 700;
+        margin-bottom: 16px;
+        display: flex;
+        align-items: center;
+        letter-spacing: 0.5px;
+        text-shadow: 0 2px 8px rgba(46,255,175,0.10);
+    }
+    .hearst-icon {
+        font-size: 2rem;
+        margin-right: 14px;
+        filter: drop-shadow(0 2px 8px #2EFFAF33);
+    }
+    .hearst-links a {
+        color: #2EFFAF !important;
+        text-decoration: underline !important;
+        font-weight: 500;
+        font-size: 1.05rem;
+    }
+    .stTextInput input {
+        background-color: #1A2C38 !important;
+        color: #2EFFAF !important;
+        border: 2px solid #2EFFAF !important;
+        border-radius: 6px;
+        padding: 14px !important;
+        font-size: 1.1rem;
+    }
+    .stButton>button {
+        background: linear-gradient(90deg, #2EFFAF 0%, #00C6FB 100%) !important;
+        color: #0A0F0F !important;
+        border: none;
+        font-weight: bold;
+        padding: 14px 28px;
+        border-radius: 6px;
+        font-size: 1.1rem;
+        box-shadow: 0 2px 8px rgba(46,255,175,0.10);
+        transition: background 0.2s;
+    }
+    .stButton>button:hover {
+        background: linear-gradient(90deg, #00C6FB 0%, #2EFFAF 100%) !important;
+    }
+</style>
+"""
+
+# Improved main title and subtitle
+PAGE_HEADER = """
+<div style='text-align:center; margin-bottom: 2rem;'>
+    <div class='main-title'>Hearst Marketing Team Helper</div>
+    <div class='main-subtitle'>Empowering sustainable, data-driven crypto mining content for the future</div>
+</div>
+"""
+
+PAGE_DIVIDER = "<hr style='border:1px solid #2EFFAF; margin: 2rem 0;'>"
+
+# Emitted as a single markdown element per rerun
+PAGE_MARKUP = PAGE_CSS + PAGE_HEADER + PAGE_DIVIDER
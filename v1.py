@@ -1,13 +1,35 @@
 import os
-import re
 import json
+import time
 import streamlit as st
-from agno.agent import Agent
-from agno.tools.duckduckgo import DuckDuckGoTools
-from agno.models.groq import Groq
-from io import BytesIO
-from docx import Document
-import ast
+import pipeline
+from pipeline import (
+    POST_PLATFORMS,
+    RESEARCH_INSTRUCTIONS,
+    PipelineError,
+    prepare_post_input,
+    generate_ideas,
+    generate_posts,
+    generate_posts_concurrently,
+    object_parser,
+    record_response_metrics,
+    recover_output,
+    recovery_counts,
+    research_topic,
+    reset_search_dedup,
+    verify_source_links,
+)
+from history_store import DEFAULT_PAGE_SIZE, HistoryStore
+from jobs import DEFAULT_CONCURRENCY, FINISHED, JobStore, history_recorder, pipeline_handlers, start_workers
+from link_check import LinkVerifier
+from metrics import METRICS
+from news_digest import NewsDigestRefresher, NewsDigestStore
+from research_cache import ResearchCache
+from topic_index import SimilarTopicIndex
+from streaming_json import stream_json_object
+from token_usage import TokenLedger, usage_totals
+from ui_assets import PAGE_MARKUP
+from word_export import DOCX_MIME, create_word_doc, create_ideas_word_doc
 
 # ------------------ Configuration ------------------
 st.set_page_config(page_title="Hearst Crypto Studio", layout="wide")
@@ -26,218 +48,64 @@ BRAND_COLORS = {
     "secondary": "#1A2C38"
 }
 
-# Enhanced CSS for Hearst branding and modern look
-st.markdown(f"""
-<link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@700;400&display=swap" rel="stylesheet">
-<style>
-    body, .stApp {{
-        background: #000000 !important;
-        color: #FFFFFF;
-        font-family: 'Montserrat', Arial, sans-serif;
-    }}
-    .main-title {{
-        font-family: 'Montserrat', Arial, sans-serif;
-        font-size: 2.6rem;
-        font-weight: 800;
-        letter-spacing: 1.5px;
-        margin-bottom: 0.5rem;
-        text-shadow: 0 4px 24px #2EFFAF33;
-        background: linear-gradient(90deg, #2EFFAF 0%, #00FFB2 50%, #00C6FB 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }}
-    .main-subtitle {{
-        font-size: 1.2rem;
-        color: #FFFFFFCC;
-        margin-bottom: 2.5rem;
-        font-weight: 400;
-    }}
-    .hearst-card {{
-        background: rgba(26,44,56,0.98);
-        border-radius: 16px;
-        padding: 32px 36px 24px 36px;
-        margin-bottom: 32px;
-        box-shadow: 0 4px 24px rgba(46,255,175,0.10);
-        border-left: 6px solid #2EFFAF;
-        transition: box-shadow 0.2s;
-    }}
-    .hearst-card:hover {{
-        box-shadow: 0 8px 32px rgba(46,255,175,0.18);
-    }}
-    .hearst-title {{
-        color: #2EFFAF;
-        font-size: 1.5rem;
-        font-weight: 700;
-        margin-bottom: 16px;
-        display: flex;
-        align-items: center;
-        letter-spacing: 0.5px;
-        text-shadow: 0 2px 8px rgba(46,255,175,0.10);
-    }}
-    .hearst-icon {{
-        font-size: 2rem;
-        margin-right: 14px;
-        filter: drop-shadow(0 2px 8px #2EFFAF33);
-    }}
-    .hearst-links a {{
-        color: #2EFFAF !important;
-        text-decoration: underline !important;
-        font-weight: 500;
-        font-size: 1.05rem;
-    }}
-    .stTextInput input {{
-        background-color: #1A2C38 !important;
-        color: #2EFFAF !important;
-        border: 2px solid #2EFFAF !important;
-        border-radius: 6px;
-        padding: 14px !important;
-        font-size: 1.1rem;
-    }}
-    .stButton>button {{
-        background: linear-gradient(90deg, #2EFFAF 0%, #00C6FB 100%) !important;
-        color: #0A0F0F !important;
-        border: none;
-        font-weight: bold;
-        padding: 14px 28px;
-        border-radius: 6px;
-        font-size: 1.1rem;
-        box-shadow: 0 2px 8px rgba(46,255,175,0.10);
-        transition: background 0.2s;
-    }}
-    .stButton>button:hover {{
-        background: linear-gradient(90deg, #00C6FB 0%, #2EFFAF 100%) !important;
-    }}
-</style>
-""", unsafe_allow_html=True)
-
-# Improved main title and subtitle
-st.markdown("""
-<div style='text-align:center; margin-bottom: 2rem;'>
-    <div class='main-title'>Hearst Marketing Team Helper</div>
-    <div class='main-subtitle'>Empowering sustainable, data-driven crypto mining content for the future</div>
-</div>
-""", unsafe_allow_html=True)
-
-st.markdown("<hr style='border:1px solid #2EFFAF; margin: 2rem 0;'>", unsafe_allow_html=True)
-
-# ------------------ Agent Factories ------------------
+# Branding CSS, title and divider are precomputed in ui_assets.py and sent as one element
+st.markdown(PAGE_MARKUP, unsafe_allow_html=True)
+
+# ------------------ Shared Resources ------------------
+# Agents are not cached here: each run leases one from pipeline.AGENT_POOL, so no session
+# shares an agent's run history with another and memory stays bounded
 @st.cache_resource
-def create_research_agent():
-    return Agent(
-        name="Hearst Research Validator",
-        role="Research the provided crypto mining topic and generate high-quality, data-driven content examples and a detailed research summary for the marketing team.",
-        model=Groq(id="llama-3.3-70b-versatile"),
-        tools=[DuckDuckGoTools(search=True, news=True)],
-        instructions=[
-            "You are a researcher for Hearst Corporation.",
-            "Given a topic, perform in-depth research using only credible, high-quality industry sources (e.g., CoinDesk, Cointelegraph, PR Newswire, MiningWeek, MIT Tech Review, Cambridge Bitcoin Index, Academic papers from IEEE, Springer crypto conferences).",
-            "Avoid social media and opinion blogs.",
-            "Return ONLY valid JSON. Do NOT include any markdown, explanations, or text outside the JSON object.",
-            "The JSON must have the following structure:",
-            "",
-            "{",
-            '  "summary": "<1000-2000 word in-depth technical summary of the topic, including all major trends, findings, controversies, and future outlook. Use as much detail as possible, cite statistics, and reference sources.>",',
-            '  "simple_explanation": "<A simple, clear explanation of the topic in 100-200 words, suitable for someone with no technical background.>",',
-            '  "stats": ["statistic 1", "statistic 2", ...],',
-            '  "links": ["Direct URL to a recent (last 12 months) research article or news post about the topic", "... (at least 8-10 unique, recent, high-quality links)"]',
-            "}",
-            "",
-            "Example:",
-            '{',
-            '  "summary": "Bitcoin mining is the process of ... (very detailed, technical, long)",',
-            '  "simple_explanation": "Bitcoin mining is how new bitcoins are created ... (simple, short)",',
-            '  "stats": ["50% of bitcoin mining uses renewables", "Over 12,200 jobs provided by mining in Texas"],',
-            '  "links": ["https://coindesk.com/2024/05/bitcoin-mining-sustainability", "https://cointelegraph.com/news/bitcoin-mining-2024-trends", "..."]',
-            '}',
-            "All links must be direct to the original research/news post, not homepages or aggregators, and as recent as possible."
-        ],
-        show_tool_calls=False,
-        markdown=True
-    )
+def get_research_cache():
+    # Disk-backed, so it is shared across sessions and survives server restarts
+    return ResearchCache()
 
 @st.cache_resource
-def create_post_agent():
-    return Agent(
-        name="Hearst Content Architect",
-        role="Create data-driven, positive social posts for Hearst",
-        model=Groq(id="llama-3.3-70b-versatile"),
-        instructions=[
-            "You are a content creator for Hearst Corporation.",
-            "Given a research summary, statistics, and links, generate the following in JSON:",
-            "",
-            "{",
-            '  "linkedin": "<LinkedIn post>",',
-            '  "linkedin_reference": "<URL from the research links used in the post>",',
-            '  "instagram": "<Instagram post>",',
-            '  "instagram_reference": "<URL from the research links used in the post>",',
-            '  "x": "<X (Twitter) post>",',
-            '  "x_reference": "<URL from the research links used in the post>"',
-            "}",
-            "",
-            "Each post should reference the research and statistics, but not include URLs in the post text. Provide the reference link separately, and always use a link from the provided research links."
-        ],
-        show_tool_calls=False,
-        markdown=False
-    )
+def get_similar_topic_index():
+    # Rebuilt in memory only when the research cache changes
+    return SimilarTopicIndex(get_research_cache(), RESEARCH_INSTRUCTIONS)
 
-# ------------------ Parsing Helpers ------------------
-def parse_research(content: str):
-    items = []
-    blocks = re.split(r'### ', content)
-    for block in blocks:
-        if not block.strip():
-            continue
-        lines = block.strip().split('\n')
-        entry = {"title": lines[0].strip()}
-        body = '\n'.join(lines[1:])
-        url_match = re.search(r'(http[s]?://[^\s]+)', body)
-        if url_match:
-            entry['url'] = url_match.group(1)
-        date_match = re.search(r'Date[:]?\s*(.*)', body)
-        if date_match:
-            entry['date'] = date_match.group(1)
-        stats = re.findall(r'(\d+\.?\d*%?\s*[^.;\n]+)', body)
-        if stats:
-            entry['stats'] = stats[:3]
-        summary_match = re.search(r'(\d+\s-word technical summary[:]?.*)', body)
-        # fallback: take 150 words after "Summary:" if present
-        entry['summary'] = ''
-        summary_lines = body.split('Summary:')
-        if len(summary_lines) > 1:
-            entry['summary'] = summary_lines[1].strip()
-        items.append(entry)
-    return items
-
-def extract_json_from_text(text):
-    """
-    Extract the first JSON object found in a string, including from code blocks.
-    """
-    # Remove code block markers if present
-    text = re.sub(r"```(?:json)?", "", text, flags=re.IGNORECASE).replace("```", "")
-    match = re.search(r'\{[\s\S]*\}', text)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            return None
-    return None
+@st.cache_resource
+def get_history_store():
+    # Every generated post set and idea list is kept here, across sessions and restarts
+    return HistoryStore()
 
-def extract_json_objects(text):
-    """
-    Extract all JSON objects from a string, even if not in a JSON array.
-    """
-    json_objects = []
-    # Find all {...} blocks that look like JSON objects
-    for match in re.finditer(r'\{.*?\}', text, re.DOTALL):
-        try:
-            obj = json.loads(match.group(0))
-            json_objects.append(obj)
-        except Exception:
-            continue
-    return json_objects
+@st.cache_resource
+def get_news_digest_store():
+    # One store and one background refresher per server process. Set HEARST_NEWS_REFRESHER=off
+    # when a separate `python news_digest.py` worker keeps the digest fresh instead.
+    store = NewsDigestStore(verifier=LinkVerifier())
+    if os.environ.get("HEARST_NEWS_REFRESHER", "on").lower() != "off":
+        NewsDigestRefresher(store).start()
+    return store
+
+@st.cache_resource
+def get_job_store():
+    # Generations run on worker threads started once per process. Set HEARST_JOB_WORKERS=off
+    # when separate `python jobs.py` worker processes run the queue instead.
+    store = JobStore()
+    if os.environ.get("HEARST_JOB_WORKERS", "on").lower() != "off":
+        handlers = pipeline_handlers(research_cache=get_research_cache(), news_store=get_news_digest_store())
+        start_workers(store, handlers, DEFAULT_CONCURRENCY, on_complete=history_recorder(get_history_store()))
+    return store
+
+# Seconds between checks on a running job
+JOB_POLL_SECONDS = 1.5
+JOB_STAGE_LABELS = {
+    "starting": "Starting...",
+    "research": "Researching the topic...",
+    "links": "Verifying research links...",
+    "posts": "Writing LinkedIn, Instagram and X posts...",
+    "news": "Gathering latest mining news...",
+    "ideas": "Generating ideas from the latest mining news...",
+}
 
 # ------------------ Display Helpers ------------------
+def stop_with_error(message, phase):
+    # Every aborted run is counted, so the admin panel shows which phase users hit errors in
+    st.error(message)
+    METRICS.incr("st_stop", phase=phase)
+    st.stop()
+
 def display_research(items):
     st.subheader("🔍 Verified Research Breakdown")
     for idx, item in enumerate(items, 1):
@@ -255,119 +123,143 @@ def display_research(items):
                 st.markdown(item['summary'])
 
 # Display posts in cards
-def display_hearst_post(title, icon, content):
-    st.markdown(f"""
+def display_hearst_post(title, icon, content, container=None):
+    (container or st).markdown(f"""
     <div class="hearst-card">
         <div class="hearst-title"><span class="hearst-icon">{icon}</span>{title}</div>
         <div>{content}</div>
     </div>
     """, unsafe_allow_html=True)
 
+def format_post_content(posts, platform):
+    name = {"linkedin": "LinkedIn", "instagram": "Instagram", "x": "X"}[platform]
+    reference = posts.get(f"{platform}_reference")
+    return posts.get(platform, f"No {name} post found.") + (
+        f"<br><span style='color:#2EFFAF;font-size:0.95rem;'>Reference: <a href='{reference}' target='_blank'>{reference}</a></span>" if reference else ""
+    )
+
+# (research_data key, card title, card icon)
+RESEARCH_CARDS = [
+    ("summary", "Full Technical Research Summary", "📑"),
+    ("simple_explanation", "Simple Explanation", "📝"),
+    ("links", "Research Links", "🔗"),
+]
+
+def format_research_content(research_data, key):
+    if key == "links":
+        return "<ul class='hearst-links'>" + "".join(
+            f"<li><a href='{url}' target='_blank'>{url}</a></li>" for url in research_data.get('links', [])
+        ) + "</ul>"
+    if key == "summary":
+        return research_data.get('summary', 'No research summary found.')
+    return research_data.get('simple_explanation', 'No simple explanation found.')
+
+def display_research_cards(research_data, slots=None, keys=None):
+    # Full Technical Research Summary, Simple Explanation and Research Links
+    for key, title, icon in RESEARCH_CARDS:
+        if keys is not None and key not in keys:
+            continue
+        display_hearst_post(title, icon, format_research_content(research_data, key), container=(slots or {}).get(key))
 
-# Word File Creation
-def create_word_doc(posts, research_data):
-    from docx import Document
-    from io import BytesIO
-    doc = Document()
-    doc.add_heading('Hearst Crypto Marketing Suite', 0)
-
-    # Posts
-    for plat in ['linkedin', 'instagram', 'x']:
-        doc.add_heading(f"{plat.title()} Post", level=1)
-        doc.add_paragraph(posts.get(plat, 'No post found.'))
-
-    # Full Technical Research Summary
-    doc.add_heading("Full Technical Research Summary", level=1)
-    doc.add_paragraph(research_data.get('summary', 'No research summary found.'))
-
-    # Simple Explanation
-    doc.add_heading("Simple Explanation", level=1)
-    doc.add_paragraph(research_data.get('simple_explanation', 'No simple explanation found.'))
-
-    # Research Links
-    doc.add_heading("Research Links", level=1)
-    for url in research_data.get('links', []):
-        doc.add_paragraph(url, style='List Bullet')
-
-    # Save to BytesIO
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-def create_ideas_word_doc(ideas):
-    from docx import Document
-    from io import BytesIO
-    doc = Document()
-    doc.add_heading('Hearst Crypto Mining Ideas', 0)
-    for idx, idea in enumerate(ideas, 1):
-        doc.add_heading(f"{idx}. {idea.get('topic', 'No Topic')}", level=1)
-        doc.add_paragraph(f"Summary: {idea.get('summary', '')}")
-        doc.add_paragraph("Useful Links:")
-        for url in idea.get('links', []):
-            doc.add_paragraph(url, style='List Bullet')
-        doc.add_paragraph(f"Description: {idea.get('description', '')}")
-        if idea.get('suggested_post_angle'):
-            doc.add_paragraph(f"Suggested Post Angle: {idea.get('suggested_post_angle', '')}")
-        doc.add_paragraph("")  # Spacer
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-def parse_ideas_from_text(text):
-    # Split by idea sections (look for ### or numbered headings)
-    idea_blocks = re.split(r'(?:^|\n)#+\s*\d+\.\s*|(?:^|\n)(?=\d+\.\s)', text)
-    ideas = []
-    for block in idea_blocks:
-        block = block.strip()
-        if not block or len(block) < 20:
+def display_post_cards(posts, slots=None, platforms=None):
+    # LinkedIn, Instagram and X Post Examples
+    for platform, _, title, icon in POST_PLATFORMS:
+        if platforms is not None and platform not in platforms:
             continue
-        idea = {}
-        # Topic
-        topic_match = re.search(r'\*\*Topic:\*\*\s*(.*)', block)
-        if not topic_match:
-            topic_match = re.search(r'Topic:\s*(.*)', block)
-        idea['topic'] = topic_match.group(1).strip() if topic_match else block.split('\n')[0].strip()
-        # Summary
-        summary_match = re.search(r'\*\*Summary:\*\*\s*(.*)', block)
-        if not summary_match:
-            summary_match = re.search(r'Summary:\s*(.*)', block)
-        idea['summary'] = summary_match.group(1).strip() if summary_match else ""
-        # Links
-        links = re.findall(r'\[([^\]]+)\]\((https?://[^\)]+)\)', block)
-        if not links:
-            # fallback: plain links
-            links = [(url, url) for url in re.findall(r'(https?://[^\s\*]+)', block)]
-        idea['links'] = [url for _, url in links]
-        # Description
-        desc_match = re.search(r'\*\*Description:\*\*\s*(.*)', block, re.DOTALL)
-        if not desc_match:
-            desc_match = re.search(r'Description:\s*(.*)', block, re.DOTALL)
-        desc = desc_match.group(1).strip() if desc_match else ""
-        # Remove "Suggested Post Angle" from description if present
-        desc = re.split(r'\*\*Suggested Post Angle:\*\*|Suggested Post Angle:', desc)[0].strip()
-        idea['description'] = desc
-        # Suggested Post Angle
-        angle_match = re.search(r'\*\*Suggested Post Angle:\*\*\s*"(.*?)"', block)
-        if not angle_match:
-            angle_match = re.search(r'Suggested Post Angle:\s*"(.*?)"', block)
-        idea['suggested_post_angle'] = angle_match.group(1).strip() if angle_match else ""
-        ideas.append(idea)
-    return ideas
-
-def is_valid_article_link(url):
-    # Basic filter: must not end with /, /topic/, /news/, etc.
-    invalid_patterns = ['/topic/', '/news/', '/tags/', '/category/', '/search?', '/?']
-    if any(p in url for p in invalid_patterns):
+        display_hearst_post(title, icon, format_post_content(posts, platform), container=(slots or {}).get(platform))
+
+def display_idea_cards(ideas_list):
+    # Display ideas in a simple vertical stack (VBox)
+    for idx, idea in enumerate(ideas_list, 1):
+        st.markdown(f"""
+        <div class="hearst-card">
+            <div class="hearst-title"><span class="hearst-icon">💡</span>{idx}. {idea.get('topic', 'No Topic')}</div>
+            <div><b>Summary:</b> {idea.get('summary', '')}</div>
+            <div style="margin-top:0.5em;"><b>Description:</b> {idea.get('description', '')}</div>
+            {f"<div style='margin-top:0.5em;'><b>Useful Links:</b><ul class='hearst-links'>{''.join(f'<li><a href={url} target=_blank>{url}</a></li>' for url in idea.get('links', []))}</ul></div>" if idea.get('links') else ''}
+            {f"<div style='margin-top:0.5em;'><b>Suggested Post Angle:</b> {idea.get('suggested_post_angle', '')}</div>" if idea.get('suggested_post_angle') else ""}
+        </div>
+        """, unsafe_allow_html=True)
+
+def display_token_usage(rows):
+    # Token accounting per stage
+    if not rows:
+        return
+    with st.expander("Token usage by stage"):
+        st.table(rows)
+        totals = usage_totals(rows)
+        st.caption(
+            f"Total: {totals['input_tokens']} input / {totals['output_tokens']} output tokens. "
+            "Rows marked estimated are approximations (about 4 characters per token)."
+        )
+        if totals["saved_tokens"]:
+            st.caption(f"The compact brief saved about {totals['saved_tokens']} input tokens per post request.")
+        recovery = recovery_counts(rows)
+        if recovery["repairs"] or recovery["hedges"]:
+            st.caption(
+                f"Recovered with {recovery['repairs']} JSON repair request(s) and "
+                f"{recovery['hedges']} hedged request(s); see the :repair and :hedge rows."
+            )
+
+def display_rejected_links(rejected_links):
+    if rejected_links:
+        with st.expander(f"Removed {len(rejected_links)} research links that failed verification"):
+            for item in rejected_links:
+                st.markdown(f"- {item['url']} ({item['reason']})")
+
+def display_ideas_download(ideas_list, key):
+    st.markdown("<div style='margin-top:2rem; text-align:center;'><b style='color:#2EFFAF; font-size:1.15rem;'>Download these ideas as a Word document:</b></div>", unsafe_allow_html=True)
+    st.download_button(
+        label="⬇️ Download Ideas Word Report",
+        data=create_ideas_word_doc(ideas_list),
+        file_name="hearst_ideas.docx",
+        mime=DOCX_MIME,
+        key=key
+    )
+
+def display_job(job):
+    """
+    Show a background job's progress, error or result. Returns True while it is unfinished.
+    """
+    if job is None:
+        st.info("This generation is no longer available. Start a new one above.")
         return False
-    # Must look like an article (has a date or slug)
-    return re.search(r'/\d{4}/\d{2}/\d{2}/|/article|/news|/story|/202', url) is not None
+    if job["status"] == "queued":
+        st.info(f"Queued (position {job['queue_position']}). You can reload or leave this page; the job keeps running.")
+    elif job["status"] == "running":
+        st.progress(min(max(job["progress"], 0.0), 1.0), text=JOB_STAGE_LABELS.get(job["stage"], "Working..."))
+    elif job["status"] == "error":
+        st.error(job["error"])
+    elif job["kind"] == "posts":
+        result = job["result"]
+        if result.get("reused_topic"):
+            st.caption(f"Reused research from \"{result['reused_topic']}\".")
+        elif result.get("research_from_cache"):
+            st.caption("Loaded cached research for this topic. Tick \"Force refresh research\" to re-run it.")
+        display_rejected_links(result.get("rejected_links"))
+        display_post_cards(result["posts"])
+        for platform, error in (result.get("post_errors") or {}).items():
+            st.warning(f"{platform}: {error}")
+        display_research_cards(result["research"])
+        display_token_usage(result.get("token_usage"))
+        st.download_button(
+            label="⬇️ Download Word Report",
+            data=create_word_doc(result["posts"], result["research"]),
+            file_name="hearst_posts.docx",
+            mime=DOCX_MIME,
+            key=f"download_word_{job['id']}"
+        )
+    else:
+        result = job["result"]
+        st.caption(f"Using mining news gathered {int(NewsDigestStore.age_seconds(result['news']) // 60)} minutes ago.")
+        display_idea_cards(result["ideas"])
+        display_ideas_download(result["ideas"], key=f"download_ideas_word_{job['id']}")
+    return job["status"] not in FINISHED
 
 # ------------------ App UI ------------------
 
 
-tab1, tab2 = st.tabs(["📢 Post Generator", "💡 Idea Lab"])
+tab1, tab2, tab3 = st.tabs(["📢 Post Generator", "💡 Idea Lab", "🗂️ History"])
 
 with tab1:
     st.header("Professional Content Creation")
@@ -375,160 +267,328 @@ with tab1:
         "Enter Bitcoin mining topic:",
         placeholder="e.g., 'Renewable energy in Bitcoin mining'"
     )
-    if st.button("Generate Expert Content"):
+    force_refresh = st.checkbox(
+        "Force refresh research",
+        help="Ignore any cached research for this topic and run the research agent again."
+    )
+    similar_match, reuse_similar = None, False
+    if topic and not force_refresh and get_research_cache().get(topic, RESEARCH_INSTRUCTIONS) is None:
+        similar_index = get_similar_topic_index()
+        similar_match = similar_index.best_match(topic)
+        if similar_match is not None:
+            reuse_similar = st.checkbox(
+                f"Reuse research from the similar topic \"{similar_match['topic']}\" "
+                f"({similar_match['score']:.0%} match)",
+                value=similar_index.is_reusable(similar_match),
+                key=f"reuse_similar_{similar_match['key']}",
+                help="Skip the research agent and write posts from the research already done for that topic."
+            )
+    parallel_posts = st.toggle(
+        "Generate platform posts in parallel",
+        help="Write the LinkedIn, Instagram and X posts with one concurrent request each; a failed platform is retried on its own."
+    )
+    stream_output = st.toggle(
+        "Stream results as they are written",
+        help="Show each research and post card as soon as the model has finished writing it."
+    )
+    verify_links = st.toggle(
+        "Verify research links",
+        value=True,
+        help="Check every research link and drop dead links and homepages before writing posts."
+    )
+    use_compact_brief = st.toggle(
+        "Compact research before writing posts",
+        help="Send the post agents a short brief (key claims, top stats, links) instead of the full research summary."
+    )
+    run_posts_in_background = st.toggle(
+        "Run in the background",
+        value=True,
+        key="posts_background",
+        help="Keep generating if you reload or leave the page; the results appear here when ready. Streamed results always run in this page."
+    )
+    generate_posts_clicked = st.button("Generate Expert Content")
+    if generate_posts_clicked and run_posts_in_background and not stream_output:
+        # The job id lives in the URL, so a reload (or a shared link) reattaches to the job
+        st.query_params["posts_job"] = get_job_store().submit("posts", {
+            "topic": topic,
+            "force_refresh": force_refresh,
+            "parallel_posts": parallel_posts,
+            "verify_links": verify_links,
+            "compact": use_compact_brief,
+            "similar_key": similar_match["key"] if reuse_similar else None,
+            "similar_topic": similar_match["topic"] if reuse_similar else None,
+        })
+    elif generate_posts_clicked:
+        st.query_params.pop("posts_job", None)
+        token_ledger = TokenLedger()
         with st.spinner("Researching and generating content..."):
-            # Phase 1: Research
-            research_agent = create_research_agent()
-            research_raw = research_agent.run(topic)
-
-            # Try direct JSON load first, then fallback to extraction
-            try:
-                research_data = json.loads(research_raw.content)
-            except json.JSONDecodeError:
-                research_data = extract_json_from_text(research_raw.content)
-                if not research_data:
-                    st.error("Failed to parse research output. Received: " + research_raw.content)
-                    st.stop()
+            # Phase 1: Research (served from the shared cache when possible)
+            research_cache = get_research_cache()
+            research_data = None if force_refresh else research_cache.get(topic, RESEARCH_INSTRUCTIONS)
+            if research_data is not None:
+                st.caption("Loaded cached research for this topic. Tick \"Force refresh research\" to re-run it.")
+            elif reuse_similar:
+                research_data = get_similar_topic_index().load(similar_match)
+                if research_data is not None:
+                    METRICS.incr("research_reuse", result="similar")
+                    st.caption(f"Reused research from \"{similar_match['topic']}\". Untick the reuse box to research this topic fresh.")
+
+            # Cards are laid out up front so results can be filled in as they arrive
+            post_slots = {platform: st.empty() for platform, _, _, _ in POST_PLATFORMS}
+            research_slots = {key: st.empty() for key, _, _ in RESEARCH_CARDS}
+
+            if research_data is None:
+                if stream_output:
+                    # Render each research card as soon as its field is complete in the token stream
+                    with pipeline.AGENT_POOL.lease("research") as research_agent:
+                        reset_search_dedup(research_agent)
+                        with METRICS.span("research"):
+                            research_data, research_text = stream_json_object(
+                                research_agent.run(topic, stream=True),
+                                on_field=lambda key, value: display_research_cards({key: value}, research_slots, keys=[key])
+                            )
+                        token_ledger.record_response("research", research_agent.run_response, topic)
+                        record_response_metrics("research", research_agent.run_response)
+                    if not (isinstance(research_data, dict) and research_data):
+                        try:
+                            # Re-ask only this stage in JSON mode instead of starting over
+                            research_data = recover_output(
+                                "research", research_text, object_parser("research"),
+                                "Failed to parse research output.", ledger=token_ledger
+                            )
+                        except PipelineError as exc:
+                            stop_with_error(f"{exc} Received: {exc.raw}", "research")
+                    if isinstance(research_data, dict) and research_data:
+                        research_cache.set(topic, RESEARCH_INSTRUCTIONS, research_data)
+                else:
+                    try:
+                        # The cache was already checked above; this only stores the fresh result
+                        research_data, _ = research_topic(
+                            topic, cache=research_cache, force_refresh=True, ledger=token_ledger
+                        )
+                    except PipelineError as exc:
+                        stop_with_error(f"{exc} Received: {exc.raw}", "research")
 
             if not research_data:
                 st.warning("No valid research found. Try broadening your topic or adjusting keywords.")
             else:
+                if verify_links and isinstance(research_data, dict):
+                    # Verdicts are cached, so re-verifying cached research is cheap
+                    research_data, rejected_links = verify_source_links(research_data)
+                    display_rejected_links(rejected_links)
+
+                # 4-6. Research summary, simple explanation and links
+                display_research_cards(research_data, research_slots)
+
                 # Phase 2: Post Generation
-                post_agent = create_post_agent()
-                post_input = {
-                    "summary": research_data.get("summary", ""),
-                    "stats": research_data.get("stats", []),
-                    "links": research_data.get("links", [])
-                }
-                post_raw = post_agent.run(json.dumps(post_input))
-                try:
-                    posts = json.loads(post_raw.content)
-                except json.JSONDecodeError:
-                    posts = extract_json_from_text(post_raw.content)
-                    if not posts:
-                        st.error("Failed to parse posts output. Received: " + post_raw.content)
-                        st.stop()
-
-                # 1. LinkedIn Post Example
-                display_hearst_post(
-                    "LinkedIn Post Example", "💼",
-                    posts.get('linkedin', 'No LinkedIn post found.') +
-                    (f"<br><span style='color:#2EFFAF;font-size:0.95rem;'>Reference: <a href='{posts.get('linkedin_reference','')}' target='_blank'>{posts.get('linkedin_reference','')}</a></span>" if posts.get('linkedin_reference') else "")
-                )
-
-                # 2. Instagram Post Example
-                display_hearst_post(
-                    "Instagram Post Example", "📸",
-                    posts.get('instagram', 'No Instagram post found.') +
-                    (f"<br><span style='color:#2EFFAF;font-size:0.95rem;'>Reference: <a href='{posts.get('instagram_reference','')}' target='_blank'>{posts.get('instagram_reference','')}</a></span>" if posts.get('instagram_reference') else "")
-                )
-
-                # 3. X Post Example
-                display_hearst_post(
-                    "X Post Example", "✖️",
-                    posts.get('x', 'No X post found.') +
-                    (f"<br><span style='color:#2EFFAF;font-size:0.95rem;'>Reference: <a href='{posts.get('x_reference','')}' target='_blank'>{posts.get('x_reference','')}</a></span>" if posts.get('x_reference') else "")
-                )
-
-                # 4. Full Technical Research Summary
-                display_hearst_post("Full Technical Research Summary", "📑", research_data.get('summary', 'No research summary found.'))
-
-                # 5. Simple Explanation
-                display_hearst_post("Simple Explanation", "📝", research_data.get('simple_explanation', 'No simple explanation found.'))
-
-                # 6. Research Links
-                links_html = "<ul class='hearst-links'>" + "".join(
-                    f"<li><a href='{url}' target='_blank'>{url}</a></li>" for url in research_data.get('links', [])
-                ) + "</ul>"
-                display_hearst_post("Research Links", "🔗", links_html)
+                post_input = prepare_post_input(research_data, compact=use_compact_brief, ledger=token_ledger)
+                if parallel_posts:
+                    # One request per platform; each card fills in as its own result arrives
+                    for platform, _, title, _ in POST_PLATFORMS:
+                        post_slots[platform].info(f"Writing {title}...")
+                    posts = {}
+                    for platform, fragment, error in generate_posts_concurrently(
+                        post_input, ledger=token_ledger
+                    ):
+                        if error:
+                            title = next(p[2] for p in POST_PLATFORMS if p[0] == platform)
+                            post_slots[platform].warning(f"{title}: {error}")
+                            continue
+                        posts.update(fragment)
+                        display_post_cards(posts, post_slots, platforms=[platform])
+                elif stream_output:
+                    streamed_posts = {}
+
+                    def show_streamed_post(key, value):
+                        streamed_posts[key] = value
+                        platform = key[:-len("_reference")] if key.endswith("_reference") else key
+                        if platform in post_slots:
+                            display_post_cards(streamed_posts, post_slots, platforms=[platform])
+
+                    with pipeline.AGENT_POOL.lease("posts") as post_agent:
+                        with METRICS.span("posts"):
+                            posts, post_text = stream_json_object(
+                                post_agent.run(json.dumps(post_input), stream=True),
+                                on_field=show_streamed_post
+                            )
+                        token_ledger.record_response("posts", post_agent.run_response, json.dumps(post_input))
+                        record_response_metrics("posts", post_agent.run_response)
+                    if not (isinstance(posts, dict) and posts):
+                        try:
+                            posts = recover_output(
+                                "posts", post_text, object_parser("posts"), "Failed to parse posts output.", ledger=token_ledger
+                            )
+                        except PipelineError as exc:
+                            stop_with_error(f"{exc} Received: {exc.raw}", "posts")
+                    display_post_cards(posts, post_slots)
+                else:
+                    try:
+                        posts = generate_posts(
+                            research_data, ledger=token_ledger, post_input=post_input
+                        )
+                    except PipelineError as exc:
+                        stop_with_error(f"{exc} Received: {exc.raw}", "posts")
+
+                    # 1-3. LinkedIn, Instagram and X Post Examples
+                    display_post_cards(posts, post_slots)
+
+        display_token_usage(token_ledger.rows())
 
         # Export option
         if 'posts' in locals():
+            if posts:
+                get_history_store().add_posts_run(topic, research_data, posts)
             word_buffer = create_word_doc(posts, research_data)
             st.download_button(
                 label="⬇️ Download Word Report",
                 data=word_buffer,
                 file_name="hearst_posts.docx",
-                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                mime=DOCX_MIME,
                 key="download_word"
             )
 
+    posts_job_active = False
+    if st.query_params.get("posts_job"):
+        posts_job_active = display_job(get_job_store().get(st.query_params["posts_job"]))
+
 with tab2:
     st.header("Strategic Idea Generation")
-    if st.button("Generate 5 Expert Ideas"):
+    refresh_news = st.checkbox(
+        "Refresh mining news now",
+        help="Gather the latest news before generating ideas instead of using the background digest."
+    )
+    run_ideas_in_background = st.toggle(
+        "Run in the background",
+        value=True,
+        key="ideas_background",
+        help="Keep generating if you reload or leave the page; the ideas appear here when ready."
+    )
+    generate_ideas_clicked = st.button("Generate 5 Expert Ideas")
+    if generate_ideas_clicked and run_ideas_in_background:
+        st.query_params["ideas_job"] = get_job_store().submit("ideas", {"refresh_news": refresh_news})
+    elif generate_ideas_clicked:
+        st.query_params.pop("ideas_job", None)
         with st.spinner("Gathering latest mining news..."):
-            # Agent 1: Gather and summarize latest mining news
-            mining_news_agent = Agent(
-                name="Crypto Mining News Summarizer",
-                role="Summarize the latest (last 1-2 months) crypto mining news and provide a list of direct article links.",
-                model=Groq(id="llama-3.3-70b-versatile"),
-                tools=[DuckDuckGoTools(search=True, news=True)],
-                instructions=[
-                    "Research the latest (last 1-2 months) news and innovations in the crypto mining industry ONLY and make sure to give urls of the research.",
-                    "Return a JSON object with:",
-                    '{ "summary": "<detailed summary of the latest news>", "links": ["direct article link 1", "direct article link 2", "... (at least 5)"] }',
-                    "All links must be direct to a specific article, not homepages or topic pages."
-                ],
-                show_tool_calls=False,
-                markdown=False
-            )
-            mining_news = mining_news_agent.run("Latest crypto mining news and innovations")
+            # Agent 1: latest mining news, kept fresh in the background and only refreshed here when stale
+            news_store = get_news_digest_store()
             try:
-                mining_news_data = json.loads(mining_news.content)
-            except Exception:
-                mining_news_data = extract_json_from_text(mining_news.content)
-            if not mining_news_data or not mining_news_data.get("links"):
-                st.error("Failed to get mining news. Try again.")
-                st.stop()
-
+                if refresh_news:
+                    mining_news_data = news_store.refresh()
+                else:
+                    mining_news_data = news_store.get()
+            except PipelineError:
+                stop_with_error("Failed to get mining news. Try again.", "news")
+        st.caption(f"Using mining news gathered {int(NewsDigestStore.age_seconds(mining_news_data) // 60)} minutes ago.")
+
+        with st.spinner("Generating ideas from the latest mining news..."):
             # Agent 2: Generate 5 ideas from the summary and links
-            idea_agent = Agent(
-                name="Crypto Mining Idea Generator",
-                role="Generate actionable content ideas for Hearst based on mining news.",
-                model=Groq(id="llama-3.3-70b-versatile"),
-                instructions=[
-                    "Given the following mining news summary and links, generate 5 actionable content ideas for Hearst Corporation.",
-                    "Each idea must be about crypto mining or a new technology directly impacting mining.",
-                    "Return a JSON array of 5 objects, each with:",
-                    '{ "topic": "<short, catchy idea title>", "summary": "<5-10 sentence summary>", "description": "<detailed explanation>", "links": ["useful article link(s) from the provided list"], "suggested_post_angle": "<optional>" }'
-                ],
-                show_tool_calls=False,
-                markdown=False
-            )
-            idea_input = {
-                "summary": mining_news_data.get("summary", ""),
-                "links": mining_news_data.get("links", [])
-            }
-            ideas = idea_agent.run(json.dumps(idea_input))
             try:
-                ideas_list = json.loads(ideas.content)
-            except Exception:
-                ideas_list = extract_json_objects(ideas.content)
-            if not ideas_list:
-                st.error("Failed to parse ideas output. Received: " + ideas.content)
-                st.stop()
-
-            # Display ideas in a simple vertical stack (VBox)
-            for idx, idea in enumerate(ideas_list, 1):
-                st.markdown(f"""
-                <div class="hearst-card">
-                    <div class="hearst-title"><span class="hearst-icon">💡</span>{idx}. {idea.get('topic', 'No Topic')}</div>
-                    <div><b>Summary:</b> {idea.get('summary', '')}</div>
-                    <div style="margin-top:0.5em;"><b>Description:</b> {idea.get('description', '')}</div>
-                    {f"<div style='margin-top:0.5em;'><b>Useful Links:</b><ul class='hearst-links'>{''.join(f'<li><a href={url} target=_blank>{url}</a></li>' for url in idea.get('links', []))}</ul></div>" if idea.get('links') else ''}
-                    {f"<div style='margin-top:0.5em;'><b>Suggested Post Angle:</b> {idea.get('suggested_post_angle', '')}</div>" if idea.get('suggested_post_angle') else ""}
-                </div>
-                """, unsafe_allow_html=True)
+                ideas_list = generate_ideas(mining_news_data)
+            except PipelineError as exc:
+                stop_with_error(f"{exc} Received: {exc.raw}", "ideas")
+
+            display_idea_cards(ideas_list)
 
             # Download as Word
             if 'ideas_list' in locals():
-                ideas_word_buffer = create_ideas_word_doc(ideas_list)
-                st.markdown("<div style='margin-top:2rem; text-align:center;'><b style='color:#2EFFAF; font-size:1.15rem;'>Download these ideas as a Word document:</b></div>", unsafe_allow_html=True)
-                st.download_button(
-                    label="⬇️ Download Ideas Word Report",
-                    data=ideas_word_buffer,
-                    file_name="hearst_ideas.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                    key="download_ideas_word"
-                )
-
+                get_history_store().add_ideas_run(mining_news_data, ideas_list)
+                display_ideas_download(ideas_list, key="download_ideas_word")
+
+    ideas_job_active = False
+    if st.query_params.get("ideas_job"):
+        ideas_job_active = display_job(get_job_store().get(st.query_params["ideas_job"]))
+
+with tab3:
+    st.header("Content History")
+    history = get_history_store()
+    history_query = st.text_input("Search past research, posts and ideas:", placeholder="e.g. 'immersion cooling'")
+    history_kind = {"All": None, "Posts": "posts", "Ideas": "ideas"}[
+        st.radio("Show", ["All", "Posts", "Ideas"], horizontal=True, key="history_kind")
+    ]
+
+    # Pages are loaded on demand; a new search starts again from the first page
+    if st.session_state.get("history_filter") != (history_query, history_kind):
+        st.session_state.history_filter = (history_query, history_kind)
+        st.session_state.history_pages = 1
+
+    def open_history_run(run_id):
+        st.session_state.history_selected = run_id
+
+    def load_more_history():
+        st.session_state.history_pages += 1
+
+    # Only the opened run's content is loaded, and re-exporting it never calls an agent
+    selected_run = history.get(st.session_state.history_selected) if st.session_state.get("history_selected") else None
+    if selected_run:
+        st.subheader(selected_run["topic"])
+        st.caption(time.strftime("Generated %Y-%m-%d %H:%M", time.localtime(selected_run["created_at"])))
+        if selected_run["kind"] == "posts":
+            display_post_cards(selected_run["posts"] or {})
+            display_research_cards(selected_run["research"] or {})
+            history_word_buffer = create_word_doc(selected_run["posts"] or {}, selected_run["research"] or {})
+            history_file_name = "hearst_posts.docx"
+        else:
+            display_idea_cards(selected_run["ideas"] or [])
+            history_word_buffer = create_ideas_word_doc(selected_run["ideas"] or [])
+            history_file_name = "hearst_ideas.docx"
+        st.download_button(
+            label="⬇️ Download Word Report",
+            data=history_word_buffer,
+            file_name=history_file_name,
+            mime=DOCX_MIME,
+            key=f"download_history_{selected_run['id']}"
+        )
+        st.divider()
+
+    history_limit = DEFAULT_PAGE_SIZE * st.session_state.history_pages
+    # One extra row tells whether there is another page without counting every match
+    history_rows = history.search(history_query, kind=history_kind, limit=history_limit + 1)
+    if not history_rows:
+        st.info("No saved runs match this search." if history_query else "Generated posts and ideas are saved here automatically.")
+    for row in history_rows[:history_limit]:
+        label_col, open_col = st.columns([6, 1])
+        label_col.markdown(
+            f"**{row['topic']}** · {'Posts' if row['kind'] == 'posts' else 'Ideas'} · "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['created_at']))}"
+            + (f"  \n{row['snippet']}" if row["snippet"] else "")
+        )
+        open_col.button("Open", key=f"history_open_{row['id']}", on_click=open_history_run, args=(row["id"],))
+    if len(history_rows) > history_limit:
+        st.button("Load more", key="history_more", on_click=load_more_history)
+
+# ------------------ Admin Metrics ------------------
+def admin_panel_enabled():
+    flag = os.environ.get("HEARST_ADMIN_PANEL")
+    if flag is None:
+        try:
+            flag = st.secrets.get("HEARST_ADMIN_PANEL")
+        except Exception:
+            flag = None
+    return str(flag or "").lower() in ("1", "true", "on", "yes")
+
+if admin_panel_enabled():
+    with st.sidebar.expander("📈 Pipeline metrics", expanded=False):
+        st.caption("Latency per phase over the last runs of this server process.")
+        st.table(METRICS.phase_summary())
+        st.caption("Counters: tokens, tool calls, parse fallbacks, research cache hits, coalesced calls and aborted runs.")
+        st.table(METRICS.counters())
+        st.download_button(
+            label="⬇️ Prometheus snapshot",
+            data=METRICS.prometheus_text(),
+            file_name="hearst_metrics.prom",
+            mime="text/plain",
+            key="download_metrics"
+        )
+        st.caption("Background jobs by status.")
+        st.table([get_job_store().counts()])
+        st.caption("Model routing: calls, quality-check pass rate and p50 latency per stage and model.")
+        st.table(pipeline.MODEL_ROUTER.summary())
+        st.caption("Agent pool and resident memory of this process.")
+        st.table([pipeline.AGENT_POOL.stats()])
+        st.table(METRICS.gauges())
+
+# ------------------ Job Polling ------------------
+# Unfinished jobs are re-checked with a short rerun instead of blocking this session on the pipeline
+if posts_job_active or ideas_job_active:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
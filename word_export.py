@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from io import BytesIO
+
+from metrics import METRICS
+
+# ------------------ Configuration ------------------
+# A branded .docx whose styles, header and page setup every report inherits; if it is missing,
+# an equivalent template is built once per process.
+TEMPLATE_PATH = os.environ.get(
+    "HEARST_WORD_TEMPLATE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "hearst_report.docx"),
+)
+EXPORT_CACHE_MAX_ENTRIES = int(os.environ.get("HEARST_WORD_EXPORT_CACHE_MAX_ENTRIES", 64))
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+HEARST_WEBSITE = "https://www.hearstcorporation.io"
+BRAND_TITLE_RGB = (0x0A, 0x0F, 0x0F)
+BRAND_HEADING_RGB = (0x1A, 0x2C, 0x38)
+
+# ------------------ Template ------------------
+_template_lock = threading.Lock()
+_template_bytes = None
+
+
+def _build_default_template():
+    from docx import Document
+    from docx.shared import RGBColor
+
+    doc = Document()
+    doc.core_properties.author = "Hearst Corporation"
+    doc.styles["Title"].font.color.rgb = RGBColor(*BRAND_TITLE_RGB)
+    doc.styles["Heading 1"].font.color.rgb = RGBColor(*BRAND_HEADING_RGB)
+    doc.sections[0].header.paragraphs[0].text = f"Hearst Corporation | {HEARST_WEBSITE}"
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def template_bytes():
+    """
+    The branded template as bytes, read (or built) once per process.
+    """
+    global _template_bytes
+    with _template_lock:
+        if _template_bytes is None:
+            if os.path.exists(TEMPLATE_PATH):
+                with open(TEMPLATE_PATH, "rb") as f:
+                    _template_bytes = f.read()
+            else:
+                _template_bytes = _build_default_template()
+        return _template_bytes
+
+
+def _new_document():
+    from docx import Document
+    return Document(BytesIO(template_bytes()))
+
+
+def _to_bytes(doc):
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+# ------------------ Export Cache ------------------
+def content_hash(*parts):
+    return hashlib.sha256(
+        json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class ExportCache:
+    """
+    Thread-safe LRU of rendered .docx bytes keyed by a hash of the exported content.
+    """
+
+    def __init__(self, max_entries=EXPORT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        if data is not None:
+            METRICS.incr("word_export_cache", result="hit")
+            return data
+        METRICS.incr("word_export_cache", result="miss")
+        data = build()
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+EXPORT_CACHE = ExportCache()
+
+
+# ------------------ Word File Creation ------------------
+def render_word_doc(posts, research_data):
+    """
+    Build the posts and research report and return it as .docx bytes.
+    """
+    doc = _new_document()
+    doc.add_heading('Hearst Crypto Marketing Suite', 0)
+
+    # Posts
+    for plat in ['linkedin', 'instagram', 'x']:
+        doc.add_heading(f"{plat.title()} Post", level=1)
+        doc.add_paragraph(posts.get(plat, 'No post found.'))
+
+    # Full Technical Research Summary
+    doc.add_heading("Full Technical Research Summary", level=1)
+    doc.add_paragraph(research_data.get('summary', 'No research summary found.'))
+
+    # Simple Explanation
+    doc.add_heading("Simple Explanation", level=1)
+    doc.add_paragraph(research_data.get('simple_explanation', 'No simple explanation found.'))
+
+    # Research Links
+    doc.add_heading("Research Links", level=1)
+    for url in research_data.get('links', []):
+        doc.add_paragraph(url, style='List Bullet')
+
+    return _to_bytes(doc)
+
+
+def render_ideas_word_doc(ideas):
+    """
+    Build the Idea Lab report and return it as .docx bytes.
+    """
+    doc = _new_document()
+    doc.add_heading('Hearst Crypto Mining Ideas', 0)
+    for idx, idea in enumerate(ideas, 1):
+        doc.add_heading(f"{idx}. {idea.get('topic', 'No Topic')}", level=1)
+        doc.add_paragraph(f"Summary: {idea.get('summary', '')}")
+        doc.add_paragraph("Useful Links:")
+        for url in idea.get('links', []):
+            doc.add_paragraph(url, style='List Bullet')
+        doc.add_paragraph(f"Description: {idea.get('description', '')}")
+        if idea.get('suggested_post_angle'):
+            doc.add_paragraph(f"Suggested Post Angle: {idea.get('suggested_post_angle', '')}")
+        doc.add_paragraph("")  # Spacer
+    return _to_bytes(doc)
+
+
+@METRICS.timed("word_export")
+def create_word_doc(posts, research_data):
+    # Reruns and repeated downloads of the same content reuse the rendered document
+    data = EXPORT_CACHE.get_or_build(
+        content_hash("posts", posts, research_data), lambda: render_word_doc(posts, research_data)
+    )
+    return BytesIO(data)
+
+
+@METRICS.timed("ideas_word_export")
+def create_ideas_word_doc(ideas):
+    data = EXPORT_CACHE.get_or_build(content_hash("ideas", ideas), lambda: render_ideas_word_doc(ideas))
+    return BytesIO(data)
+
+
+# ------------------ Bulk Export ------------------
+def write_reports_zip(reports, fileobj):
+    """
+    Write one .docx per (filename, posts, research_data) from the reports iterable into a ZIP
+    on fileobj (a path or a binary file, which need not be seekable). Documents are rendered
+    and written one at a time, so only one is held in memory. Returns the number written.
+    """
+    written, names = 0, set()
+    # .docx files are already deflated, so they are stored as-is
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as zf:
+        for filename, posts, research_data in reports:
+            base, ext = os.path.splitext(filename)
+            ext = ext or ".docx"
+            name, n = base + ext, 1
+            while name in names:
+                n += 1
+                name = f"{base}-{n}{ext}"
+            names.add(name)
+            zf.writestr(name, render_word_doc(posts, research_data))
+            written += 1
+    return written